@@ -0,0 +1,96 @@
+"""
+Arbitration policies deciding which sender controls a receiver shared by several senders.
+"""
+# isort: off
+
+
+class LastInputWins:
+    """
+    Every sender may send input. Control moves to whoever sent the latest input.
+    """
+
+    def __init__(self):
+        self.owner = None
+
+    def allow(self, sender_id, now):  # pylint: disable=W0613
+        """
+        Decides whether input from a sender is injected.
+
+        Args:
+            sender_id (object): Identifies the sender connection.
+            now (float): The current time.monotonic() value.
+
+        Returns:
+            bool: True if the input should be injected.
+        """
+        self.owner = sender_id
+        return True
+
+    def release(self, sender_id):
+        """
+        Gives up control when a sender disconnects.
+
+        Args:
+            sender_id (object): Identifies the sender connection.
+        """
+        if self.owner == sender_id:
+            self.owner = None
+
+
+class ExclusiveLock:
+    """
+    The first sender to send input holds the lock. Other senders are ignored
+    until the holder disconnects or has been idle for longer than the timeout.
+    """
+
+    def __init__(self, timeout=5.0):
+        self.timeout = timeout
+        self.owner = None
+        self.last_input = 0.0
+
+    def allow(self, sender_id, now):
+        """
+        Decides whether input from a sender is injected.
+
+        Args:
+            sender_id (object): Identifies the sender connection.
+            now (float): The current time.monotonic() value.
+
+        Returns:
+            bool: True if the input should be injected.
+        """
+        if (
+            self.owner is None
+            or self.owner == sender_id
+            or now - self.last_input > self.timeout
+        ):
+            self.owner = sender_id
+            self.last_input = now
+            return True
+        return False
+
+    def release(self, sender_id):
+        """
+        Gives up the lock when a sender disconnects.
+
+        Args:
+            sender_id (object): Identifies the sender connection.
+        """
+        if self.owner == sender_id:
+            self.owner = None
+
+
+def create_arbitration_policy(policy_name, lock_timeout=5.0):
+    """
+    Creates an arbitration policy from its name.
+
+    Args:
+        policy_name (str): "last_input" or "exclusive".
+        lock_timeout (float): Idle seconds before an exclusive lock can be taken over.
+
+    Returns:
+        LastInputWins | ExclusiveLock: The arbitration policy.
+    """
+    if policy_name == "exclusive":
+        return ExclusiveLock(float(lock_timeout))
+    return LastInputWins()
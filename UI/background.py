@@ -0,0 +1,43 @@
+"""
+A daemon thread that runs until it is stopped.
+
+The heartbeats, the stack sampler and the file receiver all loop in a
+background thread until a stop event is set. BackgroundThread holds that
+event and the thread, and subclasses only implement run().
+"""
+# isort: off
+import threading
+
+
+class BackgroundThread:
+    """
+    Runs self.run() in a daemon thread until stop() sets self.stop_event.
+    """
+
+    def __init__(self):
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """
+        Purpose:
+            Starts run() in a background thread.
+        """
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Purpose:
+            Sets the stop event and waits for run() to return.
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        """
+        Purpose:
+            The work of the thread, which returns once stop_event is set.
+        """
+        raise NotImplementedError
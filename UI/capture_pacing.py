@@ -0,0 +1,207 @@
+"""
+Decides when the screen share captures its next frame.
+
+Grabbing and diffing an unchanged desktop at full frame rate burns CPU for
+nothing. CapturePacer doubles the wait after every capture that found no
+change, up to a ceiling, and goes back to the full frame rate as soon as
+something changes. It is woken early by the input injected on the
+receiver, which usually damages the screen, and by the X server's damage
+notifications where the XDamage extension is available. With damage
+notifications the ceiling is much longer, since a change never waits for
+the next poll.
+"""
+# isort: off
+import ctypes
+import ctypes.util
+import select
+import threading
+import time
+
+# Longest wait between captures, polling alone or with damage notifications
+POLL_MAX_INTERVAL = 0.5
+DAMAGE_MAX_INTERVAL = 2.0
+
+# From X11/extensions/Xdamage.h
+XDAMAGE_REPORT_NON_EMPTY = 3
+XDAMAGE_NOTIFY = 0
+
+
+class CapturePacer:
+    """
+    Exponential backoff between captures of an unchanged screen.
+    """
+
+    def __init__(self, fps=30, max_interval=POLL_MAX_INTERVAL):
+        """
+        Args:
+            fps (float): The highest capture rate.
+            max_interval (float): The longest wait between captures.
+        """
+        self.min_interval = 1 / fps
+        self.max_interval = max(max_interval, self.min_interval)
+        self.interval = self.min_interval
+        self.wake_event = threading.Event()
+        self.wakeups = 0
+
+    def wake(self):
+        """
+        Purpose:
+            Captures as soon as the frame rate allows. Safe from any thread.
+        """
+        self.wake_event.set()
+
+    def frame_done(self, changed):
+        """
+        Purpose:
+            Adjusts the wait after a capture.
+        Args:
+            changed (bool): The capture found something to send.
+        """
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+
+    def wait(self, started, stop_event):
+        """
+        Purpose:
+            Sleeps until the next capture is due, or until woken, but never
+            less than one frame after the previous capture started.
+        Args:
+            started (float): The time.monotonic() the previous capture started.
+            stop_event (threading.Event): Ends the wait early when set.
+        """
+        timeout = started + self.interval - time.monotonic()
+        if timeout > 0 and self.wake_event.wait(timeout):
+            self.wakeups += 1
+            self.interval = self.min_interval
+        # Damage from now on must wake the next wait
+        self.wake_event.clear()
+        remaining = started + self.min_interval - time.monotonic()
+        if remaining > 0:
+            stop_event.wait(remaining)
+
+
+class XEvent(ctypes.Union):
+    """
+    Room for any Xlib event, only its type is read.
+    """
+
+    _fields_ = [("type", ctypes.c_int), ("pad", ctypes.c_long * 24)]
+
+
+class XDamageMonitor:
+    """
+    Calls back whenever the X server reports damage to the root window.
+    """
+
+    def __init__(self, callback):
+        """
+        Args:
+            callback (callable): Called from a background thread on damage.
+        """
+        self.callback = callback
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.damage_events = 0
+
+    def start(self):
+        """
+        Purpose:
+            Subscribes to damage notifications in a background thread.
+        Returns:
+            bool: False if there is no X display or no XDamage extension.
+        """
+        x11_name = ctypes.util.find_library("X11")
+        damage_name = ctypes.util.find_library("Xdamage")
+        if x11_name is None or damage_name is None:
+            return False
+        try:
+            x11 = ctypes.CDLL(x11_name)
+            xdamage = ctypes.CDLL(damage_name)
+        except OSError as temp_error:
+            print("Unable to load XDamage:", temp_error)
+            return False
+        declare_xlib(x11, xdamage)
+
+        display = x11.XOpenDisplay(None)
+        if not display:
+            return False
+        event_base = ctypes.c_int()
+        error_base = ctypes.c_int()
+        if not xdamage.XDamageQueryExtension(
+            display, ctypes.byref(event_base), ctypes.byref(error_base)
+        ):
+            x11.XCloseDisplay(display)
+            return False
+        damage = xdamage.XDamageCreate(
+            display, x11.XDefaultRootWindow(display), XDAMAGE_REPORT_NON_EMPTY
+        )
+        x11.XFlush(display)
+        self.thread = threading.Thread(
+            target=self.run,
+            args=(x11, xdamage, display, damage, event_base.value + XDAMAGE_NOTIFY),
+            daemon=True,
+        )
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """
+        Purpose:
+            Stops listening and closes the X connection.
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self, x11, xdamage, display, damage, notify_type):
+        """
+        Purpose:
+            Waits for damage events on a display connection owned by this thread.
+        """
+        event = XEvent()
+        connection = x11.XConnectionNumber(display)
+        try:
+            while not self.stop_event.is_set():
+                select.select([connection], [], [], 0.2)
+                damaged = False
+                while x11.XPending(display):
+                    x11.XNextEvent(display, ctypes.byref(event))
+                    damaged = damaged or event.type == notify_type
+                if damaged:
+                    # Report again on the next damage, not on every rectangle
+                    xdamage.XDamageSubtract(display, damage, 0, 0)
+                    x11.XFlush(display)
+                    self.damage_events += 1
+                    self.callback()
+        finally:
+            xdamage.XDamageDestroy(display, damage)
+            x11.XCloseDisplay(display)
+
+
+def declare_xlib(x11, xdamage):
+    """
+    Purpose:
+        Declares the Xlib and XDamage functions used, so that pointers and
+        XIDs are not truncated to int.
+    """
+    display = ctypes.c_void_p
+    xid = ctypes.c_ulong
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = display
+    x11.XDefaultRootWindow.argtypes = [display]
+    x11.XDefaultRootWindow.restype = xid
+    for name in ("XConnectionNumber", "XPending", "XFlush", "XCloseDisplay"):
+        getattr(x11, name).argtypes = [display]
+    x11.XNextEvent.argtypes = [display, ctypes.POINTER(XEvent)]
+    xdamage.XDamageQueryExtension.argtypes = [
+        display,
+        ctypes.POINTER(ctypes.c_int),
+        ctypes.POINTER(ctypes.c_int),
+    ]
+    xdamage.XDamageCreate.argtypes = [display, xid, ctypes.c_int]
+    xdamage.XDamageCreate.restype = xid
+    xdamage.XDamageSubtract.argtypes = [display, xid, xid, xid]
+    xdamage.XDamageDestroy.argtypes = [display, xid]
@@ -0,0 +1,453 @@
+"""
+Command line entry point that runs a sender or a receiver without the Tk UI.
+
+Options come from the command line, from a JSON config file whose keys match
+the long option names, or from the built-in defaults, in that order.
+
+    python cli.py receiver --port 5000
+    python cli.py sender --targets 192.168.1.20,192.168.1.21:5001 --port 5000
+    python cli.py receiver --config receiver.json --daemon
+
+In daemon mode the process reports its state to systemd, so it can run as a
+Type=notify service:
+
+    [Service]
+    Type=notify
+    ExecStart=/usr/bin/python3 /opt/cross-keys/UI/cli.py receiver --port 5000 --daemon
+    KillSignal=SIGTERM
+
+SIGTERM and SIGINT stop the session gracefully, SIGUSR1 prints the
+connection health. --metrics-port serves the Prometheus metrics on http://127.0.0.1:<port>/metrics
+and --metrics-file writes them to a file every --metrics-interval seconds.
+--compress makes a sender compress its packets, which receivers accept
+unless started with --no-compression. A receiver started with --tls-cert
+and --tls-key only accepts TLS connections, from senders given its
+certificate with --tls-trust, see encryption.py. --screen-share makes a
+receiver share its screen, which the Tk UI of a sender displays.
+--accept-files makes a receiver accept files from senders into
+--download-dir. --profiling
+times the input path and samples the thread stacks from the start, and
+SIGUSR2 toggles profiling during a live session. The results are written to
+--profiling-dir when profiling stops.
+"""
+# isort: off
+import argparse
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from event_bus import ui_events
+from input_profiler import PROFILER
+from metrics import REGISTRY, MetricsFileWriter, MetricsServer
+from screen_layout import load_screen_layout
+from session import SessionState
+from socket_options import DEFAULT_PROFILE, SOCKET_PROFILES
+from targets import parse_targets, validate_ip_address, validate_port_number
+
+DEFAULTS = {
+    "ip_address": "0.0.0.0",
+    "port": 5000,
+    "profile": DEFAULT_PROFILE,
+    "arbitration": "last_input",
+    "lock_timeout": 5.0,
+    "advertise": True,
+    "targets": None,
+    "layout": "layout.json",
+    "stall_deadline": 2.0,
+    "daemon": False,
+    "metrics_interval": 60.0,
+    "metrics_port": None,
+    "metrics_file": None,
+    "profiling": False,
+    "profiling_dir": "profiles",
+    "compression": None,
+    "tls_cert": None,
+    "tls_key": None,
+    "tls_trust": None,
+    "file_transfer": False,
+    "download_dir": None,
+    "screen_share": False,
+}
+
+
+def notify_systemd(state):
+    """
+    Purpose:
+        Sends a state update to systemd, if it started the process.
+
+    Args:
+        state (str): The update, for example "READY=1" or "STATUS=...".
+    """
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return
+    # A leading @ names a socket in the abstract namespace
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as notify_socket:
+            notify_socket.connect(address)
+            notify_socket.sendall(bytes(state, "utf-8"))
+    except OSError as temp_error:
+        print("Unable to notify systemd:", temp_error)
+
+
+def create_parser():
+    """
+    Purpose:
+        Builds the command line parser. Options default to None so that
+        values from the config file can fill in what was not given.
+
+    Return:
+        argparse.ArgumentParser: The parser.
+    """
+    # Options shared by both modes, accepted after the mode name
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", help="JSON file with default option values")
+    common.add_argument(
+        "--daemon",
+        action="store_const",
+        const=True,
+        help="report to systemd and print the connection health periodically",
+    )
+    common.add_argument(
+        "--metrics-interval",
+        type=float,
+        help="seconds between health reports and metrics file writes",
+    )
+    common.add_argument("--profile", choices=list(SOCKET_PROFILES), help="socket profile")
+    common.add_argument("--port", type=int, help="port of the receivers")
+    common.add_argument(
+        "--metrics-port", type=int, help="serve the metrics on this local port"
+    )
+    common.add_argument("--metrics-file", help="write the metrics to this file")
+    common.add_argument(
+        "--profiling",
+        action="store_const",
+        const=True,
+        help="profile the input path from the start",
+    )
+    common.add_argument("--profiling-dir", help="where to write the profiles")
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    modes = parser.add_subparsers(dest="mode", required=True)
+    receiver_parser = modes.add_parser(
+        "receiver", parents=[common], help="inject input from senders"
+    )
+    receiver_parser.add_argument("--ip-address", help="address to listen on")
+    receiver_parser.add_argument("--arbitration", choices=["last_input", "exclusive"])
+    receiver_parser.add_argument("--lock-timeout", type=float)
+    receiver_parser.add_argument(
+        "--no-advertise",
+        dest="advertise",
+        action="store_const",
+        const=False,
+        help="do not answer discovery queries",
+    )
+    receiver_parser.add_argument(
+        "--no-compression",
+        dest="compression",
+        action="store_const",
+        const=False,
+        help="refuse compression offered by senders",
+    )
+    receiver_parser.add_argument(
+        "--tls-cert", help="PEM certificate, senders must then connect with TLS"
+    )
+    receiver_parser.add_argument("--tls-key", help="PEM private key of --tls-cert")
+    receiver_parser.add_argument(
+        "--accept-files",
+        dest="file_transfer",
+        action="store_const",
+        const=True,
+        help="accept files from senders on the port after --port",
+    )
+    receiver_parser.add_argument(
+        "--download-dir", help="where to save received files, ~/Downloads by default"
+    )
+    receiver_parser.add_argument(
+        "--screen-share",
+        dest="screen_share",
+        action="store_const",
+        const=True,
+        help="share the screen with senders, two ports after --port",
+    )
+
+    sender_parser = modes.add_parser(
+        "sender", parents=[common], help="send local input to receivers"
+    )
+    sender_parser.add_argument(
+        "--targets", help="comma separated receivers, each an IP address or ip:port"
+    )
+    sender_parser.add_argument("--layout", help="screen layout JSON file")
+    sender_parser.add_argument("--stall-deadline", type=float)
+    sender_parser.add_argument(
+        "--compress",
+        dest="compression",
+        action="store_const",
+        const=True,
+        help="compress the packets for receivers that accept it",
+    )
+    sender_parser.add_argument(
+        "--tls-trust", help="PEM certificates of the receivers, enables TLS"
+    )
+    return parser
+
+
+def load_options(arguments):
+    """
+    Purpose:
+        Merges the command line, the config file and the defaults.
+
+    Args:
+        arguments (argparse.Namespace): The parsed command line.
+
+    Return:
+        dict: The option values, or None if the config file is unusable.
+    """
+    config = {}
+    if arguments.config:
+        try:
+            with open(arguments.config, "r", encoding="UTF-8") as config_file:
+                config = json.load(config_file)
+        except (OSError, json.JSONDecodeError) as temp_error:
+            print("Unable to read " + arguments.config + ":", temp_error)
+            return None
+
+    resolved = {"mode": arguments.mode}
+    for name, default in DEFAULTS.items():
+        value = getattr(arguments, name, None)
+        if value is None:
+            value = config.get(name, default)
+        resolved[name] = value
+    return resolved
+
+
+class HealthReport:
+    """
+    Latest health reported by the session, kept for the periodic reports.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.started_at = time.monotonic()
+        self.status_lines = []
+        self.errors = []
+
+    def update(self, status_lines):
+        """
+        Purpose:
+            Records the latest health lines.
+        Args:
+            status_lines (list): One line per receiver or sender.
+        """
+        self.status_lines = status_lines
+
+    def record_error(self, message):
+        """
+        Purpose:
+            Records an error reported by the session.
+        Args:
+            message (str): The error message.
+        """
+        self.errors.append(message)
+        print("Error: " + message)
+
+    def dump(self):
+        """
+        Purpose:
+            Prints the health and publishes a one line summary to systemd.
+        """
+        summary = (
+            f"{self.session.state}, up {time.monotonic() - self.started_at:.0f} s, "
+            f"{len(self.status_lines)} peers"
+        )
+        print("Health: " + summary)
+        for line in self.status_lines:
+            print("    " + line)
+        notify_systemd("STATUS=" + summary)
+
+
+def report_profile(paths):
+    """
+    Purpose:
+        Prints where a profile was written, or that profiling started.
+
+    Args:
+        paths (list): The files written when profiling stopped.
+    """
+    if paths:
+        print("Profile written to " + ", ".join(paths))
+    elif PROFILER.enabled:
+        print("Profiling started")
+
+
+def start_service(options, session):
+    """
+    Purpose:
+        Starts the sender or receiver in a worker thread.
+
+    Args:
+        options (dict): The resolved options.
+        session (SessionState): The session of the service.
+
+    Return:
+        threading.Thread: The worker thread, or None if the options are invalid.
+    """
+    if options["mode"] == "receiver":
+        if not (
+            validate_ip_address(options["ip_address"])
+            and validate_port_number(options["port"])
+        ):
+            print("Invalid IP Address or Port")
+            return None
+        from receiver import create_receiver_connection  # pylint: disable=C0415
+
+        target = create_receiver_connection
+        service_options = {
+            "ip_address": options["ip_address"],
+            "port": options["port"],
+            "arbitration": options["arbitration"],
+            "lock_timeout": options["lock_timeout"],
+            "advertise": options["advertise"],
+            "socket_profile": options["profile"],
+            # Receivers accept compression unless told otherwise
+            "compression": options["compression"] is not False,
+            "tls_cert": options["tls_cert"],
+            "tls_key": options["tls_key"],
+            "file_transfer": options["file_transfer"],
+            "download_dir": options["download_dir"],
+            "screen_share": options["screen_share"],
+        }
+    else:
+        targets = parse_targets(options["targets"] or "", options["port"])
+        if not targets:
+            print("Invalid receivers: " + str(options["targets"]))
+            return None
+        from sender import create_sender_connection  # pylint: disable=C0415
+
+        target = create_sender_connection
+        service_options = {
+            "targets": targets,
+            "screen_layout": load_screen_layout(options["layout"], targets),
+            "stall_deadline": options["stall_deadline"],
+            "socket_profile": options["profile"],
+            "compression": bool(options["compression"]),
+            "tls_trust": options["tls_trust"],
+        }
+
+    worker = threading.Thread(target=target, args=(session, service_options))
+    worker.start()
+    return worker
+
+
+def create_exporters(options):
+    """
+    Purpose:
+        Creates the metrics server and file writer asked for by the options.
+
+    Args:
+        options (dict): The resolved options.
+
+    Return:
+        list: The exporters, not started yet.
+
+    Raises:
+        OSError: If the metrics port cannot be bound.
+    """
+    exporters = []
+    if options["metrics_port"] is not None:
+        exporters.append(MetricsServer(REGISTRY, port=options["metrics_port"]))
+    if options["metrics_file"]:
+        exporters.append(
+            MetricsFileWriter(
+                REGISTRY, options["metrics_file"], options["metrics_interval"]
+            )
+        )
+    return exporters
+
+
+def main(argv=None):
+    """
+    Purpose:
+        Runs a sender or receiver until it is stopped by a signal or fails.
+
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
+
+    Return:
+        int: The exit status.
+    """
+    options = load_options(create_parser().parse_args(argv))
+    if options is None:
+        return 2
+
+    session = SessionState(
+        on_failure=lambda message: ui_events.publish("error", message)
+    )
+    health_report = HealthReport(session)
+    # Without a Tk main loop the events are delivered on this thread instead
+    ui_events.subscribe("error", health_report.record_error)
+    ui_events.subscribe("target_health", health_report.update)
+    ui_events.subscribe("sender_stats", health_report.update)
+
+    def stop(signal_number, _frame):
+        print("Stopping on " + signal.Signals(signal_number).name)
+        notify_systemd("STOPPING=1")
+        session.stop()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    # Profiling is toggled by the main loop, outside of the signal handler
+    profiling_toggle = threading.Event()
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda _signal, _frame: health_report.dump())
+        signal.signal(signal.SIGUSR2, lambda _signal, _frame: profiling_toggle.set())
+
+    try:
+        exporters = create_exporters(options)
+    except OSError as temp_error:
+        print("Unable to serve the metrics:", temp_error)
+        return 2
+    for exporter in exporters:
+        exporter.start()
+
+    session.start()
+    worker = start_service(options, session)
+    if worker is None:
+        for exporter in exporters:
+            exporter.stop()
+        return 2
+    if options["profiling"]:
+        report_profile(PROFILER.toggle(options["profiling_dir"]))
+    if options["daemon"]:
+        notify_systemd("READY=1")
+
+    next_dump = time.monotonic() + options["metrics_interval"]
+    while worker.is_alive():
+        session.stop_event.wait(0.2)
+        ui_events.drain()
+        if profiling_toggle.is_set():
+            profiling_toggle.clear()
+            report_profile(PROFILER.toggle(options["profiling_dir"]))
+        if options["daemon"] and time.monotonic() >= next_dump:
+            health_report.dump()
+            next_dump = time.monotonic() + options["metrics_interval"]
+
+    # The worker exits on its own once the session fails
+    session.stop()
+    worker.join()
+    ui_events.drain()
+    health_report.dump()
+    report_profile(PROFILER.stop(options["profiling_dir"]))
+    for exporter in exporters:
+        exporter.stop()
+    return 1 if session.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+Fixtures shared by the tests.
+"""
+# isort: off
+import threading
+import pytest
+from receiver import Receiver
+
+
+@pytest.fixture
+def start_receiver():
+    """
+    Returns a function that starts a receiver on a free loopback port, and
+    stops every receiver it started once the test is over.
+    """
+    started = []
+
+    def start(options=None):
+        receiver = Receiver("127.0.0.1", 0, options=options)
+        assert receiver.create_server()
+        receiver_thread = threading.Thread(target=receiver.serve)
+        receiver_thread.start()
+        started.append((receiver, receiver_thread))
+        return receiver
+
+    yield start
+    for receiver, receiver_thread in started:
+        receiver.session.stop()
+        receiver_thread.join()
+        receiver.close_connection()
@@ -0,0 +1,589 @@
+"""
+Pool of persistent connections from one sender to several receivers.
+
+The pool keeps a TCP connection open to every configured receiver so that
+switching the active receiver costs nothing, and broadcasting sends the same
+encoded packet to a group of receivers.
+"""
+# isort: off
+import socket
+import threading
+import time
+from encryption import ClientSession
+from event_bus import ui_events
+from health_monitor import LinkStats
+from metrics import OUTAGE_PACKETS, PACKETS_SENT, RECONNECTS
+from socket_options import (
+    DEFAULT_PROFILE,
+    ChannelOptions,
+    configure_socket,
+    get_socket_profile,
+)
+from stream_compression import request_compression
+
+
+OUTAGE_COLLAPSED = OUTAGE_PACKETS.labels("collapsed")
+OUTAGE_DROPPED = OUTAGE_PACKETS.labels("dropped")
+
+
+def create_client_connection(
+    ip_address, port, socket_profile=DEFAULT_PROFILE, tls=None
+):
+    """
+    Purpose:
+        Creates a TCP connection to the server.
+
+    Args:
+        ip_address (str): The IP address of the server.
+        port (int): The port number of the server.
+        socket_profile (str): The name of the socket profile to apply.
+        tls (ClientSession): Encrypts the connection when given.
+
+    Return:
+        client_socket (socket.socket): The socket object that was created,
+        or None if the connection failed.
+    """
+    # Create a TCP socket object, tuned before connecting so the buffer
+    # sizes are part of the TCP handshake
+    client_address = (str(ip_address), int(port))
+    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    configure_socket(client_socket, socket_profile)
+    client_socket.settimeout(get_socket_profile(socket_profile)["connect_timeout"])
+
+    try:
+        # Connect to the server, the TLS handshake shares the connect timeout
+        client_socket.connect(client_address)
+        if tls is not None:
+            client_socket = tls.wrap(client_socket)
+    except (socket.error, ConnectionRefusedError, OSError) as temp_error:
+        print("Socket error:", temp_error)
+        client_socket.close()
+        return None
+
+    client_socket.settimeout(get_socket_profile(socket_profile)["timeout"])
+    return client_socket
+
+
+class OutageBuffer:
+    """
+    Holds the packets sent to a receiver while its connection is down.
+
+    Key, click and scroll packets are kept in order. Consecutive mouse moves
+    collapse to the latest one, since only the final position matters.
+    """
+
+    def __init__(self, resync_packets, max_packets=10000):
+        """
+        Args:
+            resync_packets (list): Packets that restore the key state the
+            receiver had when the connection dropped.
+            max_packets (int): The number of packets kept before dropping new ones.
+        """
+        self.packets = list(resync_packets)
+        self.pending_move = None
+        self.max_packets = max_packets
+        self.dropped = 0
+        self.collapsed = 0
+
+    def add(self, message):
+        """
+        Purpose:
+            Buffers a packet until the connection is resumed.
+        Args:
+            message (bytes): The encoded packet.
+        """
+        if message[:1] == b"M":
+            if self.pending_move is not None:
+                self.collapsed += 1
+                OUTAGE_COLLAPSED.inc()
+            self.pending_move = message
+            return
+
+        # Keep the position the cursor had when the button or key was used
+        if self.pending_move is not None:
+            self.packets.append(self.pending_move)
+            self.pending_move = None
+
+        if len(self.packets) < self.max_packets:
+            self.packets.append(message)
+        else:
+            self.dropped += 1
+            OUTAGE_DROPPED.inc()
+
+    def drain(self):
+        """
+        Purpose:
+            Joins the buffered packets for replay. The buffer is left as it
+            is, so a failed replay can be retried with later packets added.
+        Returns:
+            bytes: The packets in the order they have to be replayed.
+        """
+        if self.pending_move is None:
+            return b"".join(self.packets)
+        return b"".join(self.packets) + self.pending_move
+
+
+class TargetConnection:
+    """
+    A persistent connection to a single receiver.
+
+    When the connection drops, packets are buffered while a background thread
+    reconnects with exponential backoff, then replayed once it is resumed.
+    """
+
+    def __init__(self, ip_address, port, resync=None, options=None):
+        """
+        Args:
+            ip_address (str): The IP address of the receiver.
+            port (int): The port number of the receiver.
+            resync (callable): Returns the packets that restore the key state
+            on the receiver after a reconnect.
+            options (ChannelOptions): The socket profile, and whether to offer
+            compression on every new connection and to encrypt them.
+            Compression is ignored on encrypted connections, where compressed
+            lengths would reveal what is typed.
+        """
+        options = options or ChannelOptions()
+        self.ip_address = ip_address
+        self.port = int(port)
+        self.socket_profile = options.socket_profile
+        self.tls = None
+        if options.tls_context is not None:
+            # One session per receiver, resumed by every reconnect
+            self.tls = ClientSession(options.tls_context)
+        self.compression = options.compression and self.tls is None
+        self.compressor = None
+        self.resync = resync or list
+        self.socket_fd = None
+        self.connected = False
+        self.closing = False
+        self.lock = threading.Lock()
+        self.outage = None
+        self.outage_started = 0.0
+        self.reconnect_thread = None
+        self.reconnect_attempts = 0
+        self.reconnect_count = 0
+        self.last_reconnect_time = None
+        self.link_stats = LinkStats()
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.last_error = ""
+
+    @property
+    def name(self):
+        """
+        Returns:
+            str: The address of the receiver as ip:port.
+        """
+        return f"{self.ip_address}:{self.port}"
+
+    def connect(self):
+        """
+        Purpose:
+            Opens the connection to the receiver.
+        Returns:
+            bool: True if the receiver is connected, False otherwise.
+        """
+        self.socket_fd, self.compressor = self.open_socket()
+        self.connected = self.socket_fd is not None
+        self.last_error = "" if self.connected else "Unable to connect"
+        self.link_stats = LinkStats()
+        return self.connected
+
+    def open_socket(self):
+        """
+        Purpose:
+            Opens a socket to the receiver and negotiates compression.
+        Returns:
+            tuple: (socket.socket, StreamCompressor), the socket is None if
+            the receiver cannot be reached and the compressor is None if the
+            stream is not compressed.
+        """
+        client_socket = create_client_connection(
+            self.ip_address, self.port, self.socket_profile, self.tls
+        )
+        if client_socket is None or not self.compression:
+            return client_socket, None
+        try:
+            return client_socket, request_compression(client_socket)
+        except TimeoutError:
+            # A late acceptance would make the receiver expect compressed bytes
+            print("No compression answer from " + self.name + ", reconnecting")
+            client_socket.close()
+        client_socket = create_client_connection(
+            self.ip_address, self.port, self.socket_profile, self.tls
+        )
+        return client_socket, None
+
+    def send(self, message):
+        """
+        Purpose:
+            Sends an encoded packet to the receiver, or buffers it while reconnecting.
+        Args:
+            message (bytes): The message to be sent.
+        Returns:
+            bool: True if the message was sent or buffered, False otherwise.
+        """
+        with self.lock:
+            if not self.connected:
+                if self.outage is None:
+                    return False
+                self.outage.add(message)
+                return True
+            try:
+                if self.compressor is None:
+                    self.socket_fd.sendall(message)
+                else:
+                    self.socket_fd.sendall(self.compressor.compress(message))
+            except OSError as temp_error:
+                self.start_outage(str(temp_error) or "Connection Clossed by Receiver")
+                self.outage.add(message)
+                return True
+        self.packets_sent += 1
+        self.bytes_sent += len(message)
+        PACKETS_SENT.count(message)
+        return True
+
+    def send_control(self, message):
+        """
+        Purpose:
+            Sends a control packet such as a heartbeat. Control packets are
+            only meaningful on a live connection, so they are never buffered.
+        Args:
+            message (bytes): The message to be sent.
+        Returns:
+            bool: True if the message was sent successfully, False otherwise.
+        """
+        with self.lock:
+            if not self.connected:
+                return False
+            try:
+                if self.compressor is None:
+                    self.socket_fd.sendall(message)
+                else:
+                    self.socket_fd.sendall(self.compressor.compress(message))
+            except OSError as temp_error:
+                self.start_outage(str(temp_error) or "Connection Clossed by Receiver")
+                return False
+        PACKETS_SENT.count(message)
+        return True
+
+    def receive(self, size=4096):
+        """
+        Purpose:
+            Reads the answers of the receiver, such as heartbeat echoes, without
+            blocking. A TLS connection must not be read while another thread
+            writes to it, so the read takes the lock like the writes.
+        Args:
+            size (int): The most bytes to read.
+        Returns:
+            bytes: The data read, empty if the receiver closed the connection.
+        Raises:
+            OSError: If nothing complete can be read yet, or the read failed.
+        """
+        with self.lock:
+            if not self.connected:
+                raise OSError("Not connected")
+            self.socket_fd.settimeout(0)
+            try:
+                return self.socket_fd.recv(size)
+            finally:
+                self.socket_fd.settimeout(
+                    get_socket_profile(self.socket_profile)["timeout"]
+                )
+
+    def fail(self, error_message):
+        """
+        Purpose:
+            Treats a live connection as dropped, for example after a missed heartbeat.
+        Args:
+            error_message (str): Why the connection is considered dropped.
+        """
+        with self.lock:
+            if self.connected:
+                self.start_outage(error_message)
+
+    def start_outage(self, error_message):
+        """
+        Purpose:
+            Marks the connection as down and starts reconnecting in the background.
+            Must be called with the lock held.
+        Args:
+            error_message (str): Why the connection dropped.
+        """
+        self.connected = False
+        self.last_error = error_message
+        if isinstance(self.socket_fd, socket.socket):
+            if self.tls is not None:
+                self.tls.remember(self.socket_fd)
+            self.socket_fd.close()
+        if self.closing or self.outage is not None:
+            return
+        print("Lost connection to " + self.name + ": " + error_message)
+        self.outage = OutageBuffer(self.resync())
+        self.outage_started = time.monotonic()
+        self.reconnect_attempts = 0
+        self.reconnect_thread = threading.Thread(target=self.reconnect, daemon=True)
+        self.reconnect_thread.start()
+
+    def reconnect(self, initial_delay=0.05, max_delay=5.0):
+        """
+        Purpose:
+            Reconnects with exponential backoff, then replays the buffered packets.
+        Args:
+            initial_delay (float): Seconds before the first attempt.
+            max_delay (float): The longest wait between two attempts.
+        """
+        delay = initial_delay
+        while not self.closing:
+            time.sleep(delay)
+            self.reconnect_attempts += 1
+            client_socket, compressor = self.open_socket()
+            if client_socket is not None:
+                with self.lock:
+                    # close() may have run while the socket was opening
+                    if self.closing:
+                        client_socket.close()
+                        return
+                    replay = self.outage.drain()
+                    if compressor is not None:
+                        replay = compressor.compress(replay)
+                    try:
+                        client_socket.sendall(replay)
+                    except OSError as temp_error:
+                        client_socket.close()
+                        self.last_error = str(temp_error)
+                    else:
+                        self.socket_fd = client_socket
+                        self.compressor = compressor
+                        self.link_stats = LinkStats()
+                        self.connected = True
+                        self.outage = None
+                        self.reconnect_count += 1
+                        RECONNECTS.inc()
+                        self.last_reconnect_time = (
+                            time.monotonic() - self.outage_started
+                        )
+                        print(
+                            f"Reconnected to {self.name} in "
+                            f"{self.last_reconnect_time * 1000:.0f} ms"
+                        )
+                        return
+            delay = min(delay * 2, max_delay)
+
+    def status(self):
+        """
+        Purpose:
+            Describes the state of the connection.
+        Returns:
+            str: The connection state.
+        """
+        if self.connected:
+            state = "connected" + self.link_stats.describe()
+            if self.compressor is not None and self.compressor.bytes_in:
+                ratio = self.compressor.bytes_out / self.compressor.bytes_in
+                state += f", compressed to {ratio:.0%}"
+            if self.tls is not None:
+                state += self.tls.describe()
+            if self.last_reconnect_time is not None:
+                state += (
+                    f", {self.reconnect_count} reconnects,"
+                    f" last took {self.last_reconnect_time * 1000:.0f} ms"
+                )
+            return state
+        if self.outage is not None:
+            return (
+                f"reconnecting (attempt {self.reconnect_attempts},"
+                f" {len(self.outage.packets)} packets buffered): {self.last_error}"
+            )
+        return "down: " + self.last_error
+
+    def close(self):
+        """
+        Purpose:
+            Closes the connection to the receiver and stops reconnecting.
+        """
+        self.closing = True
+        with self.lock:
+            if isinstance(self.socket_fd, socket.socket):
+                self.socket_fd.close()
+            self.connected = False
+
+
+class ConnectionPool:
+    """
+    Routes packets to the active receiver or broadcasts them to a group.
+    """
+
+    def __init__(self, targets, key_state=None, options=None):
+        """
+        Args:
+            targets (list): A list of (ip_address, port) tuples, one per receiver.
+            key_state (callable): Returns the press packets of the keys currently
+            held, used to resynchronize a receiver after a reconnect.
+            options (ChannelOptions): How to connect to every receiver.
+        """
+        self.key_state = key_state or list
+        self.targets = [
+            TargetConnection(ip, port, self.resync_callback(index), options)
+            for index, (ip, port) in enumerate(targets)
+        ]
+        self.active_index = 0
+        self.broadcast_group = None
+        self.published_health = []
+        self.lock = threading.Lock()
+
+    @property
+    def active_target(self):
+        """
+        Returns:
+            TargetConnection: The receiver that currently gets the events.
+        """
+        return self.targets[self.active_index]
+
+    @property
+    def connected(self):
+        """
+        Returns:
+            bool: True if at least one receiver is connected or reconnecting.
+        """
+        return any(
+            target.connected or target.outage is not None for target in self.targets
+        )
+
+    def resync_callback(self, index):
+        """
+        Purpose:
+            Creates the key state resync callback of a receiver.
+        Args:
+            index (int): The index of the receiver in the pool.
+        Returns:
+            callable: Returns the press packets of the keys held on that receiver.
+        """
+
+        def resync():
+            group = self.broadcast_group
+            routed = index in group if group is not None else index == self.active_index
+            return self.key_state() if routed else []
+
+        return resync
+
+    def connect_all(self):
+        """
+        Purpose:
+            Connects to every receiver in the pool. Receivers that cannot be
+            reached yet keep being retried in the background.
+        Returns:
+            int: The number of receivers that are connected.
+        """
+        connected_count = sum(1 for target in self.targets if target.connect())
+        if connected_count:
+            for target in self.targets:
+                if not target.connected:
+                    with target.lock:
+                        target.start_outage(target.last_error)
+        self.publish_health()
+        return connected_count
+
+    def select_target(self, index):
+        """
+        Purpose:
+            Makes the receiver at index the active target and stops broadcasting.
+        Args:
+            index (int): The index of the receiver in the pool.
+        """
+        with self.lock:
+            self.active_index = index % len(self.targets)
+            self.broadcast_group = None
+        self.publish_health()
+
+    def next_target(self):
+        """
+        Purpose:
+            Makes the next receiver in the pool the active target.
+        """
+        self.select_target(self.active_index + 1)
+
+    def set_broadcast(self, group):
+        """
+        Purpose:
+            Broadcasts every packet to a group of receivers.
+        Args:
+            group (iterable): Indexes of the receivers in the group,
+            or None to send to the active target only.
+        """
+        with self.lock:
+            self.broadcast_group = None if group is None else tuple(group)
+        self.publish_health()
+
+    def send(self, message):
+        """
+        Purpose:
+            Sends an encoded packet to the active receiver or the broadcast group.
+        Args:
+            message (bytes): The message to be sent.
+        Returns:
+            bool: True if the message was sent to at least one receiver.
+        """
+        group = self.broadcast_group
+        if group is None:
+            sent = self.active_target.send(message)
+        else:
+            sent = False
+            for index in group:
+                sent = self.targets[index].send(message) or sent
+        if not sent:
+            self.publish_health()
+        return sent
+
+    def send_to(self, index, message):
+        """
+        Purpose:
+            Sends an encoded packet to a single receiver regardless of routing.
+        Args:
+            index (int): The index of the receiver in the pool.
+            message (bytes): The message to be sent.
+        Returns:
+            bool: True if the message was sent successfully, False otherwise.
+        """
+        return self.targets[index].send(message)
+
+    def health(self):
+        """
+        Purpose:
+            Describes the connection health of every receiver.
+        Returns:
+            list: One status line per receiver.
+        """
+        group = self.broadcast_group
+        status_lines = []
+        for index, target in enumerate(self.targets):
+            if group is not None:
+                role = "broadcast" if index in group else "idle"
+            else:
+                role = "active" if index == self.active_index else "idle"
+            status_lines.append(
+                f"{target.name} [{role}] {target.status()} - {target.packets_sent} packets"
+            )
+        return status_lines
+
+    def publish_health(self):
+        """
+        Purpose:
+            Publishes the connection health for the UI.
+        """
+        target_health = self.health()
+        # Only wake the UI when something changed
+        if target_health != self.published_health:
+            self.published_health = target_health
+            ui_events.publish("target_health", target_health)
+
+    def close_all(self):
+        """
+        Purpose:
+            Closes every connection in the pool.
+        """
+        for target in self.targets:
+            target.close()
+        self.published_health = []
+        ui_events.publish("target_health", [])
@@ -0,0 +1,243 @@
+"""
+Zero-configuration discovery of receivers on the local network.
+
+Receivers run a DiscoveryResponder that listens on a UDP multicast group.
+Senders multicast a query and every receiver answers directly with its name
+and port. The sender measures the round trip time of each answer, so the
+lowest-latency receiver can be picked without typing an IP address.
+"""
+# isort: off
+import os
+import socket
+import threading
+import time
+
+MULTICAST_GROUP = "239.255.67.75"
+DISCOVERY_PORT = 50067
+
+QUERY_HEADER = "CROSSKEYS?"
+RESPONSE_HEADER = "CROSSKEYS!"
+
+
+def create_multicast_socket(interface):
+    """
+    Purpose:
+        Creates a UDP socket that sends multicast datagrams through an interface.
+
+    Args:
+        interface (str): The IP address of the interface, "0.0.0.0" for the default.
+
+    Return:
+        udp_socket (socket.socket): The socket object that was created.
+    """
+    udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    udp_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+    udp_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+    udp_socket.setsockopt(
+        socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface)
+    )
+    return udp_socket
+
+
+class DiscoveryResponder:
+    """
+    Answers discovery queries on behalf of a receiver.
+    """
+
+    def __init__(
+        self,
+        port,
+        name=None,
+        interface="0.0.0.0",
+        group=MULTICAST_GROUP,
+        discovery_port=DISCOVERY_PORT,
+    ):
+        """
+        Args:
+            port (int): The port the receiver accepts senders on.
+            name (str): The name advertised for the receiver. Defaults to the host name.
+            interface (str): The IP address of the interface to listen on.
+            group (str): The multicast group queries are sent to.
+            discovery_port (int): The UDP port queries are sent to.
+        """
+        self.port = int(port)
+        self.name = name or socket.gethostname()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.udp_socket = create_multicast_socket(interface)
+        if hasattr(socket, "SO_REUSEPORT"):
+            self.udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.udp_socket.bind(("", discovery_port))
+        self.udp_socket.setsockopt(
+            socket.IPPROTO_IP,
+            socket.IP_ADD_MEMBERSHIP,
+            socket.inet_aton(group) + socket.inet_aton(interface),
+        )
+        self.udp_socket.settimeout(0.2)
+
+    def start(self):
+        """
+        Purpose:
+            Starts answering queries in a background thread.
+        """
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        """
+        Purpose:
+            Answers queries until the responder is stopped.
+        """
+        while not self.stop_event.is_set():
+            try:
+                data, address = self.udp_socket.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            packet = data.decode("utf-8", errors="replace").split("\x03")
+            if packet[0] != QUERY_HEADER or len(packet) < 2:
+                continue
+
+            # Echo the query nonce so the sender can match the answer and time it
+            response = f"{RESPONSE_HEADER}\x03{packet[1]}\x03{self.name}\x03{self.port}\x03\r\n"
+            try:
+                self.udp_socket.sendto(bytes(response, "utf-8"), address)
+            except OSError as temp_error:
+                print("Discovery response failed:", temp_error)
+
+    def stop(self):
+        """
+        Purpose:
+            Stops answering queries and closes the socket.
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.udp_socket.close()
+
+
+class DiscoveryCache:
+    """
+    Finds receivers on the network and remembers them for a while.
+    """
+
+    def __init__(
+        self,
+        interface="0.0.0.0",
+        group=MULTICAST_GROUP,
+        discovery_port=DISCOVERY_PORT,
+        expiry=30.0,
+    ):
+        """
+        Args:
+            interface (str): The IP address of the interface to send queries from.
+            group (str): The multicast group receivers listen on.
+            discovery_port (int): The UDP port receivers listen on.
+            expiry (float): Seconds a receiver stays listed after its last answer.
+        """
+        self.interface = interface
+        self.group = group
+        self.discovery_port = discovery_port
+        self.expiry = expiry
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def query(self, timeout=0.5):
+        """
+        Purpose:
+            Multicasts a query and records the receivers that answer.
+
+        Args:
+            timeout (float): Seconds to wait for answers.
+
+        Return:
+            list: The live receivers, lowest round trip time first.
+        """
+        nonce = os.urandom(4).hex()
+        udp_socket = create_multicast_socket(self.interface)
+        try:
+            udp_socket.bind((self.interface, 0))
+            sent_at = time.monotonic()
+            udp_socket.sendto(
+                bytes(f"{QUERY_HEADER}\x03{nonce}\x03\r\n", "utf-8"),
+                (self.group, self.discovery_port),
+            )
+
+            deadline = sent_at + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                udp_socket.settimeout(remaining)
+                try:
+                    data, address = udp_socket.recvfrom(1024)
+                except socket.timeout:
+                    break
+                received_at = time.monotonic()
+
+                packet = data.decode("utf-8", errors="replace").split("\x03")
+                if len(packet) < 4 or packet[:2] != [RESPONSE_HEADER, nonce]:
+                    continue
+                self.record(address[0], packet[2], packet[3], received_at - sent_at)
+        except OSError as temp_error:
+            print("Discovery query failed:", temp_error)
+        finally:
+            udp_socket.close()
+
+        return self.receivers()
+
+    def record(self, ip_address, name, port, rtt):
+        """
+        Purpose:
+            Adds or refreshes a receiver in the cache.
+
+        Args:
+            ip_address (str): The IP address the answer came from.
+            name (str): The advertised name of the receiver.
+            port (str): The port the receiver accepts senders on.
+            rtt (float): The measured round trip time in seconds.
+        """
+        try:
+            port = int(port)
+        except ValueError:
+            return
+        with self.lock:
+            self.entries[(ip_address, port)] = {
+                "name": name,
+                "ip_address": ip_address,
+                "port": port,
+                "rtt": rtt,
+                "last_seen": time.monotonic(),
+            }
+
+    def receivers(self):
+        """
+        Purpose:
+            Lists the receivers that answered recently.
+
+        Return:
+            list: The live receivers, lowest round trip time first.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.entries = {
+                address: entry
+                for address, entry in self.entries.items()
+                if now - entry["last_seen"] <= self.expiry
+            }
+            return sorted(self.entries.values(), key=lambda entry: entry["rtt"])
+
+    def best(self):
+        """
+        Purpose:
+            Finds the live receiver with the lowest round trip time.
+
+        Return:
+            dict: The receiver entry, or None if no receiver answered.
+        """
+        receivers = self.receivers()
+        return receivers[0] if receivers else None
@@ -0,0 +1,141 @@
+"""
+TLS for the connections between a sender and a receiver.
+
+The receiver presents a certificate, and the sender trusts the receivers whose
+certificate, or issuing CA, is in its trust file. Receivers are addressed by
+IP address, so the certificate itself is what gets checked, not a host name.
+A self-signed certificate is enough:
+
+    openssl req -x509 -newkey ec -pkeyopt ec_paramgen_curve:P-256 -nodes \\
+        -days 825 -subj /CN=cross-keys -keyout receiver.key -out receiver.pem
+
+Start the receiver with receiver.pem and receiver.key, and copy receiver.pem
+to the senders as their trust file.
+
+Only TLS 1.3 is allowed, so a full handshake takes one round trip. Each
+connection keeps the session ticket issued by the receiver. A reconnect
+resumes that session and skips the certificate exchange. TLS seals every
+write in its own AEAD record. A batch written at once, such as the replay
+after an outage, is sealed as one record, not one record per packet.
+"""
+# isort: off
+import ssl
+
+
+def create_server_context(cert_file, key_file):
+    """
+    Purpose:
+        Creates the TLS context of a receiver.
+
+    Args:
+        cert_file (str): The PEM certificate presented to senders.
+        key_file (str): The PEM private key of the certificate.
+
+    Return:
+        ssl.SSLContext: The context, shared by every accepted connection so
+        that the session tickets it issues can be resumed.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.minimum_version = ssl.TLSVersion.TLSv1_3
+    context.load_cert_chain(cert_file, key_file)
+    return context
+
+
+def create_client_context(trust_file):
+    """
+    Purpose:
+        Creates the TLS context of a sender.
+
+    Args:
+        trust_file (str): The PEM certificates of the trusted receivers or CAs.
+
+    Return:
+        ssl.SSLContext: The context.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.minimum_version = ssl.TLSVersion.TLSv1_3
+    # Receivers are addressed by IP, the trusted certificate authenticates them
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_REQUIRED
+    context.load_verify_locations(trust_file)
+    return context
+
+
+def wrap_server_socket(context, client_socket):
+    """
+    Purpose:
+        Completes the TLS handshake of an accepted connection, blocking, for
+        the listeners that handle each connection in its own thread.
+
+    Args:
+        context (ssl.SSLContext): The server context, None for plain connections.
+        client_socket (socket.socket): The accepted connection.
+
+    Return:
+        socket.socket: The encrypted connection, or the connection as it is
+        without a context.
+
+    Raises:
+        OSError: If the handshake fails.
+    """
+    if context is None:
+        return client_socket
+    return context.wrap_socket(client_socket, server_side=True)
+
+
+class ClientSession:
+    """
+    The TLS state of the connections to one receiver, kept across reconnects.
+    """
+
+    def __init__(self, context):
+        """
+        Args:
+            context (ssl.SSLContext): The client context, see create_client_context().
+        """
+        self.context = context
+        self.session = None
+        self.handshakes = 0
+        self.resumed = 0
+
+    def wrap(self, client_socket):
+        """
+        Purpose:
+            Performs the handshake on a connected socket, resuming the last
+            session when the receiver still accepts its ticket.
+
+        Args:
+            client_socket (socket.socket): The connected socket.
+
+        Return:
+            ssl.SSLSocket: The encrypted socket.
+
+        Raises:
+            ssl.SSLError: If the handshake fails.
+        """
+        tls_socket = self.context.wrap_socket(client_socket, session=self.session)
+        self.handshakes += 1
+        if tls_socket.session_reused:
+            self.resumed += 1
+        return tls_socket
+
+    def remember(self, tls_socket):
+        """
+        Purpose:
+            Keeps the session of a connection for the next reconnect. TLS 1.3
+            tickets arrive after the handshake, so this is called once the
+            connection has carried some traffic, typically when it drops.
+
+        Args:
+            tls_socket (ssl.SSLSocket): The connection.
+        """
+        session = getattr(tls_socket, "session", None)
+        if session is not None and session.has_ticket:
+            self.session = session
+
+    def describe(self):
+        """
+        Returns:
+            str: The handshake counts, for the connection status.
+        """
+        return f", TLS {self.resumed}/{self.handshakes} resumed"
@@ -0,0 +1,111 @@
+"""
+Thread-safe event bus between the network threads and the Tk user interface.
+
+Worker threads publish events without ever touching Tk. A notifier thread
+wakes the Tk main loop with a virtual event, and the handlers then run on the
+Tk thread. Nothing runs while no events are published, and a worker never
+blocks on the UI, even while the UI thread is joining that worker.
+"""
+# isort: off
+import queue
+import threading
+import time
+
+VIRTUAL_EVENT = "<<CrossKeysEvent>>"
+
+
+class EventBus:
+    """
+    Delivers events published from any thread to handlers on the Tk thread.
+    """
+
+    def __init__(self):
+        self.events = queue.SimpleQueue()
+        self.handlers = {}
+        self.widget = None
+        self.wakeup = threading.Event()
+        self.notifier_thread = None
+
+    def attach(self, widget):
+        """
+        Purpose:
+            Delivers the events to the Tk main loop of a widget.
+        Args:
+            widget (tkinter.Misc): The widget whose main loop runs the handlers.
+        """
+        self.widget = widget
+        widget.bind(VIRTUAL_EVENT, self.drain)
+        if self.notifier_thread is None:
+            self.notifier_thread = threading.Thread(target=self.notify, daemon=True)
+            self.notifier_thread.start()
+        self.wakeup.set()
+
+    def detach(self):
+        """
+        Purpose:
+            Stops delivering events, for example when the window is closed.
+        """
+        self.widget = None
+
+    def subscribe(self, event_name, handler):
+        """
+        Purpose:
+            Sets the handler of an event.
+        Args:
+            event_name (str): The name of the event.
+            handler (callable): Called on the Tk thread with the event arguments.
+        """
+        self.handlers[event_name] = handler
+
+    def publish(self, event_name, *args):
+        """
+        Purpose:
+            Publishes an event from any thread. Never blocks.
+        Args:
+            event_name (str): The name of the event.
+            *args: The arguments passed to the handler.
+        """
+        self.events.put((event_name, args))
+        self.wakeup.set()
+
+    def notify(self):
+        """
+        Purpose:
+            Wakes the Tk main loop whenever events are waiting.
+        """
+        # Only imported once a widget is attached, so headless use never loads Tk
+        from tkinter import TclError  # pylint: disable=C0415
+
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            widget = self.widget
+            if widget is None or self.events.empty():
+                continue
+            try:
+                widget.event_generate(VIRTUAL_EVENT, when="tail")
+            except RuntimeError:
+                # The main loop has not started yet, try again shortly
+                time.sleep(0.1)
+                self.wakeup.set()
+            except TclError:
+                # The window was destroyed
+                self.detach()
+
+    def drain(self, _event=None):
+        """
+        Purpose:
+            Runs the handlers of every waiting event. Called on the Tk thread.
+        """
+        while True:
+            try:
+                event_name, args = self.events.get_nowait()
+            except queue.Empty:
+                return
+            handler = self.handlers.get(event_name)
+            if handler is not None:
+                handler(*args)
+
+
+# The bus shared by the App and the sender and receiver threads
+ui_events = EventBus()
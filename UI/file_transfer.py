@@ -0,0 +1,464 @@
+"""
+Transfers files from a sender to a receiver on a connection of their own.
+
+Files never share the input connection, so a transfer cannot hold back a key
+press. The transfer socket uses the lower priority bulk_file_transfer
+profile and a rate limit, and the receiver listens for it on the input port
+plus TRANSFER_PORT_OFFSET.
+
+A transfer starts with the offer "F ETX name ETX size ETX file id ETX CRLF".
+The receiver answers "f ETX offset ETX CRLF" with the number of bytes it
+already holds from an interrupted transfer of the same file, or refuses a
+file larger than MAX_FILE_SIZE with "r ETX reason ETX CRLF". The sender then
+streams the rest from a memory map, in chunks sent as
+"D ETX offset ETX length ETX crc32 ETX CRLF" followed by the raw bytes. The
+receiver checks every chunk before writing it, and answers
+"d ETX saved name ETX CRLF" once the file is complete. A dropped connection
+or a corrupt chunk ends the connection, and the sender reconnects to resume
+from the last verified chunk.
+"""
+# isort: off
+import mmap
+import os
+import threading
+import time
+import zlib
+from background import BackgroundThread
+from connection_pool import create_client_connection
+from encryption import ClientSession, wrap_server_socket
+from event_bus import ui_events
+from metrics import TRANSFER_BYTES
+from socket_options import accept_connections, create_listening_socket
+
+CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+TRANSFER_PORT_OFFSET = 1
+TRANSFER_PROFILE = "bulk_file_transfer"
+# Bytes per second, leaves most of a LAN link to the input and the screen share
+DEFAULT_RATE = 20 * 1024 * 1024
+# Larger offers are refused, transfers are not authenticated without TLS
+MAX_FILE_SIZE = 4 * 1024 * 1024 * 1024
+
+TRANSFER_SENT = TRANSFER_BYTES.labels("sent")
+TRANSFER_RECEIVED = TRANSFER_BYTES.labels("received")
+
+
+def encode_header(*fields):
+    """
+    Purpose:
+        Encodes a header packet.
+
+    Args:
+        *fields: The packet type followed by its fields.
+
+    Return:
+        bytes: The encoded packet.
+    """
+    return bytes(chr(3).join(str(field) for field in fields) + "\x03\r\n", "utf-8")
+
+
+def read_header(stream):
+    """
+    Purpose:
+        Reads a header packet.
+
+    Args:
+        stream (io.BufferedReader): The buffered reader of the connection.
+
+    Return:
+        list: The fields of the packet.
+
+    Raises:
+        ConnectionError: If the connection closed before a complete header.
+    """
+    line = stream.readline(1024)
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed during the transfer")
+    return line[:-2].decode("utf-8").split(chr(3))[:-1]
+
+
+def read_chunk(stream, offset):
+    """
+    Purpose:
+        Reads a chunk and checks it against its header.
+
+    Args:
+        stream (io.BufferedReader): The buffered reader of the connection.
+        offset (int): Where the chunk must start in the file.
+
+    Return:
+        bytes: The verified data of the chunk.
+
+    Raises:
+        ConnectionError: If the connection closed during the chunk.
+        ValueError: If the chunk is unexpected or corrupt.
+    """
+    header = read_header(stream)
+    if header[0] != "D":
+        raise ValueError("Expected a chunk")
+    chunk_offset, length, checksum = (int(field) for field in header[1:4])
+    if chunk_offset != offset or not 0 < length <= MAX_CHUNK_SIZE:
+        raise ValueError(f"Unexpected chunk at {chunk_offset}")
+    chunk = stream.read(length)
+    if len(chunk) != length:
+        raise ConnectionError("Connection closed during the transfer")
+    if zlib.crc32(chunk) != checksum:
+        raise ValueError(f"Corrupt chunk at {offset}")
+    return chunk
+
+
+def safe_file_name(name):
+    """
+    Purpose:
+        Strips any directory from a file name chosen by the peer.
+
+    Args:
+        name (str): The offered file name.
+
+    Return:
+        str: A name that stays inside the download directory.
+    """
+    name = os.path.basename(name.replace("\\", "/"))
+    if name in ("", ".", ".."):
+        return "received_file"
+    return name
+
+
+def unique_path(directory, name):
+    """
+    Purpose:
+        Picks a path in a directory that does not overwrite an existing file.
+
+    Args:
+        directory (str): The download directory.
+        name (str): The preferred file name.
+
+    Return:
+        str: The path, with " (n)" added before the extension if needed.
+    """
+    stem, extension = os.path.splitext(name)
+    path = os.path.join(directory, name)
+    copy = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{stem} ({copy}){extension}")
+        copy += 1
+    return path
+
+
+def default_download_directory():
+    """
+    Returns:
+        str: The Downloads folder of the user, or the home folder without one.
+    """
+    downloads = os.path.join(os.path.expanduser("~"), "Downloads")
+    return downloads if os.path.isdir(downloads) else os.path.expanduser("~")
+
+
+class RateLimiter:
+    """
+    Token bucket that spreads writes to at most `rate` bytes per second.
+    """
+
+    def __init__(self, rate, stop_event=None):
+        """
+        Args:
+            rate (float): Bytes per second, 0 or None for no limit.
+            stop_event (threading.Event): Cuts a wait short when set.
+        """
+        self.rate = rate
+        self.stop_event = stop_event or threading.Event()
+        # At most a tenth of a second of traffic goes out in one burst
+        self.burst = (rate or 0) / 10
+        self.allowance = 0.0
+        self.last = time.monotonic()
+
+    def wait(self, amount):
+        """
+        Purpose:
+            Waits until `amount` bytes can be sent.
+        Args:
+            amount (int): The size of the next write.
+        """
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self.allowance = min(
+            self.burst, self.allowance + (now - self.last) * self.rate
+        )
+        self.last = now
+        self.allowance -= amount
+        if self.allowance < 0:
+            self.stop_event.wait(-self.allowance / self.rate)
+
+
+class ProgressReport:
+    """
+    Publishes the progress of a transfer a few times per second.
+    """
+
+    def __init__(self, name, total, interval=0.1):
+        self.name = name
+        self.total = total
+        self.interval = interval
+        self.last_published = 0.0
+
+    def update(self, done, state="running"):
+        """
+        Purpose:
+            Publishes a "transfer_progress" event, unless one was published
+            recently and the transfer is still running.
+        Args:
+            done (int): The bytes transferred so far.
+            state (str): "running", "done" or "failed".
+        """
+        now = time.monotonic()
+        if state == "running" and now - self.last_published < self.interval:
+            return
+        self.last_published = now
+        ui_events.publish("transfer_progress", self.name, done, self.total, state)
+
+
+class FileSender:
+    """
+    Sends one file to a receiver, resuming after disconnects.
+    """
+
+    # Bytes per verified chunk, at most MAX_CHUNK_SIZE
+    chunk_size = CHUNK_SIZE
+    # Connections tried before giving up
+    max_attempts = 10
+
+    def __init__(
+        self,
+        file_name,
+        address,
+        tls_context=None,
+        max_rate=DEFAULT_RATE,
+        stop_event=None,
+    ):
+        """
+        Args:
+            file_name (str): The path of the file to send.
+            address (tuple): The (ip_address, transfer_port) of the receiver.
+            tls_context (ssl.SSLContext): Encrypts the transfer when given.
+            max_rate (float): Bytes per second, 0 for no limit.
+            stop_event (threading.Event): Cancels the transfer when set.
+        """
+        self.file_name = file_name
+        self.address = address
+        self.name = safe_file_name(file_name).replace("\r", "_").replace("\n", "_")
+        self.name = self.name.replace(chr(3), "_")
+        self.tls = ClientSession(tls_context) if tls_context is not None else None
+        self.stop_event = stop_event or threading.Event()
+        self.limiter = RateLimiter(max_rate, self.stop_event)
+        self.size = 0
+        self.sent = 0
+        self.resumed_from = 0
+        self.saved_as = None
+        self.error = ""
+        self.refused = False
+
+    def run(self):
+        """
+        Purpose:
+            Sends the file, reconnecting with backoff when the connection drops.
+        Returns:
+            bool: True once the receiver saved the complete file.
+        """
+        try:
+            stat = os.stat(self.file_name)
+        except OSError as temp_error:
+            self.error = str(temp_error)
+            ui_events.publish("error", "Unable to send " + self.name + ": " + self.error)
+            return False
+        self.size = stat.st_size
+        # A changed file gets a new id, so stale partial data is never resumed
+        file_id = f"{stat.st_size}-{stat.st_mtime_ns}"
+        progress = ProgressReport(self.name, self.size)
+
+        delay = 0.1
+        for _ in range(self.max_attempts):
+            if self.stop_event.is_set():
+                break
+            try:
+                if self.send_once(file_id, progress):
+                    progress.update(self.size, "done")
+                    print("Sent " + self.name + " as " + str(self.saved_as))
+                    return True
+            except (OSError, ValueError, IndexError) as temp_error:
+                self.error = str(temp_error)
+                print("Transfer of " + self.name + " interrupted:", temp_error)
+                if self.refused:
+                    break
+            if self.stop_event.wait(delay):
+                break
+            delay = min(delay * 2, 5.0)
+
+        progress.update(self.sent, "failed")
+        return False
+
+    def send_once(self, file_id, progress):
+        """
+        Purpose:
+            Sends what the receiver does not have yet over one connection.
+        Args:
+            file_id (str): Identifies this version of the file.
+            progress (ProgressReport): Publishes the progress.
+        Returns:
+            bool: True if the file is complete, False if cancelled.
+        Raises:
+            OSError: If the connection failed.
+            ValueError: If the receiver answered something unexpected.
+        """
+        client_socket = create_client_connection(
+            self.address[0], self.address[1], TRANSFER_PROFILE, self.tls
+        )
+        if client_socket is None:
+            raise ConnectionError("Unable to connect to the receiver")
+
+        with client_socket, client_socket.makefile("rb") as answers:
+            client_socket.sendall(encode_header("F", self.name, self.size, file_id))
+            answer = read_header(answers)
+            # A refusal is final, another attempt would be refused again
+            self.refused = answer[0] == "r"
+            if answer[0] != "f":
+                raise ValueError("Transfer refused: " + " ".join(answer[1:]))
+            offset = self.resumed_from = self.sent = int(answer[1])
+
+            if offset < self.size:
+                with open(self.file_name, "rb") as source, mmap.mmap(
+                    source.fileno(), 0, access=mmap.ACCESS_READ
+                ) as mapped:
+                    offset = self.stream(client_socket, mapped, offset, progress)
+            if offset < self.size:
+                return False
+
+            answer = read_header(answers)
+            if answer[0] != "d":
+                raise ValueError("Transfer not confirmed: " + " ".join(answer[1:]))
+            self.saved_as = answer[1]
+            return True
+
+    def stream(self, client_socket, mapped, offset, progress):
+        """
+        Purpose:
+            Sends the chunks of the memory mapped file from an offset.
+        Returns:
+            int: The offset reached, short of the size if cancelled.
+        """
+        with memoryview(mapped) as view:
+            while offset < self.size and not self.stop_event.is_set():
+                with view[offset : offset + self.chunk_size] as chunk:
+                    self.limiter.wait(len(chunk))
+                    client_socket.sendall(
+                        encode_header("D", offset, len(chunk), zlib.crc32(chunk))
+                    )
+                    client_socket.sendall(chunk)
+                    offset += len(chunk)
+                    TRANSFER_SENT.inc(len(chunk))
+                self.sent = offset
+                progress.update(offset)
+        return offset
+
+
+class FileReceiver(BackgroundThread):
+    """
+    Accepts file transfers and saves the files in a download directory.
+    """
+
+    max_size = MAX_FILE_SIZE
+
+    def __init__(self, ip_address, port, directory=None, tls_context=None):
+        """
+        Args:
+            ip_address (str): The IP address to listen on.
+            port (int): The transfer port, 0 picks a free port.
+            directory (str): Where to save the files, the Downloads folder by default.
+            tls_context (ssl.SSLContext): Requires encrypted transfers when given.
+        """
+        super().__init__()
+        self.directory = directory or default_download_directory()
+        self.tls_context = tls_context
+        self.received = []
+
+        self.server_socket = create_listening_socket(ip_address, port, TRANSFER_PROFILE)
+        self.port = self.server_socket.getsockname()[1]
+
+    def stop(self):
+        """
+        Purpose:
+            Stops accepting transfers. Partial files are kept for resuming.
+        """
+        super().stop()
+        self.server_socket.close()
+
+    def run(self):
+        """
+        Purpose:
+            Accepts transfers until stopped, each handled in its own thread.
+        """
+        accept_connections(
+            self.server_socket, self.stop_event, TRANSFER_PROFILE, self.handle
+        )
+
+    def handle(self, client_socket, client_address):
+        """
+        Purpose:
+            Receives a file over an accepted connection.
+        Args:
+            client_socket (socket.socket): The accepted connection.
+            client_address (tuple): The address of the sender.
+        """
+        try:
+            client_socket = wrap_server_socket(self.tls_context, client_socket)
+            with client_socket, client_socket.makefile("rb") as stream:
+                self.receive_file(client_socket, stream)
+        except (OSError, ValueError, IndexError) as temp_error:
+            client_socket.close()
+            print(f"Transfer from {client_address[0]} interrupted:", temp_error)
+
+    def receive_file(self, client_socket, stream):
+        """
+        Purpose:
+            Receives the chunks of one file after its offer.
+        Args:
+            client_socket (socket.socket): The connection.
+            stream (io.BufferedReader): The buffered reader of the connection.
+        Raises:
+            OSError: If the connection or the disk failed.
+            ValueError: If the sender sent something unexpected or corrupt.
+        """
+        offer = read_header(stream)
+        if offer[0] != "F":
+            raise ValueError("Not a file offer")
+        name = safe_file_name(offer[1])
+        size = int(offer[2])
+        file_id = "".join(c for c in offer[3] if c.isalnum() or c == "-")
+        if not 0 <= size <= self.max_size:
+            client_socket.sendall(encode_header("r", "file too large"))
+            raise ValueError(f"Refused {name} of {size} bytes")
+
+        # Only verified chunks are ever written, so a partial file can be resumed as is
+        os.makedirs(self.directory, exist_ok=True)
+        part_name = os.path.join(self.directory, f".{name}.{file_id}.part")
+        offset = os.path.getsize(part_name) if os.path.exists(part_name) else 0
+        if offset > size:
+            os.remove(part_name)
+            offset = 0
+        client_socket.sendall(encode_header("f", offset))
+
+        progress = ProgressReport(name, size)
+        with open(part_name, "ab") as part:
+            while offset < size:
+                chunk = read_chunk(stream, offset)
+                part.write(chunk)
+                offset += len(chunk)
+                TRANSFER_RECEIVED.inc(len(chunk))
+                progress.update(offset)
+
+        saved_as = unique_path(self.directory, name)
+        os.replace(part_name, saved_as)
+        client_socket.sendall(encode_header("d", os.path.basename(saved_as)))
+        self.received.append(saved_as)
+        progress.update(size, "done")
+        print("Received " + saved_as)
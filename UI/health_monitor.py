@@ -0,0 +1,170 @@
+"""
+Application level heartbeats between the sender and its receivers.
+
+The sender pings every connected receiver with "H ETX seq ETX timestamp" and
+the receiver echoes it back as "h ETX seq ETX timestamp". The echoed
+timestamp gives the round trip time without synchronized clocks. A receiver
+that stops answering within the deadline is treated as disconnected, which
+catches half-open TCP connections long before a send would fail.
+"""
+# isort: off
+import select
+import time
+from background import BackgroundThread
+from metrics import HEARTBEAT_RTT
+from protocol import PacketDecoder
+
+
+def ping_packet(sequence, timestamp_ns):
+    """
+    Purpose:
+        Builds a heartbeat packet.
+
+    Args:
+        sequence (int): The sequence number of the heartbeat.
+        timestamp_ns (int): The time.monotonic_ns() value when it was sent.
+
+    Return:
+        bytes: The encoded heartbeat packet.
+    """
+    return bytes(f"H{chr(3)}{sequence}{chr(3)}{timestamp_ns}{chr(3)}\r\n", "utf-8")
+
+
+class LinkStats:
+    """
+    Round trip time and jitter of a connection.
+    """
+
+    def __init__(self):
+        self.rtt = None
+        self.jitter = 0.0
+        self.last_pong = time.monotonic()
+        self.pings_sent = 0
+        self.pongs_received = 0
+
+    def record_rtt(self, rtt):
+        """
+        Purpose:
+            Records a measured round trip time.
+        Args:
+            rtt (float): The round trip time in seconds.
+        """
+        # Smoothed jitter estimate as used by RTP (RFC 3550)
+        if self.rtt is not None:
+            self.jitter += (abs(rtt - self.rtt) - self.jitter) / 16
+        self.rtt = rtt
+        self.last_pong = time.monotonic()
+        self.pongs_received += 1
+        HEARTBEAT_RTT.observe(rtt)
+
+    def describe(self):
+        """
+        Purpose:
+            Describes the round trip time and jitter.
+        Returns:
+            str: The link statistics, empty before the first answer.
+        """
+        if self.rtt is None:
+            return ""
+        return f", rtt {self.rtt * 1000:.1f} ms, jitter {self.jitter * 1000:.1f} ms"
+
+
+class HealthMonitor(BackgroundThread):
+    """
+    Pings the receivers of a connection pool and detects stalled connections.
+    """
+
+    def __init__(self, pool, interval=0.5, deadline=2.0):
+        """
+        Args:
+            pool (ConnectionPool): The receivers to monitor.
+            interval (float): Seconds between two heartbeats.
+            deadline (float): Seconds without an answer before a receiver is
+            considered stalled and reconnected.
+        """
+        super().__init__()
+        self.pool = pool
+        self.interval = interval
+        self.deadline = deadline
+        self.sequence = 0
+        self.decoders = {}
+
+    def run(self):
+        """
+        Purpose:
+            Sends heartbeats and reads the answers until stopped.
+        """
+        next_ping = time.monotonic()
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            if now >= next_ping:
+                self.ping_all(now)
+                next_ping = now + self.interval
+            self.read_pongs(max(0.0, next_ping - time.monotonic()))
+
+    def ping_all(self, now):
+        """
+        Purpose:
+            Pings every connected receiver and reconnects the stalled ones.
+        Args:
+            now (float): The current time.monotonic() value.
+        """
+        self.sequence += 1
+        packet = ping_packet(self.sequence, time.monotonic_ns())
+        for target in self.pool.targets:
+            if not target.connected:
+                continue
+            if now - target.link_stats.last_pong > self.deadline:
+                target.fail("No heartbeat for " + str(self.deadline) + " s")
+                continue
+            target.send_control(packet)
+            target.link_stats.pings_sent += 1
+
+    def read_pongs(self, timeout):
+        """
+        Purpose:
+            Waits for heartbeat answers and records the round trip times.
+        Args:
+            timeout (float): The longest time to wait in seconds.
+        """
+        sockets = {
+            target.socket_fd: target for target in self.pool.targets if target.connected
+        }
+        if not sockets:
+            self.stop_event.wait(timeout)
+            return
+        # TLS sockets may hold decrypted data that select() does not see
+        readable = [
+            tcp_socket
+            for tcp_socket in sockets
+            if hasattr(tcp_socket, "pending") and tcp_socket.pending()
+        ]
+        if not readable:
+            try:
+                readable, _, _ = select.select(list(sockets), [], [], timeout)
+            except (OSError, ValueError):
+                # A socket was closed by a reconnect while waiting
+                return
+
+        for tcp_socket in readable:
+            target = sockets[tcp_socket]
+            try:
+                data = target.receive(4096)
+            except OSError:
+                continue
+            if not data:
+                target.fail("Connection Clossed by Receiver")
+                continue
+
+            decoder = self.decoders.setdefault(tcp_socket, PacketDecoder())
+            received_ns = time.monotonic_ns()
+            for packet in decoder.feed(data):
+                if packet[0] == "h" and len(packet) > 2 and packet[2].isdigit():
+                    target.link_stats.record_rtt(
+                        (received_ns - int(packet[2])) / 1_000_000_000
+                    )
+
+        # Forget the decoders of sockets replaced by reconnects
+        for tcp_socket in list(self.decoders):
+            if tcp_socket not in sockets:
+                del self.decoders[tcp_socket]
@@ -0,0 +1,240 @@
+"""
+Timing spans and a sampling profiler for the listener and receiver threads.
+
+The sender callbacks and the receiver stages are wrapped once with
+PROFILER.wrap(). While profiling is off, a wrapper only checks a flag. While
+it is on, every call is timed, and a sampler thread can record the stacks of
+the other threads. The stacks are written in the collapsed format read by
+flamegraph.pl, speedscope and inferno:
+
+    flamegraph.pl profile-20260101-120000.folded > profile.svg
+"""
+# isort: off
+import collections
+import functools
+import os
+import sys
+import threading
+import time
+from background import BackgroundThread
+
+
+class SpanStats:
+    """
+    Call count and durations of one span.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns):
+        """
+        Purpose:
+            Records one call.
+        Args:
+            elapsed_ns (int): The duration of the call in nanoseconds.
+        """
+        self.count += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+
+    def describe(self, name):
+        """
+        Returns:
+            str: A summary line of the span.
+        """
+        mean_us = self.total_ns / self.count / 1000 if self.count else 0.0
+        return (
+            f"{name:<28}{self.count:>10}{mean_us:>12.1f}"
+            f"{self.max_ns / 1000:>12.1f}{self.total_ns / 1_000_000:>12.1f}"
+        )
+
+
+class StackSampler(BackgroundThread):
+    """
+    Periodically records the stacks of every other thread.
+    """
+
+    def __init__(self, interval=0.005):
+        """
+        Args:
+            interval (float): Seconds between two samples.
+        """
+        super().__init__()
+        self.interval = interval
+        self.stacks = collections.Counter()
+
+    def run(self):
+        """
+        Purpose:
+            Samples until stopped.
+        """
+        own_id = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()  # pylint: disable=W0212
+            for thread_id, frame in frames.items():
+                if thread_id != own_id:
+                    self.stacks[self.collapse(names.get(thread_id, "?"), frame)] += 1
+
+    @staticmethod
+    def collapse(thread_name, frame):
+        """
+        Purpose:
+            Formats a stack as semicolon separated frames, outermost first.
+        Args:
+            thread_name (str): The name of the thread, used as the root frame.
+            frame (frame): The innermost frame of the thread.
+        Returns:
+            str: The collapsed stack.
+        """
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(
+                f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+            )
+            frame = frame.f_back
+        frames.append(thread_name.replace(" ", "_"))
+        return ";".join(reversed(frames))
+
+
+class Profiler:
+    """
+    Times the wrapped spans and optionally samples the thread stacks.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = {}
+        self.sampler = None
+        self.started_at = None
+        self.lock = threading.Lock()
+
+    def span(self, name):
+        """
+        Returns:
+            SpanStats: The statistics of a span, created on first use.
+        """
+        with self.lock:
+            return self.spans.setdefault(name, SpanStats())
+
+    def wrap(self, name, function):
+        """
+        Purpose:
+            Times every call of a function while profiling is on.
+        Args:
+            name (str): The name of the span.
+            function (callable): The function to time.
+        Returns:
+            callable: The wrapped function.
+        """
+        profiler = self
+
+        @functools.wraps(function)
+        def profiled(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.span(name).record(time.perf_counter_ns() - started)
+
+        return profiled
+
+    def start(self, sampling=True, interval=0.005):
+        """
+        Purpose:
+            Starts profiling with fresh statistics.
+        Args:
+            sampling (bool): Also sample the stacks of every thread.
+            interval (float): Seconds between two stack samples.
+        """
+        if self.enabled:
+            return
+        with self.lock:
+            self.spans = {}
+        self.started_at = time.strftime("%Y%m%d-%H%M%S")
+        if sampling:
+            self.sampler = StackSampler(interval)
+            self.sampler.start()
+        self.enabled = True
+
+    def stop(self, directory="profiles"):
+        """
+        Purpose:
+            Stops profiling and writes the results.
+        Args:
+            directory (str): Where to write the results.
+        Returns:
+            list: The paths of the files written.
+        """
+        if not self.enabled:
+            return []
+        self.enabled = False
+        if self.sampler is not None:
+            self.sampler.stop()
+        paths = self.write(directory)
+        self.sampler = None
+        return paths
+
+    def toggle(self, directory="profiles"):
+        """
+        Purpose:
+            Starts profiling, or stops it and writes the results.
+        Args:
+            directory (str): Where to write the results.
+        Returns:
+            list: The paths of the files written, empty when profiling started.
+        """
+        if self.enabled:
+            return self.stop(directory)
+        self.start()
+        return []
+
+    def summary(self):
+        """
+        Returns:
+            str: One line per span, slowest in total first.
+        """
+        with self.lock:
+            spans = sorted(
+                self.spans.items(), key=lambda item: item[1].total_ns, reverse=True
+            )
+        lines = [
+            f"{'span':<28}{'calls':>10}{'mean us':>12}{'max us':>12}{'total ms':>12}"
+        ]
+        lines.extend(stats.describe(name) for name, stats in spans)
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory):
+        """
+        Purpose:
+            Writes the span summary, and the collapsed stacks if sampled.
+        Args:
+            directory (str): Where to write the results.
+        Returns:
+            list: The paths of the files written.
+        """
+        paths = []
+        try:
+            os.makedirs(directory, exist_ok=True)
+            base_name = os.path.join(directory, "profile-" + self.started_at)
+            with open(base_name + ".spans.txt", "w", encoding="UTF-8") as spans_file:
+                spans_file.write(self.summary())
+            paths.append(base_name + ".spans.txt")
+            if self.sampler is not None:
+                with open(base_name + ".folded", "w", encoding="UTF-8") as stacks_file:
+                    for stack, count in self.sampler.stacks.most_common():
+                        stacks_file.write(f"{stack} {count}\n")
+                paths.append(base_name + ".folded")
+        except OSError as temp_error:
+            print("Unable to write the profile:", temp_error)
+        return paths
+
+
+# The profiler shared by the sender, the receiver, the App and the CLI
+PROFILER = Profiler()
@@ -0,0 +1,80 @@
+"""
+Numeric key identifiers shared by the sender and the receiver.
+
+Keyboard packets carry a compact key ID instead of a key name. The ID is the
+index of the key in KEY_NAMES, whose entries are the names understood by
+pyautogui on the receiving side. New keys must only ever be appended so that
+mixed versions of the sender and receiver keep agreeing on the IDs.
+"""
+# isort: off
+
+# Printable ASCII characters followed by the named keys used by pyautogui
+KEY_NAMES = (
+    ("\t", "\n", "\r")
+    + tuple(chr(code) for code in range(32, 127))
+    + (
+        "alt",
+        "altleft",
+        "altright",
+        "apps",
+        "backspace",
+        "capslock",
+        "ctrl",
+        "ctrlleft",
+        "ctrlright",
+        "delete",
+        "down",
+        "end",
+        "enter",
+        "esc",
+        "home",
+        "insert",
+        "left",
+        "nexttrack",
+        "numlock",
+        "pause",
+        "pgdn",
+        "pgup",
+        "playpause",
+        "prevtrack",
+        "printscreen",
+        "right",
+        "scrolllock",
+        "shift",
+        "shiftleft",
+        "shiftright",
+        "space",
+        "tab",
+        "up",
+        "volumedown",
+        "volumemute",
+        "volumeup",
+        "win",
+        "winleft",
+        "winright",
+    )
+    + tuple(f"f{number}" for number in range(1, 25))
+)
+
+# Reverse lookup from a key name to its ID
+KEY_IDS = {name: key_id for key_id, name in enumerate(KEY_NAMES)}
+
+
+def key_packet(key_state, key_id):
+    """
+    Purpose:
+        Builds the keyboard packet for a key ID.
+
+    Args:
+        key_state (str): "P" for a key press or "R" for a key release.
+        key_id (int): The ID of the key in KEY_NAMES.
+
+    Return:
+        bytes: The encoded keyboard packet.
+    """
+    return bytes(f"K{chr(3)}{key_state}{chr(3)}{key_id}{chr(3)}\r\n", "utf-8")
+
+
+# Encoded press and release packets indexed by key ID
+PRESS_PACKETS = tuple(key_packet("P", key_id) for key_id in range(len(KEY_NAMES)))
+RELEASE_PACKETS = tuple(key_packet("R", key_id) for key_id in range(len(KEY_NAMES)))
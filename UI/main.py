@@ -3,19 +3,27 @@ This module contains the main application for the Cross Keyboard program.
 """
 # isort: off
 import json
+import math
 import threading
 import tkinter as tk
+import tkinter.filedialog
 import tkinter.messagebox
-import ipaddress
-import re
 from typing import Dict, Any
-import keyboard
 
 import customtkinter
 
-import options
-from receiver import create_receiver_connection
-from sender import create_sender_connection
+from discovery import DiscoveryCache
+from event_bus import ui_events
+from input_profiler import PROFILER
+from screen_layout import load_screen_layout
+from session import SessionState
+from targets import parse_targets, validate_ip_address, validate_port_number
+
+# The keyboard hooks and the sender and receiver stacks, with pyautogui and
+# pynput, are only imported once a service starts so the window opens quickly
+
+# Socket profiles of the input channel selectable in the UI
+NETWORK_PROFILES = {"Interactive LAN": "interactive_lan", "WAN": "wan"}
 
 customtkinter.set_appearance_mode(
     "System"
@@ -49,6 +57,8 @@ def block_tab(pressed_key):
     None
     """
     if pressed_key.name == "alt":
+        import keyboard  # pylint: disable=C0415
+
         keyboard.block_key("tab")
 
 
@@ -63,6 +73,8 @@ def unblock_tab(pressed_key):
     None
     """
     if pressed_key.name == "alt":
+        import keyboard  # pylint: disable=C0415
+
         keyboard.unblock_key("tab")
 
 
@@ -80,46 +92,6 @@ def change_scaling_event(new_scaling: str):
     customtkinter.set_widget_scaling(new_scaling_float)
 
 
-def validate_ip_address(ip_address: str):
-    """
-    Validates the IP address entered by the user.
-
-    Parameters:
-    self: The current instance of the App class.
-
-    Returns:
-    bool: True if the IP address is valid, False otherwise.
-    """
-    try:
-        ipaddress.ip_address(ip_address)
-        return True
-    except ValueError:
-        return False
-
-
-def validate_port_number(port_number: str):
-    """
-    Validates the port number entered by the user.
-
-    Parameters:
-    self: The current instance of the App class.
-
-    Returns:
-    bool: True if the port number is valid, False otherwise.
-    """
-    try:
-        # Run the regex to check if the port number is valid
-        port_regex = r"^\d{1,5}$"
-        port_number = str(port_number)
-        regex_status = bool(re.match(port_regex, port_number))
-        # Convert the port number to an integer
-        port_number_int = int(port_number)
-        bound_check_status = 0 < port_number_int <= 65535
-        return regex_status and bound_check_status
-    except ValueError:
-        return False
-
-
 class App(customtkinter.CTk):
     """
     The main application for the Cross Keyboard program.
@@ -139,13 +111,38 @@ class App(customtkinter.CTk):
         # if "initialized" not in self._shared_state:
         # self._shared_state["initialized"] = True
         super().__init__()  # Call the superclass's __init__ method
-        self.stop_threading_event = threading.Event()
+        # Errors of the sender or receiver thread are shown through the event bus
+        self.session = SessionState(
+            on_failure=lambda message: ui_events.publish("error", message)
+        )
+        self.stop_threading_event = self.session.stop_event
         self.receiver_thread = None
         self.sender_thread = None
+        self.sender_targets = []
+        # One viewer per receiver, several are shown as a grid of thumbnails
+        self.screen_viewers = []
+        self.thumbnail_frame = None
+        self.thumbnail_labels = {}
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.program_status = tk.StringVar()
         self.program_status.set("")
-        self.counter = 0
+        self.target_health = tk.StringVar()
+        self.transfer_status = tk.StringVar()
+        self.discovery_cache = DiscoveryCache()
+        self.discovered_receivers = []
+        self.discovered_labels = {}
+        self.target_health_lines = []
+        self.sender_stats_lines = []
+        # Widgets of the right sidebar, built once the window is on screen
+        self.radiobutton_frame = None
+        self.radio_button_value = None
+        self.label_radio_group = None
+        self.sender_radio_button = None
+        self.receiver_radio_button = None
+        self.screen_share_button = None
+        self.accept_files_button = None
+        self.network_profile_option_menu = None
+        self.compression_button = None
         # configure window
         self.title("Cross Keyboard")
         self.geometry(f"{1920}x{1080}+0+0")
@@ -155,17 +152,26 @@ class App(customtkinter.CTk):
         self.grid_columnconfigure(2, weight=0)
         self.grid_rowconfigure(2, weight=1)
 
-        # Create the three main frames
+        # Create the three main frames. The right sidebar is only needed to
+        # start a service, so it is built once the window is on screen
         self.create_left_sidebar()
         self.create_main_frame()
-        self.create_right_sidebar()
+        self.after_idle(self.create_right_sidebar)
 
         # Set the default values
         self.appearance_mode_option_menu.set("Dark")
         self.scaling_option_menu.set("100%")
         self.program_status.set("Waiting")
 
-        self.after(500, self.update_time)
+        # The network threads publish their updates instead of being polled
+        ui_events.subscribe("error", self.show_error)
+        ui_events.subscribe("fullscreen", self.enter_fullscreen)
+        ui_events.subscribe("exit_fullscreen", self.exit_fullscreen)
+        ui_events.subscribe("target_health", self.update_target_health)
+        ui_events.subscribe("sender_stats", self.update_sender_stats)
+        ui_events.subscribe("discovered", self.update_discovered_receivers)
+        ui_events.subscribe("transfer_progress", self.update_transfer_progress)
+        ui_events.attach(self)
         # self.after(500, self.display_screen_share)
 
     def create_left_sidebar(self):
@@ -189,14 +195,28 @@ class App(customtkinter.CTk):
         )
         self.logo_label.grid(row=0, column=0, padx=20, pady=(20, 10))
 
+        # Enabled once the right sidebar with the service options is built
         self.start_service_button = customtkinter.CTkButton(
-            self.sidebar_frame, text="Start", command=self.start_service
+            self.sidebar_frame,
+            text="Start",
+            command=self.start_service,
+            state="disabled",
         )
         self.start_service_button.grid(row=1, column=0, padx=20, pady=10)
         self.stop_service_button = customtkinter.CTkButton(
             self.sidebar_frame, text="Stop", command=self.stop_service, state="disabled"
         )
         self.stop_service_button.grid(row=2, column=0, padx=20, pady=10)
+        self.discover_button = customtkinter.CTkButton(
+            self.sidebar_frame, text="Discover", command=self.discover_receivers
+        )
+        self.discover_button.grid(row=3, column=0, padx=20, pady=10)
+        self.discovered_option_menu = customtkinter.CTkOptionMenu(
+            self.sidebar_frame,
+            values=["No receivers found"],
+            command=self.select_discovered_receiver,
+        )
+        self.discovered_option_menu.grid(row=4, column=0, padx=20, pady=10, sticky="n")
 
         self.appearance_mode_label = customtkinter.CTkLabel(
             self.sidebar_frame, text="Appearance Mode:", anchor="w"
@@ -218,7 +238,27 @@ class App(customtkinter.CTk):
             command=change_scaling_event,
         )
         self.scaling_option_menu.grid(row=8, column=0, padx=20, pady=(10, 20))
-        self.image_label = customtkinter.CTkLabel(self, text="")
+        # Stays visible while a service runs so a live session can be profiled
+        self.profiling_switch = customtkinter.CTkSwitch(
+            self.sidebar_frame, text="Profiling", command=self.toggle_profiling
+        )
+        self.profiling_switch.grid(row=9, column=0, padx=20, pady=(10, 20))
+        # Enabled while a sender runs, and like profiling usable during the session
+        self.send_file_button = customtkinter.CTkButton(
+            self.sidebar_frame, text="Send File", command=self.send_file, state="disabled"
+        )
+        self.send_file_button.grid(row=10, column=0, padx=20, pady=10)
+        self.transfer_progress_bar = customtkinter.CTkProgressBar(
+            self.sidebar_frame, width=140
+        )
+        self.transfer_progress_bar.set(0)
+        self.transfer_progress_bar.grid(row=11, column=0, padx=20, pady=(0, 5))
+        self.transfer_label = customtkinter.CTkLabel(
+            self.sidebar_frame, textvariable=self.transfer_status, wraplength=140
+        )
+        self.transfer_label.grid(row=12, column=0, padx=20, pady=(0, 20))
+        # A plain Tk label, which shows a PhotoImage updated in place
+        self.image_label = tk.Label(self, borderwidth=0)
 
     def create_main_frame(self):
         """
@@ -238,6 +278,11 @@ class App(customtkinter.CTk):
             row=3, column=1, columnspan=2, padx=(0, 0), pady=(0, 0), sticky="nsew"
         )
 
+        self.target_health_output = tk.Label(
+            self, textvariable=self.target_health, font=("Arial", 12), justify="left"
+        )
+        self.target_health_output.grid(row=2, column=1, columnspan=2, sticky="s")
+
         # create textbox
         self.ip_address_entry = customtkinter.CTkEntry(
             self, width=500, height=50, placeholder_text="Receiver IP Address"
@@ -265,7 +310,7 @@ class App(customtkinter.CTk):
         ip_address = data.get("ip_address", "")
         port_number = data.get("port_number", "")
 
-        if validate_ip_address(ip_address) and validate_port_number(port_number):
+        if parse_targets(ip_address, port_number):
             self.ip_address_entry.insert(0, ip_address)
             self.port_entry.insert(0, port_number)
 
@@ -323,14 +368,35 @@ class App(customtkinter.CTk):
         self.screen_share_button.grid(
             row=3, column=2, pady=(20, 0), padx=20, sticky="n"
         )
+        self.network_profile_option_menu = customtkinter.CTkOptionMenu(
+            master=self.radiobutton_frame, values=list(NETWORK_PROFILES)
+        )
+        self.network_profile_option_menu.grid(
+            row=4, column=2, pady=(20, 0), padx=20, sticky="n"
+        )
+        # Receivers always accept compression, senders only offer it when checked
+        self.compression_button = customtkinter.CTkCheckBox(
+            master=self.radiobutton_frame, text="Compression"
+        )
+        self.compression_button.grid(
+            row=5, column=2, pady=(20, 0), padx=20, sticky="n"
+        )
+        # Only receivers accept files, and only when checked
+        self.accept_files_button = customtkinter.CTkCheckBox(
+            master=self.radiobutton_frame, text="Accept Files"
+        )
+        self.accept_files_button.grid(
+            row=6, column=2, pady=(20, 0), padx=20, sticky="n"
+        )
 
         self.label_radio_group = customtkinter.CTkLabel(
             master=self.radiobutton_frame,
             text="                          " "         " " \n",
         )
         self.label_radio_group.grid(
-            row=6, column=2, columnspan=1, padx=10, pady=900, sticky=""
+            row=7, column=2, columnspan=1, padx=10, pady=900, sticky=""
         )
+        self.start_service_button.configure(state="normal")
 
     def update_text(self):
         """
@@ -350,6 +416,70 @@ class App(customtkinter.CTk):
             self.ip_address_entry.configure(placeholder_text="Device IP Address")
             self.port_entry.configure(placeholder_text="Port Number")
 
+    def discover_receivers(self):
+        """
+        Looks for receivers on the local network in a background thread.
+
+        Parameters:
+        self: The current instance of the App class.
+
+        Returns:
+        None
+        """
+
+        def query():
+            ui_events.publish("discovered", self.discovery_cache.query())
+
+        self.discover_button.configure(state="disabled")
+        threading.Thread(target=query, daemon=True).start()
+
+    def update_discovered_receivers(self, receivers: list):
+        """
+        Lists the discovered receivers, lowest round trip time first, and
+        selects the fastest one if no receiver has been entered yet.
+
+        Parameters:
+        self: The current instance of the App class.
+        receivers (list): The receivers that answered the discovery query.
+
+        Returns:
+        None
+        """
+        self.discovered_receivers = receivers
+        self.discover_button.configure(state="normal")
+        self.discovered_labels = {
+            f"{entry['name']} ({entry['rtt'] * 1000:.1f} ms)": entry
+            for entry in self.discovered_receivers
+        }
+        if not self.discovered_labels:
+            self.discovered_option_menu.configure(values=["No receivers found"])
+            self.discovered_option_menu.set("No receivers found")
+            return
+
+        labels = list(self.discovered_labels)
+        self.discovered_option_menu.configure(values=labels)
+        self.discovered_option_menu.set(labels[0])
+        if not self.ip_address_entry.get():
+            self.select_discovered_receiver(labels[0])
+
+    def select_discovered_receiver(self, label: str):
+        """
+        Fills the IP address and port fields with a discovered receiver.
+
+        Parameters:
+        label (str): The label of the receiver in the option menu.
+
+        Returns:
+        None
+        """
+        entry = self.discovered_labels.get(label)
+        if entry is None:
+            return
+        self.ip_address_entry.delete(0, "end")
+        self.ip_address_entry.insert(0, entry["ip_address"])
+        self.port_entry.delete(0, "end")
+        self.port_entry.insert(0, str(entry["port"]))
+
     def start_service(self):
         """
         Starts the sender or receiver service based on the selected radio button.
@@ -360,17 +490,34 @@ class App(customtkinter.CTk):
         Returns:
         None
         """
-        options.RUNNING = True
-        options.ERROR = False
-        if validate_ip_address(self.ip_address_entry.get()) and validate_port_number(
-            self.port_entry.get()
-        ):
+        service_choice = self.radio_button_value.get()
+        if service_choice == 0:
+            valid_input = bool(
+                parse_targets(self.ip_address_entry.get(), self.port_entry.get())
+            )
+        else:
+            valid_input = validate_ip_address(
+                self.ip_address_entry.get()
+            ) and validate_port_number(self.port_entry.get())
+        if valid_input:
             self.program_status.set("Starting Service")
-            self.stop_threading_event.clear()
-            service_choice = self.radio_button_value.get()
+            self.session.start()
             if service_choice == 0:
-                # Hide the main frame and the right sidebar frame
-                self.attributes("-fullscreen", True)
+                targets = parse_targets(
+                    self.ip_address_entry.get(), self.port_entry.get()
+                )
+                self.sender_targets = targets
+                self.send_file_button.configure(state="normal")
+                screen_layout = load_screen_layout("layout.json", targets)
+
+                # Hide the main frame and the right sidebar frame. With a screen
+                # layout control starts locally and the window goes fullscreen
+                # once the cursor crosses into a receiver.
+                if not screen_layout:
+                    self.attributes("-fullscreen", True)
+                import keyboard  # pylint: disable=C0415
+                from sender import create_sender_connection  # pylint: disable=C0415
+
                 keyboard.on_press(block_tab)
                 self.port_entry.grid_remove()
                 self.ip_address_entry.grid_remove()
@@ -379,30 +526,46 @@ class App(customtkinter.CTk):
                 self.appearance_mode_option_menu.grid_remove()
                 self.scaling_label.grid_remove()
                 self.scaling_option_menu.grid_remove()
+                self.discover_button.grid_remove()
+                self.discovered_option_menu.grid_remove()
 
                 sender_options = {
-                    "ip_address": self.ip_address_entry.get(),
-                    "port": self.port_entry.get(),
+                    "targets": targets,
+                    "screen_layout": screen_layout,
                     "screen_share": self.screen_share_button.get(),
+                    "socket_profile": NETWORK_PROFILES[
+                        self.network_profile_option_menu.get()
+                    ],
+                    "compression": bool(self.compression_button.get()),
                     "window": None,
                 }
 
                 # Start the sender thread
                 self.sender_thread = threading.Thread(
                     target=create_sender_connection,
-                    args=(self.stop_threading_event, sender_options),
+                    args=(self.session, sender_options),
                 )
                 self.sender_thread.start()
+                if self.screen_share_button.get():
+                    self.start_screen_viewer()
             elif service_choice == 1:
+                from receiver import (  # pylint: disable=C0415
+                    create_receiver_connection,
+                )
+
                 receiver_options = {
                     "ip_address": self.ip_address_entry.get(),
                     "port": self.port_entry.get(),
                     "screen_share": self.screen_share_button.get(),
+                    "file_transfer": bool(self.accept_files_button.get()),
+                    "socket_profile": NETWORK_PROFILES[
+                        self.network_profile_option_menu.get()
+                    ],
                 }
 
                 self.receiver_thread = threading.Thread(
                     target=create_receiver_connection,
-                    args=(self.stop_threading_event, receiver_options),
+                    args=(self.session, receiver_options),
                 )
                 self.receiver_thread.start()
             else:
@@ -426,6 +589,8 @@ class App(customtkinter.CTk):
         """
         print("Reseting UI")
         self.attributes("-fullscreen", False)  # Exit fullscreen
+        import keyboard  # pylint: disable=C0415
+
         keyboard.on_release(unblock_tab)
         self.port_entry.grid()
         self.ip_address_entry.grid()
@@ -434,6 +599,8 @@ class App(customtkinter.CTk):
         self.appearance_mode_option_menu.grid()
         self.scaling_label.grid()
         self.scaling_option_menu.grid()
+        self.discover_button.grid()
+        self.discovered_option_menu.grid()
 
     def stop_service(self):
         """
@@ -445,15 +612,23 @@ class App(customtkinter.CTk):
         Returns:
         None
         """
-        options.RUNNING = False
-        options.ENABLE_FULLSCREEN = False
-        self.stop_threading_event.set()
+        self.session.stop()
 
-        if options.ERROR_MESSAGE:
-            self.program_status.set("Error: " + options.ERROR_MESSAGE)
+        if self.session.failed:
+            self.program_status.set("Error: " + self.session.error_message)
         else:
             self.program_status.set("Stopped Service")
 
+        if self.screen_viewers:
+            for screen_viewer in self.screen_viewers:
+                screen_viewer.stop()
+            self.screen_viewers = []
+            self.image_label.unbind("<Button-3>")
+            self.image_label.grid_remove()
+        if self.thumbnail_frame is not None:
+            self.thumbnail_frame.destroy()
+            self.thumbnail_frame = None
+            self.thumbnail_labels = {}
         if self.sender_thread is not None and self.sender_thread.is_alive():
             print("Closing Sender")
             self.sender_thread.join()
@@ -465,11 +640,12 @@ class App(customtkinter.CTk):
             self.stop_threading_event.set()
 
         self.stop_service_button.configure(state="disabled")  # Disable the stop button
+        self.send_file_button.configure(state="disabled")
         self.start_service_button.configure(state="normal")  # Enable the start button
 
-    def update_time(self):
+    def toggle_profiling(self):
         """
-        Updates the program status label with the current status of the program.
+        Starts profiling the input path, or stops it and writes the profile.
 
         Parameters:
         self: The current instance of the App class.
@@ -477,31 +653,217 @@ class App(customtkinter.CTk):
         Returns:
         None
         """
-        # change text on Label
-        if not options.RUNNING:
-            options.UI_RESET = False
-            str_message = "Waiting For Start"
-            for _ in range(self.counter):
-                str_message += "."
+        paths = PROFILER.toggle()
+        if paths:
+            self.program_status.set("Profile written to " + ", ".join(paths))
+
+    def start_screen_viewer(self):
+        """
+        Shows the screen shared by the receiver in the main area, or with
+        several receivers a dashboard of thumbnails of all their screens.
 
-            self.program_status.set(str_message)
+        Parameters:
+        self: The current instance of the App class.
 
-            if self.counter == 3:
-                self.counter = 0
-            else:
-                self.counter += 1
-        if options.ERROR:
-            self.program_status.set("Error: " + options.ERROR_MESSAGE)
-            options.RUNNING = False
-            if not options.UI_RESET:
-                self.stop_service()
-                options.UI_RESET = True
-        if options.ENABLE_FULLSCREEN:
-            options.UI_RESET = False
-            self.attributes("-fullscreen", True)
-            self.focus_set()  # Prevents the window from losing focus
-            options.ENABLE_FULLSCREEN = False
-        self.after(500, self.update_time)
+        Returns:
+        None
+        """
+        from screen_share import SCREEN_PORT_OFFSET  # pylint: disable=C0415
+        from screen_viewer import ScreenViewer  # pylint: disable=C0415
+
+        thumbnails = len(self.sender_targets) > 1
+        if thumbnails:
+            self.thumbnail_frame = tk.Frame(self)
+        columns = math.ceil(math.sqrt(len(self.sender_targets)))
+        for index, (ip_address, port) in enumerate(self.sender_targets):
+            screen_viewer = ScreenViewer(
+                (ip_address, int(port) + SCREEN_PORT_OFFSET), thumbnail=thumbnails
+            )
+            if not screen_viewer.start():
+                print("Unable to view the screen:", screen_viewer.error)
+                continue
+            self.screen_viewers.append(screen_viewer)
+            if not thumbnails:
+                self.show_full_screen(screen_viewer)
+                continue
+            label = tk.Label(
+                self.thumbnail_frame, text=f"{ip_address}:{port}", compound="top"
+            )
+            label.grid(row=index // columns, column=index % columns, padx=5, pady=5)
+            label.bind(
+                "<Button-1>",
+                lambda _event, viewer=screen_viewer: self.show_full_screen(viewer),
+            )
+            self.thumbnail_labels[screen_viewer] = label
+            # Thumbnails arrive a few times per second, refresh them lazily
+            screen_viewer.attach(label, interval_ms=250, interactive=False)
+        if thumbnails:
+            self.show_thumbnails()
+
+    def show_full_screen(self, screen_viewer):
+        """
+        Upgrades a viewer to full quality, on its open connection, and shows
+        it in the main area. A right click returns to the thumbnails.
+
+        Parameters:
+        self: The current instance of the App class.
+        screen_viewer (ScreenViewer): The viewer to show.
+
+        Returns:
+        None
+        """
+        if self.thumbnail_frame is not None:
+            self.thumbnail_frame.grid_remove()
+            self.image_label.bind(
+                "<Button-3>", lambda _event: self.show_thumbnails(screen_viewer)
+            )
+        self.image_label.grid(row=0, column=1, rowspan=3, columnspan=2, sticky="nsew")
+        screen_viewer.attach(self.image_label)
+        screen_viewer.set_thumbnail(False)
+
+    def show_thumbnails(self, screen_viewer=None):
+        """
+        Shows the dashboard of thumbnails, returning a viewer shown in full
+        quality to its thumbnail first.
+
+        Parameters:
+        self: The current instance of the App class.
+        screen_viewer (ScreenViewer): The viewer shown in the main area, if any.
+
+        Returns:
+        None
+        """
+        if screen_viewer is not None:
+            self.image_label.unbind("<Button-3>")
+            self.image_label.grid_remove()
+            screen_viewer.set_thumbnail(True)
+            screen_viewer.attach(
+                self.thumbnail_labels[screen_viewer], interval_ms=250, interactive=False
+            )
+        self.thumbnail_frame.grid(
+            row=0, column=1, rowspan=3, columnspan=2, sticky="nsew"
+        )
+
+    def send_file(self):
+        """
+        Sends a file chosen by the user to the first receiver, on the
+        transfer connection next to its input connection.
+
+        Parameters:
+        self: The current instance of the App class.
+
+        Returns:
+        None
+        """
+        file_name = tkinter.filedialog.askopenfilename(title="Send File")
+        if not file_name or not self.sender_targets:
+            return
+        from file_transfer import (  # pylint: disable=C0415
+            TRANSFER_PORT_OFFSET,
+            FileSender,
+        )
+
+        ip_address, port = self.sender_targets[0]
+        file_sender = FileSender(
+            file_name,
+            (ip_address, int(port) + TRANSFER_PORT_OFFSET),
+            stop_event=self.session.stop_event,
+        )
+        threading.Thread(target=file_sender.run, daemon=True).start()
+        self.transfer_status.set("Sending " + file_sender.name)
+
+    def update_transfer_progress(self, name: str, done: int, total: int, state: str):
+        """
+        Shows the progress of a file sent or received.
+
+        Parameters:
+        self: The current instance of the App class.
+        name (str): The name of the file.
+        done (int): The bytes transferred so far.
+        total (int): The size of the file.
+        state (str): "running", "done" or "failed".
+
+        Returns:
+        None
+        """
+        self.transfer_progress_bar.set(done / total if total else 1)
+        if state == "running":
+            self.transfer_status.set(
+                f"{name}: {done / 1048576:.1f} of {total / 1048576:.1f} MB"
+            )
+        else:
+            self.transfer_status.set(f"{name}: {state}")
+
+    def show_error(self, message: str):
+        """
+        Shows an error reported by the sender or receiver and stops the service.
+
+        Parameters:
+        self: The current instance of the App class.
+        message (str): The error message.
+
+        Returns:
+        None
+        """
+        self.program_status.set("Error: " + message)
+        self.stop_service()
+
+    def enter_fullscreen(self):
+        """
+        Switches to fullscreen while input is sent to a receiver.
+
+        Parameters:
+        self: The current instance of the App class.
+
+        Returns:
+        None
+        """
+        self.attributes("-fullscreen", True)
+        self.focus_set()  # Prevents the window from losing focus
+
+    def exit_fullscreen(self):
+        """
+        Leaves fullscreen once input is no longer sent to a receiver.
+
+        Parameters:
+        self: The current instance of the App class.
+
+        Returns:
+        None
+        """
+        self.attributes("-fullscreen", False)
+
+    def update_target_health(self, status_lines: list):
+        """
+        Shows the connection health of the receivers.
+
+        Parameters:
+        self: The current instance of the App class.
+        status_lines (list): One line per receiver.
+
+        Returns:
+        None
+        """
+        self.target_health_lines = status_lines
+        self.target_health.set(
+            "\n".join(self.target_health_lines + self.sender_stats_lines)
+        )
+
+    def update_sender_stats(self, status_lines: list):
+        """
+        Shows the statistics of the senders connected to the receiver.
+
+        Parameters:
+        self: The current instance of the App class.
+        status_lines (list): One line per sender.
+
+        Returns:
+        None
+        """
+        self.sender_stats_lines = status_lines
+        self.target_health.set(
+            "\n".join(self.target_health_lines + self.sender_stats_lines)
+        )
 
     def on_closing(self):
         """
@@ -513,10 +875,10 @@ class App(customtkinter.CTk):
         Returns:
         None
         """
-        options.RUNNING = False
-        if validate_ip_address(self.ip_address_entry.get()) and validate_port_number(
-            self.port_entry.get()
-        ):
+        self.session.stop()
+        ui_events.detach()
+        PROFILER.stop()
+        if parse_targets(self.ip_address_entry.get(), self.port_entry.get()):
             ip_address = self.ip_address_entry.get()
             port_number = self.port_entry.get()
 
@@ -0,0 +1,448 @@
+"""
+Counters and histograms for monitoring senders and receivers.
+
+Recording is a plain attribute update so it can run on the input hot paths
+in well under a microsecond. Increments are not locked: concurrent updates
+of the same counter from several threads may very rarely lose a count, which
+is acceptable for monitoring. The registry renders the Prometheus text
+format, served over HTTP by MetricsServer or written to a file by
+MetricsFileWriter.
+"""
+# isort: off
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds, from a fast pyautogui call to a stalled link
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+
+
+def format_labels(labels):
+    """
+    Purpose:
+        Formats label pairs for the text exposition format.
+    Args:
+        labels (tuple): (name, value) pairs.
+    Returns:
+        str: The labels in braces, or an empty string.
+    """
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """
+    A value that only goes up.
+    """
+
+    def __init__(self, labels=()):
+        self.labels = labels
+        self.value = 0
+
+    def inc(self, amount=1):
+        """
+        Purpose:
+            Increases the counter.
+        Args:
+            amount (int): The increase.
+        """
+        self.value += amount
+
+    def samples(self, name):
+        """
+        Returns:
+            list: The (name, labels, value) samples of the counter.
+        """
+        return [(name, self.labels, self.value)]
+
+
+class Gauge(Counter):
+    """
+    A value that goes up and down.
+    """
+
+    def set(self, value):
+        """
+        Purpose:
+            Sets the gauge.
+        Args:
+            value (float): The new value.
+        """
+        self.value = value
+
+
+class Histogram:
+    """
+    Counts observations in cumulative buckets.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, labels=()):
+        self.labels = labels
+        self.bounds = list(buckets)
+        # The last bucket counts the observations above every bound
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        Purpose:
+            Records an observation.
+        Args:
+            value (float): The observed value, for example a duration in seconds.
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def samples(self, name):
+        """
+        Returns:
+            list: The (name, labels, value) samples of the histogram.
+        """
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + ["+Inf"], self.counts):
+            cumulative += count
+            samples.append(
+                (name + "_bucket", self.labels + (("le", bound),), cumulative)
+            )
+        samples.append((name + "_sum", self.labels, self.sum))
+        samples.append((name + "_count", self.labels, cumulative))
+        return samples
+
+
+class MetricFamily:
+    """
+    A metric split by the value of one label, for example the packet type.
+    """
+
+    def __init__(self, metric_class, label_name, **metric_options):
+        self.metric_class = metric_class
+        self.label_name = label_name
+        self.metric_options = metric_options
+        self.children = {}
+        self.lock = threading.Lock()
+
+    def labels(self, label_value):
+        """
+        Purpose:
+            Finds the metric of a label value. Hot paths should keep the
+            returned metric instead of looking it up for every event.
+        Args:
+            label_value (str): The value of the label.
+        Returns:
+            Counter | Gauge | Histogram: The metric of the label value.
+        """
+        child = self.children.get(label_value)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(
+                    label_value,
+                    self.metric_class(
+                        labels=((self.label_name, label_value),), **self.metric_options
+                    ),
+                )
+        return child
+
+    def samples(self, name):
+        """
+        Returns:
+            list: The samples of every label value.
+        """
+        samples = []
+        for child in list(self.children.values()):
+            samples.extend(child.samples(name))
+        return samples
+
+
+class PacketCounter:
+    """
+    Counts encoded packets by type, taken from their first byte, and their bytes.
+    """
+
+    def __init__(self, packets, byte_counter):
+        """
+        Args:
+            packets (MetricFamily): Counters labelled by packet type.
+            byte_counter (Counter): The byte counter.
+        """
+        self.packets = packets
+        self.byte_counter = byte_counter
+        self.by_first_byte = {}
+
+    def count(self, message):
+        """
+        Purpose:
+            Records a packet.
+        Args:
+            message (bytes): The encoded packet.
+        """
+        counter = self.by_first_byte.get(message[0])
+        if counter is None:
+            counter = self.by_first_byte[message[0]] = self.packets.labels(
+                chr(message[0])
+            )
+        counter.value += 1
+        self.byte_counter.value += len(message)
+
+
+class MetricsRegistry:
+    """
+    The metrics of the process, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, name, help_text, metric_type, metric):
+        """
+        Purpose:
+            Adds a metric, or returns the one already registered under the name.
+        Args:
+            name (str): The metric name.
+            help_text (str): The description of the metric.
+            metric_type (str): "counter", "gauge" or "histogram".
+            metric: The metric or metric family.
+        Returns:
+            The registered metric.
+        """
+        with self.lock:
+            entry = self.metrics.setdefault(name, (help_text, metric_type, metric))
+        return entry[2]
+
+    def counter(self, name, help_text, label_name=None):
+        """
+        Returns:
+            Counter | MetricFamily: A counter, split by label_name if given.
+        """
+        metric = Counter() if label_name is None else MetricFamily(Counter, label_name)
+        return self.register(name, help_text, "counter", metric)
+
+    def gauge(self, name, help_text, label_name=None):
+        """
+        Returns:
+            Gauge | MetricFamily: A gauge, split by label_name if given.
+        """
+        metric = Gauge() if label_name is None else MetricFamily(Gauge, label_name)
+        return self.register(name, help_text, "gauge", metric)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, label_name=None):
+        """
+        Returns:
+            Histogram | MetricFamily: A histogram, split by label_name if given.
+        """
+        if label_name is None:
+            metric = Histogram(buckets)
+        else:
+            metric = MetricFamily(Histogram, label_name, buckets=buckets)
+        return self.register(name, help_text, "histogram", metric)
+
+    def render(self):
+        """
+        Purpose:
+            Renders every metric in the Prometheus text exposition format.
+        Returns:
+            str: The metrics.
+        """
+        with self.lock:
+            metrics = list(self.metrics.items())
+
+        lines = []
+        for name, (help_text, metric_type, metric) in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for sample_name, labels, value in metric.samples(name):
+                lines.append(f"{sample_name}{format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves the metrics over HTTP at /metrics.
+    """
+
+    def __init__(self, registry, host="127.0.0.1", port=9400):
+        """
+        Args:
+            registry (MetricsRegistry): The metrics to serve.
+            host (str): The address to listen on, local only by default.
+            port (int): The port to listen on, 0 picks a free port.
+        """
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            """
+            Answers scrapes with the rendered registry.
+            """
+
+            def do_GET(self):  # pylint: disable=C0103
+                """
+                Purpose:
+                    Serves the metrics.
+                """
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = bytes(registry.render(), "utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):  # pylint: disable=W0221
+                # Scrapes are frequent, keep them out of the log
+                pass
+
+        self.http_server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.http_server.daemon_threads = True
+        self.port = self.http_server.server_address[1]
+        self.thread = None
+
+    def start(self):
+        """
+        Purpose:
+            Starts serving in a background thread.
+        """
+        self.thread = threading.Thread(
+            target=self.http_server.serve_forever, daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        """
+        Purpose:
+            Stops serving and closes the socket.
+        """
+        self.http_server.shutdown()
+        self.http_server.server_close()
+
+
+class MetricsFileWriter:
+    """
+    Writes the metrics to a file periodically, for example for the node
+    exporter's textfile collector.
+    """
+
+    def __init__(self, registry, file_name, interval=15.0):
+        """
+        Args:
+            registry (MetricsRegistry): The metrics to write.
+            file_name (str): The path of the file.
+            interval (float): Seconds between two writes.
+        """
+        self.registry = registry
+        self.file_name = file_name
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def write(self):
+        """
+        Purpose:
+            Writes the metrics, replacing the file atomically so readers never
+            see a partial dump.
+        """
+        temporary_name = self.file_name + ".tmp"
+        try:
+            with open(temporary_name, "w", encoding="UTF-8") as metrics_file:
+                metrics_file.write(self.registry.render())
+            os.replace(temporary_name, self.file_name)
+        except OSError as temp_error:
+            print("Unable to write the metrics:", temp_error)
+
+    def start(self):
+        """
+        Purpose:
+            Starts writing in a background thread.
+        """
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """
+        Purpose:
+            Writes the metrics until stopped.
+        """
+        while not self.stop_event.wait(self.interval):
+            self.write()
+
+    def stop(self):
+        """
+        Purpose:
+            Stops writing, after a final write.
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.write()
+
+
+# The registry of the process and the metrics fed by the senders and receivers
+REGISTRY = MetricsRegistry()
+
+PACKETS_SENT = PacketCounter(
+    REGISTRY.counter(
+        "crosskeys_sent_packets_total", "Packets sent to receivers by type.", "type"
+    ),
+    REGISTRY.counter("crosskeys_sent_bytes_total", "Bytes sent to receivers."),
+)
+PACKETS_RECEIVED = REGISTRY.counter(
+    "crosskeys_received_packets_total", "Packets received from senders by type.", "type"
+)
+BYTES_RECEIVED = REGISTRY.counter(
+    "crosskeys_received_bytes_total", "Bytes received from senders."
+)
+DENIED_PACKETS = REGISTRY.counter(
+    "crosskeys_denied_packets_total",
+    "Packets ignored because another sender had control.",
+)
+MALFORMED_PACKETS = REGISTRY.counter(
+    "crosskeys_malformed_packets_total", "Packets that could not be handled."
+)
+OUTAGE_PACKETS = REGISTRY.counter(
+    "crosskeys_outage_packets_total",
+    "Packets not replayed after an outage, collapsed or dropped.",
+    "outcome",
+)
+RECONNECTS = REGISTRY.counter(
+    "crosskeys_reconnects_total", "Connections to receivers resumed after an outage."
+)
+HEARTBEAT_RTT = REGISTRY.histogram(
+    "crosskeys_heartbeat_rtt_seconds", "Round trip time of the heartbeats."
+)
+INJECTION_SECONDS = REGISTRY.histogram(
+    "crosskeys_injection_seconds",
+    "Time taken to inject a packet by type.",
+    label_name="type",
+)
+TRANSFER_BYTES = REGISTRY.counter(
+    "crosskeys_transfer_bytes_total",
+    "File transfer bytes by direction, sent or received.",
+    "direction",
+)
+SCREEN_FRAMES = REGISTRY.counter(
+    "crosskeys_screen_frames_total", "Screen share frames, rate() gives the FPS."
+)
+SCREEN_BYTES = REGISTRY.counter(
+    "crosskeys_screen_bytes_total", "Screen share bytes, rate() gives the bitrate."
+)
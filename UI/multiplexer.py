@@ -0,0 +1,259 @@
+"""
+Several prioritized streams of messages over one connection.
+
+Each message is split into frames of at most CHUNK_SIZE bytes. A frame starts
+with a 4 byte header: the stream id, a flags byte whose END bit marks the
+last frame of a message, and the payload length. The writer always sends the
+next frame of the most urgent stream that has data, so an input packet waits
+for at most the one frame already being written, never for a whole
+clipboard or screen share frame.
+
+Queued frames are useless if the kernel already holds megabytes of earlier
+data, so the writer also keeps the unsent data of the socket low with
+TCP_NOTSENT_LOWAT where the platform has it, and only writes once the socket
+is below that mark.
+
+A TLS connection must not be read and written at the same time, so the other
+direction is read through MuxWriter.recv(), which shares the writer's lock.
+"""
+# isort: off
+import collections
+import select
+import socket
+import ssl
+import struct
+import threading
+
+# Stream ids, which are also the priorities: a lower id is always sent first
+INPUT_STREAM = 0
+CONTROL_STREAM = 1
+CLIPBOARD_STREAM = 2
+FRAME_STREAM = 3
+STREAM_COUNT = 4
+
+CHUNK_SIZE = 8 * 1024
+FLAG_END = 0x01
+HEADER = struct.Struct(">BBH")
+# Largest reassembled message, a raw 4K RGB frame with some headroom
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+def limit_unsent_data(tcp_socket, low_water_mark=2 * CHUNK_SIZE):
+    """
+    Purpose:
+        Makes the socket report writable only while little data is unsent,
+        so urgent frames do not queue behind a full kernel buffer.
+
+    Args:
+        tcp_socket (socket.socket): The connection.
+        low_water_mark (int): Most unsent bytes before the socket stops being writable.
+
+    Return:
+        bool: True if the platform supports the limit.
+    """
+    if not hasattr(socket, "TCP_NOTSENT_LOWAT"):
+        return False
+    try:
+        tcp_socket.setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_NOTSENT_LOWAT, low_water_mark
+        )
+    except OSError as temp_error:
+        print("Unable to limit the unsent data:", temp_error)
+        return False
+    return True
+
+
+class MuxWriter:
+    """
+    Sends the messages of every stream over one connection by strict priority.
+    """
+
+    def __init__(self, tcp_socket, chunk_size=CHUNK_SIZE, max_queued=None):
+        """
+        Args:
+            tcp_socket (socket.socket): The connection, written only by this writer
+            and read only through recv().
+            chunk_size (int): Largest frame payload, at most 65535 bytes.
+            max_queued (dict): Most bytes queued per stream id, unlimited if absent.
+        """
+        self.tcp_socket = tcp_socket
+        self.chunk_size = min(chunk_size, 0xFFFF)
+        self.max_queued = max_queued or {}
+        self.queues = [collections.deque() for _ in range(STREAM_COUNT)]
+        self.queued_bytes = [0] * STREAM_COUNT
+        self.condition = threading.Condition()
+        # Held while the socket is written or read
+        self.socket_lock = threading.Lock()
+        self.closing = False
+        self.error = None
+        self.frames_sent = 0
+        self.thread = None
+        # A small input frame must never wait for the ACK of a bulk frame
+        tcp_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        limit_unsent_data(tcp_socket)
+
+    def start(self):
+        """
+        Purpose:
+            Starts writing in a background thread.
+        """
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Purpose:
+            Stops writing. Messages still queued are dropped.
+        """
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+    def send(self, stream_id, message):
+        """
+        Purpose:
+            Queues a message. Never blocks.
+        Args:
+            stream_id (int): The stream, and with it the priority.
+            message (bytes): The message.
+        Returns:
+            bool: False if the writer failed or the stream's queue is full.
+        """
+        with self.condition:
+            limit = self.max_queued.get(stream_id)
+            if self.error is not None:
+                return False
+            if limit is not None and self.queued_bytes[stream_id] + len(message) > limit:
+                return False
+            self.queues[stream_id].append([memoryview(message), 0])
+            self.queued_bytes[stream_id] += len(message)
+            self.condition.notify()
+        return True
+
+    def recv(self, size):
+        """
+        Purpose:
+            Reads from the connection without racing the writes. Waits for
+            data without the lock, then reads under the lock without blocking.
+        Args:
+            size (int): The most bytes to read.
+        Returns:
+            bytes: The data read, empty if the peer closed the connection.
+        Raises:
+            socket.timeout: If nothing complete arrived within the socket timeout.
+            OSError: If the read failed or the socket is closed.
+        """
+        # TLS may hold decrypted data that select() does not see
+        pending = getattr(self.tcp_socket, "pending", None)
+        if not (pending is not None and pending()):
+            try:
+                readable, _, _ = select.select(
+                    [self.tcp_socket], [], [], self.tcp_socket.gettimeout()
+                )
+            except ValueError as temp_error:
+                raise OSError("Socket closed") from temp_error
+            if not readable:
+                raise socket.timeout("timed out")
+        with self.socket_lock:
+            timeout = self.tcp_socket.gettimeout()
+            self.tcp_socket.settimeout(0)
+            try:
+                return self.tcp_socket.recv(size)
+            except (BlockingIOError, ssl.SSLWantReadError) as temp_error:
+                # Only part of a TLS record arrived
+                raise socket.timeout("timed out") from temp_error
+            finally:
+                self.tcp_socket.settimeout(timeout)
+
+    def next_frame(self):
+        """
+        Purpose:
+            Takes the next frame of the most urgent stream. Must be called
+            with the condition held.
+        Returns:
+            bytes: The encoded frame, or None if nothing is queued.
+        """
+        for stream_id, queue in enumerate(self.queues):
+            if not queue:
+                continue
+            entry = queue[0]
+            message, offset = entry
+            payload = message[offset : offset + self.chunk_size]
+            entry[1] = offset + len(payload)
+            flags = 0
+            if entry[1] >= len(message):
+                flags = FLAG_END
+                queue.popleft()
+                self.queued_bytes[stream_id] -= len(message)
+            return HEADER.pack(stream_id, flags, len(payload)) + payload
+        return None
+
+    def run(self):
+        """
+        Purpose:
+            Writes frames until stopped or the connection fails.
+        """
+        while True:
+            with self.condition:
+                frame = self.next_frame()
+                while frame is None and not self.closing:
+                    self.condition.wait()
+                    frame = self.next_frame()
+                if self.closing:
+                    return
+            try:
+                # Wait for the kernel to drain below the unsent data limit
+                select.select([], [self.tcp_socket], [])
+                with self.socket_lock:
+                    self.tcp_socket.sendall(frame)
+            except (OSError, ValueError) as temp_error:
+                with self.condition:
+                    self.error = temp_error
+                print("Multiplexed connection failed:", temp_error)
+                return
+            self.frames_sent += 1
+
+
+class Demultiplexer:
+    """
+    Reassembles the messages of every stream from the received bytes.
+    """
+
+    def __init__(self, max_message_size=MAX_MESSAGE_SIZE):
+        self.buffer = bytearray()
+        self.partial = [bytearray() for _ in range(STREAM_COUNT)]
+        self.max_message_size = max_message_size
+
+    def feed(self, data):
+        """
+        Purpose:
+            Adds received bytes and returns the messages they complete.
+        Args:
+            data (bytes): The bytes received from the connection.
+        Returns:
+            list: (stream_id, message) tuples in the order they completed.
+        Raises:
+            ValueError: If a frame names an unknown stream or a message is too large.
+        """
+        self.buffer += data
+        messages = []
+        position = 0
+        while len(self.buffer) - position >= HEADER.size:
+            stream_id, flags, length = HEADER.unpack_from(self.buffer, position)
+            if len(self.buffer) - position - HEADER.size < length:
+                break
+            if stream_id >= STREAM_COUNT:
+                raise ValueError(f"Unknown stream {stream_id}")
+            start = position + HEADER.size
+            partial = self.partial[stream_id]
+            partial += self.buffer[start : start + length]
+            if len(partial) > self.max_message_size:
+                raise ValueError(f"Message on stream {stream_id} is too large")
+            if flags & FLAG_END:
+                messages.append((stream_id, bytes(partial)))
+                partial.clear()
+            position = start + length
+        del self.buffer[:position]
+        return messages
@@ -1,9 +0,0 @@
-"""
-Options for the UI
-"""
-RUNNING = False
-ENABLE_FULLSCREEN = False
-UI_RESET = False
-ERROR = False
-ERROR_MESSAGE = ""
-SCREEN_SHARE_IMAGE = None
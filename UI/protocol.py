@@ -0,0 +1,47 @@
+"""
+Framing of the text packets exchanged between the sender and the receiver.
+
+A packet is a list of fields separated by ETX (\\x03) and terminated by CRLF,
+for example "M\\x031920\\x031080\\x0310\\x0320\\x03\\r\\n".
+"""
+# isort: off
+
+# Longest packet accepted before the buffered data is considered garbage
+MAX_PACKET_SIZE = 65536
+
+
+class PacketDecoder:
+    """
+    Splits the byte stream of one connection into packets.
+
+    TCP delivers a stream, so a recv can end in the middle of a packet or
+    contain several packets. The decoder keeps the incomplete tail between calls.
+    """
+
+    def __init__(self):
+        self.buffer = b""
+        self.malformed_count = 0
+
+    def feed(self, data):
+        """
+        Adds received bytes and returns the packets they complete.
+
+        Args:
+            data (bytes): The bytes received from the connection.
+
+        Returns:
+            list: The complete packets, each a list of string fields.
+        """
+        self.buffer += data
+        *lines, self.buffer = self.buffer.split(b"\r\n")
+
+        # Drop a runaway packet that never terminates
+        if len(self.buffer) > MAX_PACKET_SIZE:
+            self.buffer = b""
+            self.malformed_count += 1
+
+        return [
+            line.decode("utf-8", errors="replace").split("\x03")
+            for line in lines
+            if line
+        ]
@@ -1,17 +1,47 @@
 """
 This module handles commands received from the server for mouse and keyboard control.
 
-This module contains the Receiver class, which establishes a connection with the server,
-receives commands, and performs appropriate actions based on the received commands.
+This module contains the Receiver class, which accepts connections from any number of
+senders, receives commands, and performs appropriate actions based on the received commands.
 It handles mouse movements, clicks, keyboard input, and screen sharing commands.
 
 """
 
 # isort: off
+import ctypes
+import math
+import selectors
 import socket
+import ssl
+import sys
 import time
+import zlib
 import pyautogui
-import options
+from arbitration import LastInputWins, create_arbitration_policy
+from discovery import DiscoveryResponder
+from encryption import create_server_context
+from event_bus import ui_events
+from file_transfer import TRANSFER_PORT_OFFSET, FileReceiver
+from input_profiler import PROFILER
+from keycodes import KEY_NAMES
+from metrics import (
+    BYTES_RECEIVED,
+    DENIED_PACKETS,
+    INJECTION_SECONDS,
+    MALFORMED_PACKETS,
+    PACKETS_RECEIVED,
+)
+from protocol import PacketDecoder
+from screen_share import SCREEN_PORT_OFFSET, ScreenShareServer
+from session import started_session
+from socket_options import DEFAULT_PROFILE, ChannelOptions, configure_socket
+from stream_compression import CODEC, StreamDecompressor, answer_packet
+
+# The most notches a single scroll packet can inject on each axis
+MAX_SCROLL_CLICKS = 1000
+# From winuser.h, a horizontal wheel event and the distance of one notch
+MOUSEEVENTF_HWHEEL = 0x01000
+WHEEL_DELTA = 120
 
 # Global variables to track mouse and keyboard state
 
@@ -102,34 +132,131 @@ def handle_mouse(packet):
     return True
 
 
-def handle_scroll(packet):
+def horizontal_scroll(clicks):
     """
-    Handles a mouse scroll command received from the server.
+    Purpose:
+        Scrolls horizontally. pyautogui.hscroll() scrolls vertically on
+        Windows, so there the horizontal wheel event is sent through
+        user32.mouse_event() instead.
 
     Args:
-        packet (list): A list of strings containing the command data.
-        The list should have the following format: [scroll_direction]
+        clicks (int): The notches to scroll, positive to the right.
+    """
+    if sys.platform == "win32":
+        distance = clicks * WHEEL_DELTA
+        ctypes.windll.user32.mouse_event(MOUSEEVENTF_HWHEEL, 0, 0, distance, 0)
+    else:
+        pyautogui.hscroll(clicks=clicks, _pause=False)
 
-    Returns:
-        None
+
+class ScrollInjector:
     """
-    try:
-        # Extract the scroll direction from the packet
-        scroll_direction = str(packet[1])
+    Injects scroll packets, carrying fractional distances over to the next packet.
 
-        # Print a message indicating the scroll direction
-        print("Scrolling " + scroll_direction)
+    High-resolution trackpads and wheels report fractions of a notch. The
+    fractions add up across packets, so slow smooth scrolling still moves the
+    page instead of being rounded away. Horizontal scrolling goes through
+    horizontal_scroll(), since pyautogui turns it into vertical scrolling on
+    Windows.
+    """
 
-        # Scroll the mouse up or down based on the received direction
-        if scroll_direction == "d":
-            pyautogui.scroll(clicks=-1, _pause=False)
-        elif scroll_direction == "u":
-            pyautogui.scroll(clicks=1, _pause=False)
-    except IndexError:
-        # Handle malformed packets by printing an error message and returning
-        print("Malformed packet received")
-        return False
-    return True
+    def __init__(self):
+        self.remaining_dx = 0.0
+        self.remaining_dy = 0.0
+
+    def __call__(self, packet):
+        """
+        Handles a mouse scroll command received from the server.
+
+        Args:
+            packet (list): A list of strings containing the command data.
+            The list should have the following format: [S, dx, dy], or
+            [S, scroll_direction] from older senders.
+
+        Returns:
+            bool: False if the packet is malformed, True otherwise.
+        """
+        try:
+            if packet[1] in ("u", "d"):
+                dx_coord, dy_coord = 0.0, 1.0 if packet[1] == "u" else -1.0
+            else:
+                dx_coord, dy_coord = float(packet[1]), float(packet[2])
+            if not (math.isfinite(dx_coord) and math.isfinite(dy_coord)):
+                raise ValueError("Non-finite scroll distance")
+            dx_coord = max(-MAX_SCROLL_CLICKS, min(MAX_SCROLL_CLICKS, dx_coord))
+            dy_coord = max(-MAX_SCROLL_CLICKS, min(MAX_SCROLL_CLICKS, dy_coord))
+        except (IndexError, ValueError):
+            # Handle malformed packets by printing an error message and returning
+            print("Malformed packet received")
+            return False
+
+        self.remaining_dx += dx_coord
+        self.remaining_dy += dy_coord
+        clicks_x = int(self.remaining_dx)
+        clicks_y = int(self.remaining_dy)
+        self.remaining_dx -= clicks_x
+        self.remaining_dy -= clicks_y
+
+        # One injection per axis for the whole aggregated distance
+        if clicks_y:
+            pyautogui.scroll(clicks=clicks_y, _pause=False)
+        if clicks_x:
+            horizontal_scroll(clicks_x)
+        return True
+
+
+class SenderConnection:
+    """
+    A connected sender with its own packet decoder and statistics.
+    """
+
+    def __init__(self, client_socket, client_address):
+        self.client_socket = client_socket
+        self.client_address = client_address
+        # Encrypted connections shake hands before the first packet
+        self.handshaking = isinstance(client_socket, ssl.SSLSocket)
+        self.decoder = PacketDecoder()
+        # Timed while profiling, like the handlers of the receiver
+        self.receive = PROFILER.wrap("receiver.recv", client_socket.recv)
+        self.decode = PROFILER.wrap("receiver.decode", self.decoder.feed)
+        # Set once the sender negotiated compression
+        self.decompressor = None
+        self.connected_at = time.monotonic()
+        self.last_seen = self.connected_at
+        self.heartbeats = 0
+        self.last_input = None
+        self.packets = 0
+        self.bytes_received = 0
+        self.denied = 0
+
+    @property
+    def name(self):
+        """
+        Returns:
+            str: The address of the sender as ip:port.
+        """
+        return f"{self.client_address[0]}:{self.client_address[1]}"
+
+    def tls_pending(self):
+        """
+        Returns:
+            int: The decrypted bytes waiting to be read, 0 on plain connections.
+        """
+        if isinstance(self.client_socket, ssl.SSLSocket):
+            return self.client_socket.pending()
+        return 0
+
+    def stats(self):
+        """
+        Describes the traffic received from the sender.
+
+        Returns:
+            str: A single status line.
+        """
+        return (
+            f"{self.name} - {self.packets} packets, {self.bytes_received} bytes, "
+            f"{self.denied} denied, {self.decoder.malformed_count} malformed"
+        )
 
 
 class Receiver:
@@ -137,135 +264,326 @@ class Receiver:
     Receiver class handles commands received from the server for mouse and keyboard control.
     """
 
+    # Seconds without data, heartbeats included, before a sender is dropped
+    stall_deadline = 5.0
+
     def __init__(
-        self, ip_address, port
-    ):  # pylint: disable=too-many-branches, too-many-statements
+        self,
+        ip_address,
+        port,
+        arbitration=None,
+        session=None,
+        options=None,
+    ):
         """
         Initializes the Receiver object.
 
         Args:
             ip_address (str): IP address to bind the receiver to.
             port (int): Port number to listen for incoming connections.
-            screen_share (bool): Bool indicating whether screen sharing is enabled.
+            arbitration (LastInputWins | ExclusiveLock): Decides which sender
+            controls the machine. Defaults to last input wins.
+            session (SessionState): The session the receiver runs in.
+            options (ChannelOptions): The socket profile of the input channel,
+            whether to accept compression offered by senders, which it does by
+            default, and the context from encryption.create_server_context()
+            that requires encrypted connections.
         """
+        self.session = session or started_session()
         self.ip_address = ip_address
         self.port = port
         self.send_screen = False
         self.currently_pressed_keys = []
-
-        # Create a socket object and check validity
-        return_value = self.create_server()
-        if not return_value or self.client_socket is None:
-            return
-
+        self.arbitration = arbitration or LastInputWins()
+        options = options or ChannelOptions(compression=True)
+        self.socket_profile = options.socket_profile
+        self.compression = options.compression
+        self.tls_context = options.tls_context
+        self.selector = selectors.DefaultSelector()
+        self.connections = {}
+        self.published_stats = []
+        self.socket_fd = None
+        self.scroll_injector = ScrollInjector()
+        # Called after input is injected, which usually changes the screen
+        self.on_input = None
+        self.packet_handlers = {
+            "M": handle_mouse,
+            "S": self.scroll_injector,
+            "C": handle_click,
+            "K": self.handle_keyboard,
+        }
+        # Injection is timed while profiling
+        self.packet_handlers = {
+            packet_type: PROFILER.wrap("receiver.inject." + packet_type, handler)
+            for packet_type, handler in self.packet_handlers.items()
+        }
+        # Metrics of every packet type, looked up once instead of per packet
+        self.received_counters = {
+            packet_type: PACKETS_RECEIVED.labels(packet_type)
+            for packet_type in list(self.packet_handlers) + ["H"]
+        }
+        self.injection_histograms = {
+            packet_type: INJECTION_SECONDS.labels(packet_type)
+            for packet_type in self.packet_handlers
+        }
         pyautogui.FAILSAFE = False
 
-        # Set the socket to non-blocking mode
-        self.client_socket.setblocking(True)
+    def serve(self):
+        """
+        Accepts senders and handles their packets until the session stops.
 
-        # Handle the connection
-        while options.RUNNING:
+        Returns:
+            None
+        """
+        last_published = time.monotonic()
+        while self.session.running:
             try:
-                data = b""
-
-                # Receive data until a newlin character (\r\n) is received
-                # or the chunk is empty
-                while (b"\r\n" not in data) and options.RUNNING:
-                    if not options.RUNNING:
-                        break
-
-                    # Recive data chunks of 1024 bytes and append to data
-                    chunk = self.client_socket.recv(1024)
-                    data += chunk
-
-                    # If the received chunk is empty, the client has disconnected
-                    if not chunk:
-                        options.ERROR = True
-                        options.RUNNING = False
-                        options.ERROR_MESSAGE = "Connection Clossed by Sender"
-                        data = False
-                        self.client_socket.close()
-                        break
-
-                # If no data is received, the client has disconnected and break to loop
-                if not data:
-                    break
-
-                # Decode the bytes and split data into packets
-                data_s = data.decode().split("\r\n", 1)[0]
-
-                # Split the packets into individual commands
-                packet = data_s.split("\x03")
-
-                # Print out the received packet
-                print("Received:")
-                print(packet)
-                print("\n")
-
-                # Determine the type of command and call the appropriate handler
-                # M = Mouse Movement
-                # S = Mouse Scroll
-                # C = Mouse Click
-                # K = Keyboard
-                # I = Screen Share
-                try:
-                    return_value = True
-                    if packet[0] == "M":
-                        return_value = handle_mouse(packet)
-                    elif packet[0] == "S":
-                        return_value = handle_scroll(packet)
-                    elif packet[0] == "C":
-                        return_value = handle_click(packet)
-                    elif packet[0] == "K":
-                        return_value = self.handle_keyboard(packet)
-                    # If the return value is False, the client has disconnected
-                    if return_value is False:
-                        print("Client disconnected or error occurred")
-                        self.client_socket.close()
-                        break
-
-                # Handle malformed packets
-                except IndexError:
-                    print("Malformed packet received")
-
-            # Handle socket errors
-            except socket.error as temp_error:
+                events = self.selector.select(timeout=0.1)
+            except OSError as temp_error:
                 print("Socket error while receiving data: ", temp_error)
-                options.ERROR = True
-                options.RUNNING = False
-                options.ERROR_MESSAGE = "Socket error while receiving data: " + str(
-                    temp_error
+                self.session.fail(
+                    "Socket error while receiving data: " + str(temp_error)
                 )
-                self.client_socket.close()
-                self.socket_fd.close()
                 return
 
-        # Close the connections
-        self.client_socket.close()
-        self.socket_fd.close()
+            for key, _ in events:
+                if key.data is None:
+                    self.accept_connection()
+                else:
+                    self.read_connection(key.data)
+
+            # Refresh the per-sender statistics shown by the UI
+            if time.monotonic() - last_published > 0.5:
+                self.drop_stalled_connections()
+                self.publish_stats()
+                last_published = time.monotonic()
+
+    def accept_connection(self):
+        """
+        Accepts a new sender and registers it with the selector.
 
-        return
+        Returns:
+            None
+        """
+        try:
+            client_socket, client_address = self.socket_fd.accept()
+        except BlockingIOError:
+            return
+        configure_socket(client_socket, self.socket_profile)
+        client_socket.setblocking(False)
+        if self.tls_context is not None:
+            # The handshake runs in read_connection so it never blocks the loop
+            client_socket = self.tls_context.wrap_socket(
+                client_socket, server_side=True, do_handshake_on_connect=False
+            )
+        connection = SenderConnection(client_socket, client_address)
+        self.connections[client_socket] = connection
+        self.selector.register(client_socket, selectors.EVENT_READ, connection)
+        print("Sender connected: " + connection.name)
+        self.publish_stats()
+
+    def read_connection(self, connection):
+        """
+        Reads the available data from a sender and handles the complete packets.
+
+        Args:
+            connection (SenderConnection): The sender that has data available.
+
+        Returns:
+            None
+        """
+        if connection.handshaking:
+            try:
+                connection.client_socket.do_handshake()
+            except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                return
+            except OSError as temp_error:
+                print("TLS handshake failed with " + connection.name + ":", temp_error)
+                self.drop_connection(connection)
+                return
+            connection.handshaking = False
+
+        try:
+            chunk = connection.receive(4096)
+            # TLS can hold decrypted bytes back, which the selector does not report
+            while connection.tls_pending():
+                chunk += connection.receive(65536)
+        except (BlockingIOError, ssl.SSLWantReadError, ssl.SSLWantWriteError):
+            return
+        except OSError as temp_error:
+            print("Socket error while receiving data: ", temp_error)
+            chunk = b""
+
+        # If the received chunk is empty, the sender has disconnected
+        if not chunk:
+            self.drop_connection(connection)
+            return
+
+        connection.bytes_received += len(chunk)
+        BYTES_RECEIVED.inc(len(chunk))
+        connection.last_seen = time.monotonic()
+        if connection.decompressor is not None:
+            try:
+                chunk = connection.decompressor.decompress(chunk)
+            except zlib.error as temp_error:
+                print("Corrupt compressed stream from " + connection.name, temp_error)
+                self.drop_connection(connection)
+                return
+        for packet in connection.decode(chunk):
+            self.handle_packet(connection, packet)
+
+    def handle_packet(self, connection, packet):
+        """
+        Injects a packet if the arbitration policy gives control to its sender.
+
+        Args:
+            connection (SenderConnection): The sender of the packet.
+            packet (list): The fields of the packet.
+
+        Returns:
+            None
+        """
+        # Heartbeats are echoed whoever has control, so every sender can time its link
+        if packet[0] == "H":
+            connection.heartbeats += 1
+            self.received_counters["H"].inc()
+            try:
+                connection.client_socket.send(
+                    bytes("h\x03" + "\x03".join(packet[1:]) + "\r\n", "utf-8")
+                )
+            except OSError:
+                pass
+            return
+
+        # A compression offer, everything after it is compressed if accepted
+        if packet[0] == "Z":
+            accepted = self.compression and packet[1:2] == [CODEC]
+            if accepted:
+                connection.decompressor = StreamDecompressor()
+            try:
+                connection.client_socket.send(answer_packet(CODEC if accepted else None))
+            except OSError:
+                pass
+            return
+
+        # Determine the type of command and call the appropriate handler
+        # M = Mouse Movement
+        # S = Mouse Scroll
+        # C = Mouse Click
+        # K = Keyboard
+        handler = self.packet_handlers.get(packet[0])
+        if handler is None:
+            connection.decoder.malformed_count += 1
+            MALFORMED_PACKETS.inc()
+            return
+
+        connection.packets += 1
+        self.received_counters[packet[0]].inc()
+        now = time.monotonic()
+        previous_owner = self.arbitration.owner
+        if not self.arbitration.allow(connection, now):
+            connection.denied += 1
+            DENIED_PACKETS.inc()
+            return
+
+        # Release whatever the previous sender was holding when control moves
+        if previous_owner not in (None, connection):
+            self.release_input()
+
+        connection.last_input = now
+        started = time.perf_counter()
+        try:
+            handled = handler(packet)
+        except (ValueError, ArithmeticError) as temp_error:
+            # A bad field must only cost this packet, not every sender's connection
+            print("Malformed packet from " + connection.name + ":", temp_error)
+            handled = False
+        self.injection_histograms[packet[0]].observe(time.perf_counter() - started)
+        if handled is False:
+            connection.decoder.malformed_count += 1
+            MALFORMED_PACKETS.inc()
+        elif self.on_input is not None:
+            self.on_input()
+
+    def drop_stalled_connections(self):
+        """
+        Drops senders that sent heartbeats before but went silent for longer
+        than the stall deadline, which happens on half-open connections.
+
+        Returns:
+            None
+        """
+        now = time.monotonic()
+        for connection in list(self.connections.values()):
+            if connection.heartbeats and now - connection.last_seen > self.stall_deadline:
+                print("Sender stalled: " + connection.name)
+                self.drop_connection(connection)
+
+    def drop_connection(self, connection):
+        """
+        Unregisters a sender that disconnected and releases its input.
+
+        Args:
+            connection (SenderConnection): The sender that disconnected.
+
+        Returns:
+            None
+        """
+        print("Sender disconnected: " + connection.name)
+        self.selector.unregister(connection.client_socket)
+        connection.client_socket.close()
+        del self.connections[connection.client_socket]
+        if self.arbitration.owner is connection:
+            self.release_input()
+        self.arbitration.release(connection)
+        self.publish_stats()
+
+    def release_input(self):
+        """
+        Releases all pressed keys and mouse buttons.
+
+        Returns:
+            None
+        """
+        for key in self.currently_pressed_keys:
+            pyautogui.keyUp(key, _pause=False)
+        self.currently_pressed_keys = []
+        pyautogui.mouseUp(_pause=False)
+
+    def publish_stats(self):
+        """
+        Publishes the per-sender statistics for the UI.
+
+        Returns:
+            None
+        """
+        sender_stats = [
+            connection.stats() for connection in self.connections.values()
+        ]
+        # Only wake the UI when something changed
+        if sender_stats != self.published_stats:
+            self.published_stats = sender_stats
+            ui_events.publish("sender_stats", sender_stats)
 
     def handle_keyboard(self, packet):
         """
         Handles a keyboard packet received from the server.
 
         Args:
-            packet (str): The packet received from the server.
+            packet (list): A list of strings containing the command data.
+            The list should have the following format: [key_state, key_id]
 
         Returns:
             None
         """
         try:
-            # Extract the key state and key pressed from the packet
+            # Extract the key state and look up the key name from its ID
             key_state = str(packet[1])
-            key_pressed = str(packet[2])
-
-            # Print the key state and key pressed for debugging purposes
-            print("Key State: " + key_state)
-            print("Key Pressed: " + key_pressed)
-
-            # Check for special characters like ctrl + c, ctrl + v, ctrl + t, ctrl + z
+            key_id = int(packet[2])
+            if key_id < 0:
+                # A negative index would pick a key from the end of the table
+                raise IndexError("Negative key ID")
+            key_pressed = KEY_NAMES[key_id]
 
             # Check if the key is being pressed or released
             # P = Press
@@ -280,7 +598,7 @@ class Receiver:
                 ]
 
         # Handle malformed packets
-        except IndexError:
+        except (IndexError, ValueError):
             print("Malformed packet received")
             return False
         return True
@@ -293,38 +611,23 @@ class Receiver:
             bool: True if the server socket is successfully created, False otherwise.
         """
         # Create a socket object
-        accepted_connection = False
         self.socket_fd = socket.socket(family=socket.AF_INET, type=socket.SOCK_STREAM)
-        self.client_socket = None
         try:
+            # Accepted connections inherit the buffer sizes of the listening socket
+            configure_socket(self.socket_fd, self.socket_profile)
+
             # Bind the socket to a specific address and port
             self.socket_fd.bind((self.ip_address, int(self.port)))
 
-            # Listen for incoming connections
-            self.socket_fd.listen(1)
-
-            # Accept a single incoming connection
-            self.socket_fd.settimeout(0.1)
+            # Listen for any number of senders
+            self.socket_fd.listen(socket.SOMAXCONN)
+            self.socket_fd.setblocking(False)
+            self.selector.register(self.socket_fd, selectors.EVENT_READ, None)
             print("Waiting for connection")
-            while accepted_connection is False:
-                try:
-                    # Accept the connection
-                    self.client_socket, self.client_address = self.socket_fd.accept()
-
-                    # If the connection is accepted, send a 1 comfirmation to the server
-                    if self.client_socket:
-                        accepted_connection = True
-                        # self.client_socket.sendall(b"1")
-                # Handle socket timeout
-                except socket.timeout:
-                    if not options.RUNNING:
-                        return False
 
         # Handle socket errors
         except socket.error:
-            options.ERROR = True
-            options.RUNNING = False
-            options.ERROR_MESSAGE = (
+            self.session.fail(
                 "Unable to bind to IP Address "
                 + str(self.ip_address)
                 + " and port "
@@ -339,44 +642,110 @@ class Receiver:
 
     def close_connection(self):
         """
-        Closes the connection and releases pressed keys and mouse buttons.
+        Closes the connections and releases pressed keys and mouse buttons.
         """
-        # Release all pressed keys
-        for key in self.currently_pressed_keys:
-            pyautogui.keyUp(key, _pause=False)
+        self.release_input()
 
-        # Release mouse button, if any is pressed
-        pyautogui.mouseUp(_pause=False)
-
-        # Close the client socket if it is a valid socket object
-        if self.client_socket and isinstance(self.client_socket, socket.socket):
-            self.client_socket.close()
+        # Close every sender connection
+        for client_socket in list(self.connections):
+            client_socket.close()
+        self.connections = {}
+        self.published_stats = []
+        ui_events.publish("sender_stats", [])
 
         # Close the server socket
-        self.socket_fd.close()
+        if isinstance(self.socket_fd, socket.socket):
+            self.socket_fd.close()
+        self.selector.close()
         print("Connection closed successfully")
 
 
-def create_receiver_connection(stop_threading_event, receiver_options):
+def create_receiver_connection(session, receiver_options):
     """
     Function to create a receiver object and handle incoming connections.
 
     Args:
-        stop_threading_event (threading.Event): Event to signal when the thread should stop.
+        session (SessionState): The session, stopping it stops the thread.
         receiver_options (dict): Dictionary containing receiver configuration options.
 
     Returns:
         bool: False when the connection is closed.
     """
 
+    tls_context = None
+    if receiver_options.get("tls_cert"):
+        try:
+            tls_context = create_server_context(
+                receiver_options["tls_cert"], receiver_options.get("tls_key")
+            )
+        except (OSError, ValueError) as temp_error:
+            print("Unable to load the TLS certificate:", temp_error)
+            session.fail("Unable to load the TLS certificate: " + str(temp_error))
+            return False
+
     # Create a receiver object
     receiver = Receiver(
         receiver_options["ip_address"],
         receiver_options["port"],
+        create_arbitration_policy(
+            receiver_options.get("arbitration", "last_input"),
+            receiver_options.get("lock_timeout", 5.0),
+        ),
+        session,
+        ChannelOptions(
+            receiver_options.get("socket_profile", DEFAULT_PROFILE),
+            receiver_options.get("compression", True),
+            tls_context,
+        ),
     )
-    while not stop_threading_event.is_set():
-        # Do some work
-        time.sleep(0.1)
+    if receiver.create_server():
+        # Advertise the receiver so senders can find it without typing its address
+        responder = None
+        if receiver_options.get("advertise", True):
+            try:
+                responder = DiscoveryResponder(
+                    receiver_options["port"], interface=receiver_options["ip_address"]
+                )
+                responder.start()
+            except OSError as temp_error:
+                print("Unable to advertise the receiver:", temp_error)
+
+        # Files arrive on a connection of their own, next to the input port
+        file_receiver = None
+        if receiver_options.get("file_transfer", False):
+            try:
+                file_receiver = FileReceiver(
+                    receiver_options["ip_address"],
+                    int(receiver_options["port"]) + TRANSFER_PORT_OFFSET,
+                    receiver_options.get("download_dir"),
+                    tls_context,
+                )
+                file_receiver.start()
+            except OSError as temp_error:
+                print("Unable to receive files:", temp_error)
+
+        # The screen is shared on the port after the file transfer port
+        screen_server = None
+        if receiver_options.get("screen_share"):
+            try:
+                screen_server = ScreenShareServer(
+                    receiver_options["ip_address"],
+                    int(receiver_options["port"]) + SCREEN_PORT_OFFSET,
+                    tls_context,
+                )
+                screen_server.start()
+                receiver.on_input = screen_server.wake
+            except OSError as temp_error:
+                print("Unable to share the screen:", temp_error)
+
+        receiver.serve()
+
+        if screen_server is not None:
+            screen_server.stop()
+        if file_receiver is not None:
+            file_receiver.stop()
+        if responder is not None:
+            responder.stop()
     print("Closing connection")
     receiver.close_connection()
     return False
@@ -1,35 +1,61 @@
 """
 This script takes a screenshot and overlays the mouse cursor on top of it.
+
+Nothing is loaded or captured on import, the cursor image is loaded and
+scaled the first time a screenshot is taken.
 """
 # isort: off
+import functools
 import pyautogui
 from PIL import Image
 from mss import mss
 
-# Load cursor image and convert to RGBA
-cursor_image = Image.open("cursor.png").convert("RGBA")
 
-# Scale down cursor image
-cursor_image = cursor_image.resize((100, 100))
+@functools.lru_cache(maxsize=1)
+def load_cursor_image(file_name="cursor.png", size=(100, 100)):
+    """
+    Purpose:
+        Loads the cursor image and scales it down, once per process.
+
+    Args:
+        file_name (str): The path of the cursor image.
+        size (tuple): The (width, height) of the scaled cursor.
+
+    Return:
+        Image.Image: The RGBA cursor image.
+    """
+    # Load cursor image and convert to RGBA
+    return Image.open(file_name).convert("RGBA").resize(size)
+
+
+def capture_with_cursor():
+    """
+    Purpose:
+        Takes a screenshot of every monitor with the mouse cursor drawn on top.
+
+    Return:
+        Image.Image: The RGBA screenshot.
+    """
+    # Take screenshot
+    with mss() as sct:
+        screenshot = sct.grab(sct.monitors[0])
 
-# Take screenshot
-with mss() as sct:
-    screenshot = sct.grab(sct.monitors[0])
+    # Convert screenshot to PIL Image object
+    screenshot = Image.frombytes(
+        "RGB", screenshot.size, screenshot.bgra, "raw", "BGRX"
+    ).convert("RGBA")
 
-# Convert screenshot to PIL Image object
-screenshot = Image.frombytes(
-    "RGB", screenshot.size, screenshot.bgra, "raw", "BGRX"
-).convert("RGBA")
+    # Get mouse cursor position
+    cursor_x, cursor_y = pyautogui.position()
 
-# Get mouse cursor position
-cursor_x, cursor_y = pyautogui.position()
+    # Create a new image with the same size as the screenshot and paste the cursor onto it
+    cursor_layer = Image.new("RGBA", screenshot.size)
+    cursor_layer.paste(load_cursor_image(), (cursor_x, cursor_y))
 
-# Create a new image with the same size as the screenshot and paste the cursor onto it
-cursor_layer = Image.new("RGBA", screenshot.size)
-cursor_layer.paste(cursor_image, (cursor_x, cursor_y))
+    # Composite the screenshot and cursor layer
+    return Image.alpha_composite(screenshot, cursor_layer)
 
-# Composite the screenshot and cursor layer
-final_image = Image.alpha_composite(screenshot, cursor_layer)
 
-# Save the screenshot
-final_image.save("screenshot_with_cursor.png")
+if __name__ == "__main__":
+    # Save the screenshot
+    capture_with_cursor().save("screenshot_with_cursor.png")
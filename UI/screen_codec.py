@@ -0,0 +1,807 @@
+"""
+Tile diff encoding of screen share frames.
+
+Captured frames are BGRA, as grabbed by mss. The encoder compares each frame
+with the previous one row by row, and only the rows that changed are
+compared tile by tile. Runs of changed tiles in a tile row become one
+rectangle, converted to RGB and compressed with zlib. The decoder keeps an
+RGB copy of the remote screen, applies the rectangles, and returns the
+damaged regions so that the viewer only redraws those.
+
+Scrolling shifts almost every tile. When a large part of the frame changed,
+the encoder looks for a block of rows that moved up or down, or sideways,
+and sends a copy rectangle telling the decoder to move those pixels
+itself. Only the tiles that still differ after the copy, mostly the newly
+exposed strip, are sent as pixels.
+
+An encoded frame is a FRAME header (kind, width, height, rectangle count),
+followed by a RECT header (x, y, width, height, encoding, length) and the
+data of every rectangle. The data of a copy rectangle is the COPY position
+of its source in the previous frame, and copies come before the pixels.
+Video frames, for full-motion content, are described in screen_video.py,
+which builds on this module. The decoder passes them to the video decoder
+it was given, so this module never imports screen_video.
+
+Frames bigger than the viewer's window are downscaled by a whole factor
+before encoding, with Pillow's box filter when it is installed and by
+keeping every n-th pixel otherwise.
+"""
+# isort: off
+import collections
+import functools
+import struct
+import zlib
+
+TILE_SIZE = 64
+
+FRAME = struct.Struct(">cHHH")
+RECT = struct.Struct(">HHHHBI")
+COPY = struct.Struct(">HH")
+
+KIND_TILES = b"T"
+# Encoded by screen_video.py
+KIND_VIDEO = b"V"
+ENCODING_ZLIB = 0
+ENCODING_COPY = 1
+
+# Scrolls are only looked for once this share of the frame changed
+SCROLL_MIN_CHANGED = 0.25
+# Fewest shifted rows worth a copy rectangle
+SCROLL_MIN_ROWS = 16
+
+
+def bgra_to_rgb(bgra):
+    """
+    Purpose:
+        Converts BGRA pixels to RGB with slice copies, which run at C speed.
+
+    Args:
+        bgra (bytes): The BGRA pixels.
+
+    Return:
+        bytearray: The RGB pixels.
+    """
+    rgb = bytearray(len(bgra) // 4 * 3)
+    rgb[0::3] = bgra[2::4]
+    rgb[1::3] = bgra[1::4]
+    rgb[2::3] = bgra[0::4]
+    return rgb
+
+
+class Frame:
+    """
+    A captured screen image in BGRA, 4 bytes per pixel, rows top to bottom.
+    """
+
+    def __init__(self, width, height, pixels):
+        self.width = width
+        self.height = height
+        self.pixels = bytes(pixels)
+        self.stride = width * 4
+
+    def rect(self, x, y, width, height):
+        """
+        Returns:
+            bytes: The BGRA pixels of a rectangle, rows top to bottom.
+        """
+        start = x * 4
+        end = start + width * 4
+        stride = self.stride
+        pixels = self.pixels
+        return b"".join(
+            pixels[row * stride + start : row * stride + end]
+            for row in range(y, y + height)
+        )
+
+    def crop(self, x, y, width, height):
+        """
+        Returns:
+            Frame: A rectangle of the frame.
+        """
+        return Frame(width, height, self.rect(x, y, width, height))
+
+
+@functools.lru_cache(maxsize=None)
+def pillow_image():
+    """
+    Returns:
+        module: PIL.Image, or None if Pillow is not installed.
+    """
+    try:
+        from PIL import Image  # pylint: disable=C0415
+    except ImportError:
+        return None
+    return Image
+
+
+@functools.lru_cache(maxsize=None)
+def quantize_table(bits):
+    """
+    Returns:
+        bytes: A bytes.translate() table keeping the high bits of each channel.
+    """
+    mask = (0xFF << (8 - bits)) & 0xFF
+    return bytes(value & mask for value in range(256))
+
+
+def quantize(frame, bits):
+    """
+    Purpose:
+        Drops the low bits of every channel, so that flat areas and gradients
+        compress much better.
+
+    Args:
+        frame (Frame): The frame.
+        bits (int): The bits kept per channel.
+
+    Return:
+        Frame: The quantized frame.
+    """
+    pixels = frame.pixels.translate(quantize_table(bits))
+    return Frame(frame.width, frame.height, pixels)
+
+
+def scale_factor(width, height, view_width, view_height):
+    """
+    Purpose:
+        Finds the smallest whole factor that fits a region into a viewport.
+
+    Args:
+        width (int): The width of the region.
+        height (int): The height of the region.
+        view_width (int): The width of the viewport, 0 if unknown.
+        view_height (int): The height of the viewport, 0 if unknown.
+
+    Return:
+        int: The factor, 1 keeps the full resolution.
+    """
+    if view_width <= 0 or view_height <= 0:
+        return 1
+    return max(1, -(-width // view_width), -(-height // view_height))
+
+
+def downscale(frame, factor):
+    """
+    Purpose:
+        Shrinks a frame by a whole factor.
+
+    Args:
+        frame (Frame): The frame.
+        factor (int): The factor, 1 returns the frame unchanged.
+
+    Return:
+        Frame: A frame of ceil(width / factor) by ceil(height / factor) pixels.
+    """
+    if factor <= 1:
+        return frame
+    width = -(-frame.width // factor)
+    height = -(-frame.height // factor)
+    image_module = pillow_image()
+    if image_module is not None:
+        # Not RGBA, which Pillow premultiplies by the 4th byte before filtering.
+        # Captures leave that byte at 0, the frame would turn black. RGBX
+        # filters the three channels alone, whatever their order
+        image = image_module.frombuffer(
+            "RGBX", (frame.width, frame.height), frame.pixels, "raw", "RGBX", 0, 1
+        )
+        image = image.resize((width, height), image_module.BOX)
+        return Frame(width, height, image.tobytes())
+
+    # Nearest neighbour: every factor-th row, and every factor-th pixel of it
+    stride = frame.stride
+    pixels = memoryview(frame.pixels)
+    rows = [
+        pixels[row * stride : (row + 1) * stride].cast("I")[::factor].tobytes()
+        for row in range(0, frame.height, factor)
+    ]
+    return Frame(width, height, b"".join(rows))
+
+
+def difference_span(first, second):
+    """
+    Purpose:
+        Finds the first and last differing bytes with a binary search of slices.
+
+    Args:
+        first (bytes): The new bytes.
+        second (bytes): The old bytes, of the same length.
+
+    Return:
+        tuple: (start, end) of the differing bytes, None if they are equal.
+    """
+    if first == second:
+        return None
+    low, high = 0, len(first)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if first[low:middle] != second[low:middle]:
+            high = middle
+        else:
+            low = middle
+    start = low
+    low, high = 0, len(first)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if first[middle:high] != second[middle:high]:
+            low = middle
+        else:
+            high = middle
+    return start, low + 1
+
+
+def longest_run(flags):
+    """
+    Returns:
+        tuple: (first index, length) of the longest run of true flags.
+    """
+    best = (0, 0)
+    start = None
+    for index, flag in enumerate(list(flags) + [False]):
+        if flag and start is None:
+            start = index
+        elif not flag and start is not None:
+            if index - start > best[1]:
+                best = (start, index - start)
+            start = None
+    return best
+
+
+def vertical_shift(current, earlier):
+    """
+    Purpose:
+        Finds the most common vertical move of rows that are unique.
+
+    Args:
+        current (list): The rows of the new frame.
+        earlier (list): The same rows of the previous frame.
+
+    Return:
+        int: Rows moved down, negative for up, 0 if none.
+    """
+    positions = {}
+    for index, row in enumerate(earlier):
+        positions[row] = None if row in positions else index
+    votes = collections.Counter()
+    for index, row in enumerate(current):
+        position = positions.get(row)
+        if position is not None and position != index:
+            votes[index - position] += 1
+    if not votes:
+        return 0
+    shift, count = votes.most_common(1)[0]
+    return shift if count >= SCROLL_MIN_ROWS else 0
+
+
+def horizontal_shift(current, earlier, probe_pixels=32):
+    """
+    Purpose:
+        Finds the most common sideways move by locating the middle of
+        sampled rows in their previous version.
+
+    Args:
+        current (list): The rows of the new frame.
+        earlier (list): The same rows of the previous frame.
+        probe_pixels (int): Pixels searched for in each sampled row.
+
+    Return:
+        int: Pixels moved right, negative for left, 0 if none.
+    """
+    votes = collections.Counter()
+    for index in range(0, len(current), 4):
+        row, old_row = current[index], earlier[index]
+        middle = len(row) // 8 * 4
+        probe = row[middle : middle + probe_pixels * 4]
+        if row == old_row or probe == probe[:4] * (len(probe) // 4):
+            continue
+        position = old_row.find(probe)
+        while position != -1 and position % 4:
+            position = old_row.find(probe, position + 1)
+        if position not in (-1, middle):
+            votes[(middle - position) // 4] += 1
+    if not votes:
+        return 0
+    shift, count = votes.most_common(1)[0]
+    return shift if count >= SCROLL_MIN_ROWS // 4 else 0
+
+
+def changed_bounds(previous, frame, rects):
+    """
+    Purpose:
+        Narrows the tile aligned bounds of the changed rectangles to the
+        columns that changed, from a sample of rows, so that static borders
+        do not hide a move.
+
+    Args:
+        previous (Frame): The previous frame.
+        frame (Frame): The new frame, of the same size.
+        rects (list): The changed rectangles.
+
+    Return:
+        tuple: (left, top, right, bottom) of the changed area, or None.
+    """
+    stride = frame.stride
+    left = min(x for x, _, _, _ in rects)
+    right = max(x + width for x, _, width, _ in rects)
+    top = min(y for _, y, _, _ in rects)
+    bottom = max(y + height for _, y, _, height in rects)
+
+    spans = []
+    for row in range(top, bottom, 8):
+        start = row * stride + left * 4
+        end = row * stride + right * 4
+        span = difference_span(frame.pixels[start:end], previous.pixels[start:end])
+        if span is not None:
+            spans.append(span)
+    if not spans:
+        return None
+    return (
+        left + min(start for start, _ in spans) // 4,
+        top,
+        left + -(-max(end for _, end in spans) // 4),
+        bottom,
+    )
+
+
+def vertical_copy(current, earlier, shift, bounds):
+    """
+    Purpose:
+        Finds the longest block of rows that moved vertically by shift rows.
+
+    Args:
+        current (list): The rows of the new frame within bounds.
+        earlier (list): The same rows of the previous frame.
+        shift (int): Rows moved down, negative for up.
+        bounds (tuple): (left, top, right) of the rows in the frame.
+
+    Return:
+        tuple: The copy (x, y, width, height, source x, source y), or None.
+    """
+    left, top, right = bounds
+    first, count = longest_run(
+        0 <= index - shift < len(earlier) and row == earlier[index - shift]
+        for index, row in enumerate(current)
+    )
+    if count < SCROLL_MIN_ROWS:
+        return None
+    return (left, top + first, right - left, count, left, top + first - shift)
+
+
+def horizontal_copy(current, earlier, bounds):
+    """
+    Purpose:
+        Finds the longest block of rows that moved sideways.
+
+    Args:
+        current (list): The rows of the new frame within bounds.
+        earlier (list): The same rows of the previous frame.
+        bounds (tuple): (left, top, right) of the rows in the frame.
+
+    Return:
+        tuple: The copy (x, y, width, height, source x, source y), or None.
+    """
+    left, top, right = bounds
+    shift = horizontal_shift(current, earlier)
+    if not shift or abs(shift) >= right - left:
+        return None
+    moved = abs(shift) * 4
+    pairs = zip(current, earlier)
+    if shift > 0:
+        matches = (row[moved:] == old_row[:-moved] for row, old_row in pairs)
+    else:
+        matches = (row[:-moved] == old_row[moved:] for row, old_row in pairs)
+    first, count = longest_run(matches)
+    if count < SCROLL_MIN_ROWS:
+        return None
+    width = right - left - abs(shift)
+    if shift > 0:
+        return (left + shift, top + first, width, count, left, top + first)
+    return (left, top + first, width, count, left - shift, top + first)
+
+
+def detect_scroll(previous, frame, rects):
+    """
+    Purpose:
+        Looks for a block of the changed area that only moved since the
+        previous frame.
+
+    Args:
+        previous (Frame): The previous frame.
+        frame (Frame): The new frame, of the same size.
+        rects (list): The changed rectangles.
+
+    Return:
+        tuple: The copy (x, y, width, height, source x, source y), or None.
+    """
+    bounds = changed_bounds(previous, frame, rects)
+    if bounds is None:
+        return None
+    left, top, right, bottom = bounds
+    stride = frame.stride
+
+    def rows(pixels):
+        return [
+            pixels[row * stride + left * 4 : row * stride + right * 4]
+            for row in range(top, bottom)
+        ]
+
+    current = rows(frame.pixels)
+    earlier = rows(previous.pixels)
+
+    shift = vertical_shift(current, earlier)
+    if shift:
+        return vertical_copy(current, earlier, shift, (left, top, right))
+    return horizontal_copy(current, earlier, (left, top, right))
+
+
+def apply_copy(frame, copy):
+    """
+    Returns:
+        Frame: The frame with a copy rectangle applied to it.
+    """
+    x, y, width, height, source_x, source_y = copy
+    stride = frame.stride
+    source = frame.pixels
+    pixels = bytearray(source)
+    for row in range(height):
+        start = (y + row) * stride + x * 4
+        source_start = (source_y + row) * stride + source_x * 4
+        pixels[start : start + width * 4] = source[
+            source_start : source_start + width * 4
+        ]
+    return Frame(frame.width, frame.height, pixels)
+
+
+def rect_area(rects):
+    """
+    Returns:
+        int: The number of pixels covered by the rectangles.
+    """
+    return sum(width * height for _, _, width, height in rects)
+
+
+def merge_runs(columns):
+    """
+    Purpose:
+        Groups sorted tile columns into runs of consecutive columns.
+
+    Args:
+        columns (list): Sorted tile column indexes.
+
+    Return:
+        list: (first column, column count) tuples.
+    """
+    runs = []
+    for column in columns:
+        if runs and runs[-1][0] + runs[-1][1] == column:
+            runs[-1][1] += 1
+        else:
+            runs.append([column, 1])
+    return [tuple(run) for run in runs]
+
+
+class TileEncoder:
+    """
+    Encodes the tiles that changed since the previous frame.
+    """
+
+    def __init__(self, tile_size=TILE_SIZE, level=1, scroll_detection=True):
+        """
+        Args:
+            tile_size (int): The width and height of a tile in pixels.
+            level (int): The zlib level, low levels keep up with full motion.
+            scroll_detection (bool): Send scrolled blocks as copy rectangles.
+        """
+        self.tile_size = tile_size
+        self.level = level
+        self.scroll_detection = scroll_detection
+        self.previous = None
+        self.scrolls = 0
+        # Share of the last frame sent as pixels, after any scroll copy
+        self.changed_ratio = 0.0
+
+    def reset(self):
+        """
+        Purpose:
+            Makes the next frame a complete one, for example for a new viewer.
+        """
+        self.previous = None
+
+    def changed_rects(self, frame, previous=None):
+        """
+        Purpose:
+            Finds the regions that differ from the previous frame.
+        Args:
+            frame (Frame): The new frame.
+            previous (Frame): The frame to compare with, by default the last one.
+        Returns:
+            list: (x, y, width, height) rectangles aligned on the tile grid.
+        """
+        if previous is None:
+            previous = self.previous
+        if (
+            previous is None
+            or previous.width != frame.width
+            or previous.height != frame.height
+        ):
+            return self.band_rects(frame, range(self.tile_columns(frame)))
+
+        rects = []
+        for band_top in range(0, frame.height, self.tile_size):
+            band_bottom = min(band_top + self.tile_size, frame.height)
+            changed = self.changed_columns(
+                frame, previous, range(band_top, band_bottom)
+            )
+            for first, count in merge_runs(sorted(changed)):
+                x = first * self.tile_size
+                width = min(count * self.tile_size, frame.width - x)
+                rects.append((x, band_top, width, band_bottom - band_top))
+        return rects
+
+    def changed_columns(self, frame, previous, rows):
+        """
+        Purpose:
+            Finds the tile columns that differ in a band of rows. Unchanged
+            rows are skipped with one comparison each.
+        Args:
+            frame (Frame): The new frame.
+            previous (Frame): The frame to compare with, of the same size.
+            rows (range): The rows of the band.
+        Returns:
+            set: The indexes of the changed tile columns.
+        """
+        pixels = frame.pixels
+        previous_pixels = previous.pixels
+        tile_bytes = self.tile_size * 4
+        columns = self.tile_columns(frame)
+        changed = set()
+        for row in rows:
+            row_start = row * frame.stride
+            row_end = row_start + frame.stride
+            if pixels[row_start:row_end] == previous_pixels[row_start:row_end]:
+                continue
+            for column in range(columns):
+                if column in changed:
+                    continue
+                start = row_start + column * tile_bytes
+                end = min(start + tile_bytes, row_end)
+                if pixels[start:end] != previous_pixels[start:end]:
+                    changed.add(column)
+            if len(changed) == columns:
+                break
+        return changed
+
+    def tile_columns(self, frame):
+        """
+        Returns:
+            int: The number of tile columns of a frame.
+        """
+        return -(-frame.width // self.tile_size)
+
+    def band_rects(self, frame, columns):
+        """
+        Returns:
+            list: One rectangle per tile row covering the given columns.
+        """
+        rects = []
+        for first, count in merge_runs(list(columns)):
+            x = first * self.tile_size
+            width = min(count * self.tile_size, frame.width - x)
+            for band_top in range(0, frame.height, self.tile_size):
+                height = min(self.tile_size, frame.height - band_top)
+                rects.append((x, band_top, width, height))
+        return rects
+
+    def find_scroll(self, frame, rects):
+        """
+        Purpose:
+            Looks for a scroll when a large part of the frame changed.
+        Args:
+            frame (Frame): The new frame.
+            rects (list): The regions that differ from the previous frame.
+        Returns:
+            tuple: The copy rectangle and its source, None to send tiles only.
+        """
+        previous = self.previous
+        if (
+            not self.scroll_detection
+            or previous is None
+            or (previous.width, previous.height) != (frame.width, frame.height)
+            or rect_area(rects) < SCROLL_MIN_CHANGED * frame.width * frame.height
+        ):
+            return None
+        return detect_scroll(previous, frame, rects)
+
+    def encode(self, frame):
+        """
+        Purpose:
+            Encodes a frame against the previous one.
+        Args:
+            frame (Frame): The new frame.
+        Returns:
+            bytes: The encoded frame, None if nothing changed.
+        """
+        rects = self.changed_rects(frame)
+        copy = self.find_scroll(frame, rects)
+        if copy is not None:
+            rects = self.changed_rects(frame, apply_copy(self.previous, copy))
+        self.previous = frame
+        self.changed_ratio = rect_area(rects) / (frame.width * frame.height or 1)
+        if not rects and copy is None:
+            return None
+
+        count = len(rects) + (copy is not None)
+        parts = [FRAME.pack(KIND_TILES, frame.width, frame.height, count)]
+        if copy is not None:
+            self.scrolls += 1
+            parts.append(RECT.pack(*copy[:4], ENCODING_COPY, COPY.size))
+            parts.append(COPY.pack(*copy[4:]))
+        for x, y, width, height in rects:
+            rgb = bgra_to_rgb(frame.rect(x, y, width, height))
+            data = zlib.compress(rgb, self.level)
+            parts.append(RECT.pack(x, y, width, height, ENCODING_ZLIB, len(data)))
+            parts.append(data)
+        return b"".join(parts)
+
+
+class TileDecoder:
+    """
+    Keeps an RGB copy of the remote screen up to date.
+    """
+
+    def __init__(self, video=None):
+        """
+        Args:
+            video (screen_video.VideoDecoder): Decodes video frames, which are
+            refused without one.
+        """
+        self.width = 0
+        self.height = 0
+        self.pixels = bytearray()
+        self.video = video
+
+    def resize(self, width, height):
+        """
+        Purpose:
+            Starts over with a black screen of a new size.
+        """
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(width * height * 3)
+
+    def apply(self, message):
+        """
+        Purpose:
+            Applies an encoded frame.
+        Args:
+            message (bytes): The encoded frame.
+        Returns:
+            list: The damaged (x, y, width, height) rectangles.
+        Raises:
+            ValueError: If the message is corrupt.
+        """
+        if message[:1] == KIND_VIDEO:
+            return self.apply_video(message)
+        try:
+            kind, width, height, count = FRAME.unpack_from(message)
+        except struct.error as temp_error:
+            raise ValueError("Truncated frame") from temp_error
+        if kind != KIND_TILES:
+            raise ValueError(f"Unknown frame kind {kind!r}")
+        if (width, height) != (self.width, self.height):
+            self.resize(width, height)
+
+        damage = []
+        position = FRAME.size
+        for _ in range(count):
+            rect, position = self.apply_rect(message, position)
+            damage.append(rect)
+        return damage
+
+    def apply_rect(self, message, position):
+        """
+        Purpose:
+            Applies one rectangle of an encoded frame.
+        Args:
+            message (bytes): The encoded frame.
+            position (int): Where the RECT header of the rectangle starts.
+        Returns:
+            tuple: The damaged (x, y, width, height) rectangle, and the
+            position of the next rectangle.
+        Raises:
+            ValueError: If the rectangle is corrupt.
+        """
+        try:
+            x, y, width, height, encoding, length = RECT.unpack_from(message, position)
+        except struct.error as temp_error:
+            raise ValueError("Truncated rectangle") from temp_error
+        position += RECT.size
+        if x + width > self.width or y + height > self.height:
+            raise ValueError("Rectangle outside of the frame")
+        if encoding == ENCODING_COPY:
+            try:
+                source_x, source_y = COPY.unpack_from(message, position)
+            except struct.error as temp_error:
+                raise ValueError("Truncated copy") from temp_error
+            if source_x + width > self.width or source_y + height > self.height:
+                raise ValueError("Copy source outside of the frame")
+            self.copy((x, y, width, height, source_x, source_y))
+        elif encoding == ENCODING_ZLIB:
+            try:
+                rgb = zlib.decompress(message[position : position + length])
+            except zlib.error as temp_error:
+                raise ValueError("Corrupt rectangle") from temp_error
+            self.paste(x, y, width, height, rgb)
+        else:
+            raise ValueError(f"Unknown encoding {encoding}")
+        return (x, y, width, height), position + length
+
+    def apply_video(self, message):
+        """
+        Purpose:
+            Replaces the screen copy with a decoded video frame.
+        Returns:
+            list: The whole screen, or nothing while the decoder waits for data.
+        Raises:
+            ValueError: If the message is corrupt or there is no video decoder.
+        """
+        if self.video is None:
+            raise ValueError("Video frames need a video decoder")
+        width, height, rgb = self.video.decode(message)
+        if (width, height) != (self.width, self.height):
+            self.resize(width, height)
+        if rgb is None:
+            return []
+        self.pixels = bytearray(rgb)
+        return [(0, 0, width, height)]
+
+    def paste(self, x, y, width, height, rgb):
+        """
+        Purpose:
+            Copies RGB rows into the screen copy.
+        """
+        stride = self.width * 3
+        row_bytes = width * 3
+        if len(rgb) != row_bytes * height:
+            raise ValueError("Rectangle data does not match its size")
+        for row in range(height):
+            start = (y + row) * stride + x * 3
+            self.pixels[start : start + row_bytes] = rgb[
+                row * row_bytes : (row + 1) * row_bytes
+            ]
+
+    def copy(self, copy):
+        """
+        Purpose:
+            Moves a rectangle of the screen copy, which may overlap its source.
+        Args:
+            copy (tuple): The (x, y, width, height, source_x, source_y) of the
+            rectangle, as for apply_copy().
+        """
+        x, y, width, height, source_x, source_y = copy
+        stride = self.width * 3
+        row_bytes = width * 3
+        rows = [
+            self.pixels[start : start + row_bytes]
+            for start in range(
+                source_y * stride + source_x * 3, (source_y + height) * stride, stride
+            )
+        ]
+        for row, data in enumerate(rows):
+            start = (y + row) * stride + x * 3
+            self.pixels[start : start + row_bytes] = data
+
+    def ppm(self, x, y, width, height):
+        """
+        Purpose:
+            Extracts a region as binary PPM, which Tk photo images read natively.
+        Returns:
+            bytes: The PPM image of the region.
+        """
+        stride = self.width * 3
+        start = x * 3
+        end = start + width * 3
+        rows = [
+            self.pixels[row * stride + start : row * stride + end]
+            for row in range(y, y + height)
+        ]
+        return b"P6 %d %d 255\n" % (width, height) + b"".join(rows)
@@ -0,0 +1,95 @@
+"""
+Screen layout describing which receiver sits next to each edge of the sender's screen.
+
+The layout is read from layout.json, for example:
+    {"left": "192.168.1.20", "right": "192.168.1.21:5001"}
+Each value is the address of a receiver as entered in the IP address field.
+"""
+# isort: off
+import json
+
+EDGES = ("left", "right", "top", "bottom")
+
+OPPOSITE_EDGE = {"left": "right", "right": "left", "top": "bottom", "bottom": "top"}
+
+
+def load_screen_layout(file_name, targets):
+    """
+    Purpose:
+        Loads the screen layout and resolves each neighbour to a receiver.
+
+    Args:
+        file_name (str): The path of the layout file.
+        targets (list): The (ip_address, port) tuples of the receivers in the pool.
+
+    Return:
+        screen_layout (dict): Maps an edge name to the index of the receiver
+        beyond that edge. Empty if there is no usable layout.
+    """
+    try:
+        with open(file_name, "r", encoding="UTF-8") as layout_file:
+            data = json.load(layout_file)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        print("Invalid JSON format in " + file_name)
+        return {}
+
+    screen_layout = {}
+    for edge in EDGES:
+        neighbour = data.get(edge)
+        for index, (ip_address, port) in enumerate(targets):
+            if neighbour in (ip_address, f"{ip_address}:{port}"):
+                screen_layout[edge] = index
+                break
+    return screen_layout
+
+
+def crossed_edge(edge_bounds, x_coord, y_coord):
+    """
+    Purpose:
+        Finds the screen edge the cursor was pushed against.
+
+    Args:
+        edge_bounds (tuple): The (min_x, min_y, max_x, max_y) cursor bounds.
+        x_coord (int): The x-coordinate of the mouse cursor.
+        y_coord (int): The y-coordinate of the mouse cursor.
+
+    Return:
+        str: The name of the edge, or None if the cursor is inside the screen.
+    """
+    min_x, min_y, max_x, max_y = edge_bounds
+    if x_coord <= min_x:
+        return "left"
+    if x_coord >= max_x:
+        return "right"
+    if y_coord <= min_y:
+        return "top"
+    if y_coord >= max_y:
+        return "bottom"
+    return None
+
+
+def warp_position(edge_bounds, edge, x_coord, y_coord):
+    """
+    Purpose:
+        Finds where to place the cursor after it crossed an edge, so that it
+        re-enters from the opposite side and keeps moving in the same direction.
+
+    Args:
+        edge_bounds (tuple): The (min_x, min_y, max_x, max_y) cursor bounds.
+        edge (str): The edge the cursor crossed.
+        x_coord (int): The x-coordinate of the mouse cursor.
+        y_coord (int): The y-coordinate of the mouse cursor.
+
+    Return:
+        tuple: The new (x, y) position of the cursor.
+    """
+    min_x, min_y, max_x, max_y = edge_bounds
+    if edge == "left":
+        return max_x - 1, y_coord
+    if edge == "right":
+        return min_x + 1, y_coord
+    if edge == "top":
+        return x_coord, max_y - 1
+    return x_coord, min_y + 1
@@ -0,0 +1,462 @@
+"""
+Shares the screen of a receiver with the senders that view it.
+
+The receiver runs a ScreenShareServer on its input port plus
+SCREEN_PORT_OFFSET, on a connection tuned with the bulk_screen_share socket
+profile. Every viewer connection is multiplexed, and encoded frames travel
+on the frame stream. A viewer gets a new frame only once the previous one
+has left its queue, so a slow viewer skips frames instead of falling behind.
+Its encoder still diffs against the last frame it was sent, so skipped
+frames never lose damage.
+
+Viewers report the size of their window and the region of the screen they
+show on the control stream. Only that region is captured, and it is
+downscaled to fit the window before encoding. The server answers with the
+geometry of the frames that follow, ahead of the first of them. Viewers
+that can decode video also say so, and then get video while most of the
+screen keeps changing, see screen_video.py.
+
+Viewers can also ask for thumbnails, to show many receivers at once: the
+whole screen, downscaled to a small viewport, at a few frames per second,
+with fewer bits per color and the strongest compression. Asking again
+without the thumbnail flag upgrades the same connection to full quality.
+
+Captures are paced by damage rather than a fixed rate: an unchanged screen
+is captured less and less often, while injected input, X damage events,
+new viewers and viewport changes trigger a capture straight away, see
+capture_pacing.py.
+"""
+# isort: off
+import socket
+import struct
+import threading
+import time
+from capture_pacing import DAMAGE_MAX_INTERVAL, CapturePacer, XDamageMonitor
+from encryption import wrap_server_socket
+from metrics import SCREEN_BYTES, SCREEN_FRAMES
+from multiplexer import CONTROL_STREAM, FRAME_STREAM, Demultiplexer, MuxWriter
+from screen_codec import Frame, downscale, quantize, scale_factor
+from screen_video import AdaptiveEncoder
+from socket_options import accept_connections, create_listening_socket
+
+SCREEN_PORT_OFFSET = 2
+SCREEN_PROFILE = "bulk_screen_share"
+
+# Viewer to server: the viewport size, the region shown, 0 wide for the
+# whole screen, and flags
+VIEWPORT = struct.Struct(">cHHHHHHB")
+KIND_VIEWPORT = b"P"
+FLAG_VIDEO = 0x01
+FLAG_THUMBNAIL = 0x02
+# Server to viewer: the screen size, the region captured and the downscale factor
+GEOMETRY = struct.Struct(">cHHHHHHB")
+KIND_GEOMETRY = b"G"
+
+# Thumbnails: frames per second, bits kept per color, and zlib level
+THUMBNAIL_FPS = 2
+THUMBNAIL_COLOR_BITS = 5
+THUMBNAIL_LEVEL = 9
+
+
+def viewport_message(
+    view_width, view_height, region=None, video=False, thumbnail=False
+):
+    """
+    Purpose:
+        Encodes the viewport of a viewer.
+
+    Args:
+        view_width (int): The width of the viewer's window, 0 if unknown.
+        view_height (int): The height of the viewer's window, 0 if unknown.
+        region (tuple): The (x, y, width, height) shown, None for the whole screen.
+        video (bool): The viewer can decode video frames.
+        thumbnail (bool): Send thumbnails of the whole screen.
+
+    Return:
+        bytes: The control message.
+    """
+    x, y, width, height = region or (0, 0, 0, 0)
+    flags = (FLAG_VIDEO if video else 0) | (FLAG_THUMBNAIL if thumbnail else 0)
+    return VIEWPORT.pack(
+        KIND_VIEWPORT, view_width, view_height, x, y, width, height, flags
+    )
+
+
+def clamp_region(region, screen_width, screen_height):
+    """
+    Purpose:
+        Moves and shrinks a region until it lies within the screen.
+
+    Args:
+        region (tuple): The (x, y, width, height) requested, None for the whole screen.
+        screen_width (int): The width of the screen.
+        screen_height (int): The height of the screen.
+
+    Return:
+        tuple: The (x, y, width, height) region to capture.
+    """
+    if region is None or region[2] <= 0 or region[3] <= 0:
+        return (0, 0, screen_width, screen_height)
+    x, y, width, height = region
+    width = min(width, screen_width)
+    height = min(height, screen_height)
+    x = max(0, min(x, screen_width - width))
+    y = max(0, min(y, screen_height - height))
+    return (x, y, width, height)
+
+
+class MssCapture:
+    """
+    Grabs a monitor with mss, which is only imported on the first grab.
+    """
+
+    def __init__(self, monitor_index=0):
+        """
+        Args:
+            monitor_index (int): The mss monitor, 0 is every monitor together.
+        """
+        self.monitor_index = monitor_index
+        self.screenshot_tool = None
+
+    def monitor(self):
+        """
+        Returns:
+            dict: The mss monitor, with its left, top, width and height.
+        """
+        if self.screenshot_tool is None:
+            from mss import mss  # pylint: disable=C0415
+
+            self.screenshot_tool = mss()
+        return self.screenshot_tool.monitors[self.monitor_index]
+
+    def size(self):
+        """
+        Returns:
+            tuple: The (width, height) of the monitor.
+        """
+        monitor = self.monitor()
+        return (monitor["width"], monitor["height"])
+
+    def grab(self, region=None):
+        """
+        Args:
+            region (tuple): The (x, y, width, height) to grab, None for all of it.
+        Returns:
+            Frame: The current image of the region.
+        """
+        monitor = self.monitor()
+        if region is not None:
+            x, y, width, height = region
+            monitor = {
+                "left": monitor["left"] + x,
+                "top": monitor["top"] + y,
+                "width": width,
+                "height": height,
+            }
+        screenshot = self.screenshot_tool.grab(monitor)
+        return Frame(screenshot.width, screenshot.height, screenshot.bgra)
+
+    def close(self):
+        """
+        Purpose:
+            Releases the mss resources.
+        """
+        if self.screenshot_tool is not None:
+            self.screenshot_tool.close()
+            self.screenshot_tool = None
+
+
+class ViewerConnection:
+    """
+    A connected viewer with its own viewport, encoder and frame queue.
+    """
+
+    def __init__(self, client_socket, client_address, fps=30, wake=None):
+        self.client_socket = client_socket
+        # Called when the viewport changes, so the next frame follows it at once
+        self.wake = wake
+        self.client_address = client_address
+        self.writer = MuxWriter(client_socket)
+        self.encoder = AdaptiveEncoder(fps)
+        self.view_size = (0, 0)
+        self.region = None
+        self.thumbnail = False
+        self.encoded_thumbnail = False
+        self.last_sent = 0.0
+        self.geometry = None
+        self.disconnected = False
+        self.reader = threading.Thread(target=self.read_control, daemon=True)
+        self.frames_sent = 0
+        self.frames_skipped = 0
+
+    @property
+    def name(self):
+        """
+        Returns:
+            str: The address of the viewer as ip:port.
+        """
+        return f"{self.client_address[0]}:{self.client_address[1]}"
+
+    def start(self):
+        """
+        Purpose:
+            Starts writing frames and reading the viewport updates.
+        """
+        self.writer.start()
+        self.reader.start()
+
+    def read_control(self):
+        """
+        Purpose:
+            Applies the viewport updates of the viewer until it disconnects.
+        """
+        demultiplexer = Demultiplexer()
+        while True:
+            try:
+                data = self.writer.recv(4096)
+                if not data:
+                    break
+                messages = demultiplexer.feed(data)
+            except socket.timeout:
+                continue
+            except (OSError, ValueError):
+                break
+            for stream_id, message in messages:
+                if stream_id != CONTROL_STREAM or message[:1] != KIND_VIEWPORT:
+                    continue
+                try:
+                    _, view_width, view_height, *region, flags = VIEWPORT.unpack(
+                        message
+                    )
+                except struct.error:
+                    continue
+                self.view_size = (view_width, view_height)
+                self.thumbnail = bool(flags & FLAG_THUMBNAIL)
+                if self.thumbnail or not (region[2] and region[3]):
+                    self.region = None
+                else:
+                    self.region = tuple(region)
+                video = bool(flags & FLAG_VIDEO)
+                self.encoder.video_allowed = video and not self.thumbnail
+                if self.wake is not None:
+                    self.wake()
+        self.disconnected = True
+
+    def capture_plan(self, screen_width, screen_height):
+        """
+        Returns:
+            tuple: The (region, factor) to capture and downscale for this viewer.
+        """
+        region = clamp_region(self.region, screen_width, screen_height)
+        factor = scale_factor(region[2], region[3], *self.view_size)
+        return region, factor
+
+    def send_frame(self, frame, geometry):
+        """
+        Purpose:
+            Encodes and queues a frame, unless the previous one is still queued.
+        Args:
+            frame (Frame): The captured and downscaled frame.
+            geometry (tuple): The screen size, region and factor of the frame.
+        Returns:
+            bool: False if the frame did not change since the last one sent,
+            True if it changed, even if a thumbnail holds it back for now.
+        """
+        if self.writer.queued_bytes[FRAME_STREAM]:
+            # Unknown until encoded, so keep capturing at full rate
+            self.frames_skipped += 1
+            return True
+        if self.thumbnail != self.encoded_thumbnail:
+            # Start over with a complete frame in the new quality
+            self.encoder.reset()
+            self.encoder.tiles.level = THUMBNAIL_LEVEL if self.thumbnail else 1
+            self.encoded_thumbnail = self.thumbnail
+        if self.thumbnail:
+            frame = quantize(frame, THUMBNAIL_COLOR_BITS)
+            if time.monotonic() - self.last_sent < 1 / THUMBNAIL_FPS:
+                # Not encoded, so the next thumbnail still carries this damage.
+                # The pacer must not back off while it is pending
+                previous = self.encoder.tiles.previous
+                return previous is None or previous.pixels != frame.pixels
+        if geometry != self.geometry:
+            # The previous frame has left the queue, so this cannot overtake it
+            self.writer.send(CONTROL_STREAM, GEOMETRY.pack(KIND_GEOMETRY, *geometry))
+            self.geometry = geometry
+        message = self.encoder.encode(frame)
+        if message is None:
+            return False
+        self.last_sent = time.monotonic()
+        if self.writer.send(FRAME_STREAM, message):
+            self.frames_sent += 1
+            SCREEN_FRAMES.inc()
+            SCREEN_BYTES.inc(len(message))
+        return True
+
+    def close(self):
+        """
+        Purpose:
+            Stops writing and closes the connection.
+        """
+        try:
+            self.client_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.writer.stop()
+        if self.reader.is_alive():
+            self.reader.join()
+        self.client_socket.close()
+
+
+class ScreenShareServer:
+    """
+    Captures the screen and streams it to every connected viewer.
+    """
+
+    def __init__(self, ip_address, port, tls_context=None, capture=None, pacer=None):
+        """
+        Args:
+            ip_address (str): The IP address to listen on.
+            port (int): The screen share port, 0 picks a free port.
+            tls_context (ssl.SSLContext): Requires encrypted viewers when given.
+            capture (MssCapture): Grabs the frames, the whole desktop by default.
+            pacer (CapturePacer): The most frames captured per second, and how
+            far to back off while the screen is unchanged. 30 frames per second
+            and POLL_MAX_INTERVAL by default, a pacer without backoff captures
+            at a fixed rate.
+        """
+        self.tls_context = tls_context
+        self.capture = capture or MssCapture()
+        self.pacer = pacer or CapturePacer()
+        self.fps = 1 / self.pacer.min_interval
+        pacing = self.pacer.max_interval > self.pacer.min_interval
+        self.damage_monitor = XDamageMonitor(self.wake) if pacing else None
+        self.captures = 0
+        self.viewers = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        self.server_socket = create_listening_socket(ip_address, port, SCREEN_PROFILE)
+        self.port = self.server_socket.getsockname()[1]
+
+    def start(self):
+        """
+        Purpose:
+            Starts accepting viewers and capturing in background threads.
+        """
+        for target in (self.accept_viewers, self.capture_frames):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        # With damage notifications an idle screen only needs a rare safety poll
+        if self.damage_monitor is not None and self.damage_monitor.start():
+            self.pacer.max_interval = DAMAGE_MAX_INTERVAL
+
+    def wake(self):
+        """
+        Purpose:
+            Captures as soon as the frame rate allows, for example after input
+            was injected. Safe from any thread.
+        """
+        self.pacer.wake()
+
+    def stop(self):
+        """
+        Purpose:
+            Disconnects every viewer and stops capturing.
+        """
+        self.stop_event.set()
+        self.pacer.wake()
+        for thread in self.threads:
+            thread.join()
+        if self.damage_monitor is not None:
+            self.damage_monitor.stop()
+        self.server_socket.close()
+        with self.lock:
+            viewers, self.viewers = self.viewers, []
+        for viewer in viewers:
+            viewer.close()
+        if hasattr(self.capture, "close"):
+            self.capture.close()
+
+    def accept_viewers(self):
+        """
+        Purpose:
+            Accepts viewers until stopped.
+        """
+        accept_connections(
+            self.server_socket, self.stop_event, SCREEN_PROFILE, self.add_viewer
+        )
+
+    def add_viewer(self, client_socket, client_address):
+        """
+        Purpose:
+            Completes the TLS handshake if needed and starts streaming to a viewer.
+        """
+        try:
+            client_socket = wrap_server_socket(self.tls_context, client_socket)
+            viewer = ViewerConnection(
+                client_socket, client_address, self.fps, self.wake
+            )
+        except OSError as temp_error:
+            client_socket.close()
+            print(f"Viewer {client_address[0]} failed to connect:", temp_error)
+            return
+        viewer.start()
+        with self.lock:
+            self.viewers.append(viewer)
+        self.wake()
+        print("Viewer connected: " + viewer.name)
+
+    def capture_frames(self):
+        """
+        Purpose:
+            Captures and sends frames while viewers are connected. Viewers
+            showing the same region at the same scale share one capture.
+        """
+        while not self.stop_event.is_set():
+            with self.lock:
+                viewers = list(self.viewers)
+            for viewer in viewers:
+                if viewer.disconnected or viewer.writer.error is not None:
+                    self.drop_viewer(viewer)
+            viewers = [viewer for viewer in viewers if not viewer.disconnected]
+            if not viewers:
+                self.stop_event.wait(0.1)
+                continue
+
+            started = time.monotonic()
+            changed = False
+            try:
+                screen_width, screen_height = self.capture.size()
+                plans = {}
+                for viewer in viewers:
+                    plan = viewer.capture_plan(screen_width, screen_height)
+                    plans.setdefault(plan, []).append(viewer)
+                for (region, factor), members in plans.items():
+                    frame = downscale(self.capture.grab(region), factor)
+                    self.captures += 1
+                    geometry = (screen_width, screen_height) + region + (factor,)
+                    for viewer in members:
+                        changed = viewer.send_frame(frame, geometry) or changed
+            except Exception as temp_error:  # pylint: disable=W0703
+                # mss raises its own exception types, and only once it is imported
+                print("Unable to capture the screen:", temp_error)
+                self.stop_event.wait(1.0)
+                continue
+
+            self.pacer.frame_done(changed)
+            self.pacer.wait(started, self.stop_event)
+
+    def drop_viewer(self, viewer):
+        """
+        Purpose:
+            Disconnects a viewer whose connection failed or closed.
+        """
+        with self.lock:
+            if viewer not in self.viewers:
+                return
+            self.viewers.remove(viewer)
+        viewer.disconnected = True
+        viewer.close()
+        print("Viewer disconnected: " + viewer.name)
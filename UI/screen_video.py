@@ -0,0 +1,287 @@
+"""
+Inter-frame video encoding of screen share frames, for full-motion content.
+
+Video playback changes most of the screen on every frame, and the tile codec
+sends each of those frames as a new still image. While the changed area
+stays large, AdaptiveEncoder switches to a software video codec from PyAV,
+H.264 through libx264 or else VP8 through libvpx, which only encodes what
+moved. Once the screen settles it returns to tiles, starting with a complete
+frame since video is lossy. PyAV is optional: without it, or when the
+viewer cannot decode video, only tiles are sent.
+
+A video frame is a VIDEO header (kind, width, height, codec) followed by the
+bitstream of one encoded frame.
+"""
+# isort: off
+import fractions
+import functools
+import struct
+from screen_codec import KIND_VIDEO, TileEncoder, rect_area
+
+VIDEO = struct.Struct(">cHHB")
+
+# Encoder and decoder names, in order of preference, CPU only
+VIDEO_CODECS = (("libx264", "h264"), ("libvpx", "vp8"))
+CODEC_OPTIONS = {
+    "libx264": {"preset": "ultrafast", "tune": "zerolatency", "crf": "28"},
+    "libvpx": {"deadline": "realtime", "cpu-used": "8", "lag-in-frames": "0"},
+}
+
+# Video starts after VIDEO_ENTER_FRAMES frames in a row with at least
+# VIDEO_ENTER_RATIO of the screen changed, and stops after
+# VIDEO_EXIT_FRAMES frames with at most VIDEO_EXIT_RATIO changed
+VIDEO_ENTER_RATIO = 0.3
+VIDEO_ENTER_FRAMES = 5
+VIDEO_EXIT_RATIO = 0.05
+VIDEO_EXIT_FRAMES = 10
+
+
+@functools.lru_cache(maxsize=None)
+def load_av():
+    """
+    Returns:
+        module: PyAV, or None if it is not installed.
+    """
+    try:
+        import av  # pylint: disable=C0415
+    except ImportError:
+        return None
+    return av
+
+
+@functools.lru_cache(maxsize=None)
+def video_codec():
+    """
+    Returns:
+        int: The index in VIDEO_CODECS of the first encoder available, or None.
+    """
+    av = load_av()
+    if av is None:
+        return None
+    for index, (encoder_name, _) in enumerate(VIDEO_CODECS):
+        try:
+            av.codec.Codec(encoder_name, "w")
+        except ValueError:
+            continue
+        return index
+    return None
+
+
+def can_decode_video():
+    """
+    Returns:
+        bool: True if this side can decode video frames.
+    """
+    return load_av() is not None
+
+
+def plane_bytes(plane, row_bytes, height):
+    """
+    Returns:
+        bytes: The rows of a PyAV plane without their padding.
+    """
+    data = bytes(plane)
+    if plane.line_size == row_bytes:
+        return data[: row_bytes * height]
+    return b"".join(
+        data[row * plane.line_size : row * plane.line_size + row_bytes]
+        for row in range(height)
+    )
+
+
+class VideoEncoder:
+    """
+    Encodes frames of one size with a PyAV video encoder.
+    """
+
+    def __init__(self, width, height, codec_index, fps=30):
+        """
+        Args:
+            width (int): The width of the frames.
+            height (int): The height of the frames.
+            codec_index (int): The codec, an index in VIDEO_CODECS.
+            fps (float): The frame rate, used for rate control.
+        """
+        av = load_av()
+        encoder_name = VIDEO_CODECS[codec_index][0]
+        self.codec_index = codec_index
+        self.width = width
+        self.height = height
+        self.context = av.CodecContext.create(encoder_name, "w")
+        # 4:2:0 chroma needs even sizes, odd frames are stretched by a pixel
+        self.context.width = width + width % 2
+        self.context.height = height + height % 2
+        self.context.pix_fmt = "yuv420p"
+        self.context.time_base = fractions.Fraction(1, int(fps))
+        self.context.options = dict(CODEC_OPTIONS[encoder_name])
+        self.frame_index = 0
+
+    def encode(self, frame):
+        """
+        Args:
+            frame (Frame): The frame, of the encoder's size.
+        Returns:
+            bytes: The video frame message.
+        """
+        av = load_av()
+        video_frame = av.VideoFrame(frame.width, frame.height, "bgra")
+        plane = video_frame.planes[0]
+        if plane.line_size == frame.stride:
+            plane.update(frame.pixels)
+        else:
+            padding = bytes(plane.line_size - frame.stride)
+            plane.update(
+                b"".join(
+                    frame.pixels[row * frame.stride : (row + 1) * frame.stride]
+                    + padding
+                    for row in range(frame.height)
+                )
+            )
+        video_frame = video_frame.reformat(
+            width=self.context.width, height=self.context.height, format="yuv420p"
+        )
+        video_frame.pts = self.frame_index
+        self.frame_index += 1
+        packets = self.context.encode(video_frame)
+        header = VIDEO.pack(KIND_VIDEO, frame.width, frame.height, self.codec_index)
+        return header + b"".join(bytes(packet) for packet in packets)
+
+
+class VideoDecoder:
+    """
+    Decodes video frame messages to RGB with PyAV.
+    """
+
+    def __init__(self):
+        self.context = None
+        self.codec_index = None
+
+    def decode(self, message):
+        """
+        Args:
+            message (bytes): The video frame message.
+        Returns:
+            tuple: (width, height, RGB pixels), the pixels are None while the
+            decoder still waits for more data.
+        Raises:
+            ValueError: If the message is corrupt or PyAV is not installed.
+        """
+        try:
+            _, width, height, codec_index = VIDEO.unpack_from(message)
+        except struct.error as temp_error:
+            raise ValueError("Truncated video frame") from temp_error
+        av = load_av()
+        if av is None:
+            raise ValueError("Video frames need PyAV")
+        if codec_index >= len(VIDEO_CODECS):
+            raise ValueError(f"Unknown video codec {codec_index}")
+        if self.context is None or codec_index != self.codec_index:
+            self.context = av.CodecContext.create(VIDEO_CODECS[codec_index][1], "r")
+            self.codec_index = codec_index
+
+        decoded = None
+        try:
+            for video_frame in self.context.decode(av.Packet(message[VIDEO.size :])):
+                decoded = video_frame
+        except av.error.FFmpegError as temp_error:
+            raise ValueError("Corrupt video frame") from temp_error
+        if decoded is None:
+            return width, height, None
+        decoded = decoded.reformat(width=width, height=height, format="rgb24")
+        return width, height, plane_bytes(decoded.planes[0], width * 3, height)
+
+
+class AdaptiveEncoder:
+    """
+    Sends tiles, or video while most of the screen keeps changing.
+    """
+
+    def __init__(self, fps=30, tile_encoder=None):
+        """
+        Args:
+            fps (float): The capture frame rate.
+            tile_encoder (TileEncoder): Encodes the tiles, a default one if absent.
+        """
+        self.fps = fps
+        self.tiles = tile_encoder or TileEncoder()
+        # Set once the viewer says it can decode video
+        self.video_allowed = False
+        self.video = None
+        self.streak = 0
+        self.switches = 0
+
+    @property
+    def mode(self):
+        """
+        Returns:
+            str: "video" or "tiles".
+        """
+        return "tiles" if self.video is None else "video"
+
+    def reset(self):
+        """
+        Purpose:
+            Makes the next frame a complete tile frame.
+        """
+        self.tiles.reset()
+        self.video = None
+        self.streak = 0
+
+    def encode(self, frame):
+        """
+        Purpose:
+            Encodes a frame in the current mode, then switches mode if the
+            changed area has stayed large or small long enough.
+        Args:
+            frame (Frame): The new frame.
+        Returns:
+            bytes: The encoded frame, None if nothing changed.
+        """
+        if self.video is None:
+            message = self.tiles.encode(frame)
+            large = self.tiles.changed_ratio >= VIDEO_ENTER_RATIO
+            self.streak = self.streak + 1 if large else 0
+            if self.streak >= VIDEO_ENTER_FRAMES and self.video_allowed:
+                self.start_video(frame)
+            return message
+
+        # The tile encoder still follows the frames to measure the change
+        changed = rect_area(self.tiles.changed_rects(frame))
+        self.tiles.previous = frame
+        small = changed <= VIDEO_EXIT_RATIO * frame.width * frame.height
+        self.streak = self.streak + 1 if small else 0
+        if self.streak >= VIDEO_EXIT_FRAMES or not self.video_allowed:
+            self.switches += 1
+            self.reset()
+            return self.tiles.encode(frame)
+        if not changed:
+            return None
+        try:
+            if (frame.width, frame.height) != (self.video.width, self.video.height):
+                self.video = VideoEncoder(
+                    frame.width, frame.height, self.video.codec_index, self.fps
+                )
+            return self.video.encode(frame)
+        except Exception as temp_error:  # pylint: disable=W0703
+            # PyAV raises its own exception types, give up on video for good
+            print("Video encoding failed:", temp_error)
+            self.video_allowed = False
+            self.reset()
+            return self.tiles.encode(frame)
+
+    def start_video(self, frame):
+        """
+        Purpose:
+            Switches to video, from the next frame on, if a codec is available.
+        """
+        codec_index = video_codec()
+        if codec_index is None:
+            return
+        try:
+            self.video = VideoEncoder(frame.width, frame.height, codec_index, self.fps)
+        except Exception as temp_error:  # pylint: disable=W0703
+            print("Unable to start video encoding:", temp_error)
+            self.video_allowed = False
+            return
+        self.streak = 0
+        self.switches += 1
@@ -0,0 +1,461 @@
+"""
+Displays the screen shared by a receiver without stalling the Tk main loop.
+
+A background thread reads and decodes the frames into an RGB copy of the
+remote screen, then prepares PPM patches of the damaged regions. It hands
+them to Tk through a single slot that only holds the latest update. Tk
+refreshes at display rate and draws the patches into one persistent
+PhotoImage. Tk never decodes anything, and never rebuilds the whole image
+for a partial update. When Tk falls behind, the stale update is replaced,
+and its damaged regions are folded into the new one so that nothing is
+left undrawn.
+
+The viewer tells the receiver the size of its widget and the region of the
+remote screen it shows, so only that region is captured, at no more than
+the resolution the widget can display. Zooming and panning change the
+region, and the next captured frame follows it.
+
+In thumbnail mode the viewer asks for the whole screen at THUMBNAIL_SIZE, a
+few frames per second, to show many receivers at once. Leaving it upgrades
+the same connection to full quality, and attaching to another widget moves
+the drawing there.
+"""
+# isort: off
+import socket
+import threading
+import tkinter as tk
+from connection_pool import create_client_connection
+from encryption import ClientSession
+from multiplexer import CONTROL_STREAM, FRAME_STREAM, Demultiplexer, MuxWriter
+from screen_codec import TileDecoder
+from screen_share import (
+    GEOMETRY,
+    KIND_GEOMETRY,
+    SCREEN_PROFILE,
+    clamp_region,
+    viewport_message,
+)
+from screen_video import VideoDecoder, can_decode_video
+
+# Past this many damaged regions, one bounding box is cheaper to draw
+MAX_PATCHES = 64
+# Narrowest region zooming in can show, in remote pixels
+MIN_REGION_WIDTH = 160
+# The viewport of a thumbnail
+THUMBNAIL_SIZE = (320, 180)
+
+
+class FrameUpdate:
+    """
+    The regions of the remote screen that changed since Tk last drew it.
+    """
+
+    def __init__(self, width, height, damage, patches):
+        """
+        Args:
+            width (int): The width of the remote screen.
+            height (int): The height of the remote screen.
+            damage (list): The damaged (x, y, width, height) rectangles.
+            patches (list): (x, y, ppm) images of the damaged rectangles.
+        """
+        self.width = width
+        self.height = height
+        self.damage = damage
+        self.patches = patches
+
+
+class LatestFrameBuffer:
+    """
+    A single slot holding the newest update that was not displayed yet.
+    """
+
+    def __init__(self):
+        self.update = None
+        self.lock = threading.Lock()
+
+    def put(self, update):
+        """
+        Purpose:
+            Stores an update, replacing the one not displayed yet.
+        Args:
+            update (FrameUpdate): The new update.
+        Returns:
+            FrameUpdate: The replaced update, or None.
+        """
+        with self.lock:
+            stale, self.update = self.update, update
+        return stale
+
+    def take(self):
+        """
+        Returns:
+            FrameUpdate: The latest update, or None if there is nothing new.
+        """
+        with self.lock:
+            update, self.update = self.update, None
+        return update
+
+
+def merge_damage(rects, limit=MAX_PATCHES):
+    """
+    Purpose:
+        Removes duplicates, and collapses many regions into their bounding box.
+
+    Args:
+        rects (list): (x, y, width, height) rectangles.
+        limit (int): The most rectangles kept.
+
+    Return:
+        list: The rectangles to draw.
+    """
+    rects = list(dict.fromkeys(rects))
+    if len(rects) <= limit:
+        return rects
+    left = min(x for x, _, _, _ in rects)
+    top = min(y for _, y, _, _ in rects)
+    right = max(x + width for x, _, width, _ in rects)
+    bottom = max(y + height for _, y, _, height in rects)
+    return [(left, top, right - left, bottom - top)]
+
+
+class ScreenViewer:
+    """
+    Receives the screen of a receiver and draws it into a Tk widget.
+    """
+
+    def __init__(self, address, tls_context=None, thumbnail=False):
+        """
+        Args:
+            address (tuple): The (ip_address, screen_port) of the receiver.
+            tls_context (ssl.SSLContext): Encrypts the connection when given.
+            thumbnail (bool): Start with thumbnails rather than full quality.
+        """
+        self.address = address
+        self.tls = ClientSession(tls_context) if tls_context is not None else None
+        self.client_socket = None
+        self.writer = None
+        self.view_size = (0, 0)
+        self.region = None
+        self.thumbnail = thumbnail
+        self.geometry = None
+        self.decoder = TileDecoder(VideoDecoder())
+        self.latest = LatestFrameBuffer()
+        self.closing = False
+        self.thread = None
+        self.widget = None
+        self.bindings = []
+        self.photo = None
+        self.after_id = None
+        self.interval_ms = 16
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        self.frames_shown = 0
+        self.error = ""
+
+    def start(self):
+        """
+        Purpose:
+            Connects to the receiver and starts decoding in the background.
+        Returns:
+            bool: True if connected.
+        """
+        self.client_socket = create_client_connection(
+            self.address[0], self.address[1], SCREEN_PROFILE, self.tls
+        )
+        if self.client_socket is None:
+            self.error = "Unable to connect to the screen share"
+            return False
+        self.writer = MuxWriter(self.client_socket)
+        self.writer.start()
+        self.send_viewport()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """
+        Purpose:
+            Disconnects and stops refreshing the widget.
+        """
+        self.closing = True
+        if self.client_socket is not None:
+            try:
+                self.client_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.client_socket.close()
+        if self.writer is not None:
+            self.writer.stop()
+        if self.thread is not None:
+            self.thread.join()
+        self.detach()
+
+    def run(self):
+        """
+        Purpose:
+            Reads and decodes frames until the connection closes.
+        """
+        demultiplexer = Demultiplexer()
+        while not self.closing:
+            try:
+                data = self.writer.recv(262144)
+            except socket.timeout:
+                continue
+            except OSError as temp_error:
+                self.error = str(temp_error)
+                break
+            if not data:
+                self.error = "Screen share closed by the receiver"
+                break
+            try:
+                for stream_id, message in demultiplexer.feed(data):
+                    if stream_id == FRAME_STREAM:
+                        self.show(self.decoder.apply(message))
+                    elif stream_id == CONTROL_STREAM and message[:1] == KIND_GEOMETRY:
+                        self.geometry = GEOMETRY.unpack(message)[1:]
+            except ValueError as temp_error:
+                self.error = "Corrupt screen share: " + str(temp_error)
+                break
+        if not self.closing:
+            print(self.error)
+
+    def send_viewport(self):
+        """
+        Purpose:
+            Tells the receiver the widget size and the region shown, or that
+            thumbnails are wanted.
+        """
+        if self.writer is None:
+            return
+        if self.thumbnail:
+            message = viewport_message(*THUMBNAIL_SIZE, thumbnail=True)
+        else:
+            message = viewport_message(*self.view_size, self.region, can_decode_video())
+        self.writer.send(CONTROL_STREAM, message)
+
+    def set_thumbnail(self, thumbnail):
+        """
+        Purpose:
+            Switches between thumbnails and full quality on the same connection.
+        Args:
+            thumbnail (bool): True for thumbnails.
+        """
+        if thumbnail != self.thumbnail:
+            self.thumbnail = thumbnail
+            self.send_viewport()
+
+    def set_viewport(self, width, height):
+        """
+        Purpose:
+            Sets the size the frames are downscaled to fit.
+        Args:
+            width (int): The width of the widget, 0 for the full resolution.
+            height (int): The height of the widget, 0 for the full resolution.
+        """
+        if (width, height) != self.view_size:
+            self.view_size = (width, height)
+            self.send_viewport()
+
+    def set_region(self, region):
+        """
+        Purpose:
+            Sets the region of the remote screen to show.
+        Args:
+            region (tuple): The (x, y, width, height) to show, None for all of it.
+        """
+        if region != self.region:
+            self.region = region
+            self.send_viewport()
+
+    def to_remote(self, x, y):
+        """
+        Purpose:
+            Maps a point of the widget to the remote screen.
+        Args:
+            x (int): The horizontal position in the widget.
+            y (int): The vertical position in the widget.
+        Returns:
+            tuple: The (x, y) remote position, or None before the first frame.
+        """
+        if self.geometry is None:
+            return None
+        _, _, region_x, region_y, _, _, factor = self.geometry
+        # Tk labels center their image
+        left = (self.view_size[0] - self.decoder.width) // 2
+        top = (self.view_size[1] - self.decoder.height) // 2
+        return (region_x + (x - left) * factor, region_y + (y - top) * factor)
+
+    def zoom_at(self, x, y, zoom):
+        """
+        Purpose:
+            Zooms around a point of the widget, keeping it in place.
+        Args:
+            x (int): The horizontal position in the widget.
+            y (int): The vertical position in the widget.
+            zoom (float): Above 1 zooms in, below 1 zooms out.
+        """
+        point = self.to_remote(x, y)
+        if point is None:
+            return
+        screen_width, screen_height = self.geometry[:2]
+        # Start from the region last asked for, frames may still show an older one
+        region_x, region_y, width, height = clamp_region(
+            self.region, screen_width, screen_height
+        )
+        new_width = int(min(screen_width, max(MIN_REGION_WIDTH, width / zoom)))
+        if new_width >= screen_width:
+            self.set_region(None)
+            return
+        new_height = max(1, new_width * height // width)
+        new_x = int(point[0] - (point[0] - region_x) * new_width / width)
+        new_y = int(point[1] - (point[1] - region_y) * new_height / height)
+        self.set_region(
+            clamp_region(
+                (new_x, new_y, new_width, new_height), screen_width, screen_height
+            )
+        )
+
+    def pan(self, delta_x, delta_y):
+        """
+        Purpose:
+            Moves the region shown as if dragging the image.
+        Args:
+            delta_x (int): The horizontal drag in widget pixels.
+            delta_y (int): The vertical drag in widget pixels.
+        """
+        if self.geometry is None or self.region is None:
+            return
+        screen_width, screen_height = self.geometry[:2]
+        factor = self.geometry[-1]
+        region_x, region_y, width, height = self.region
+        self.set_region(
+            clamp_region(
+                (
+                    region_x - delta_x * factor,
+                    region_y - delta_y * factor,
+                    width,
+                    height,
+                ),
+                screen_width,
+                screen_height,
+            )
+        )
+
+    def show(self, damage):
+        """
+        Purpose:
+            Prepares the patches of a decoded frame for Tk, off the Tk thread.
+        Args:
+            damage (list): The regions changed by the frame.
+        """
+        self.frames_decoded += 1
+        width, height = self.decoder.width, self.decoder.height
+        stale = self.latest.take()
+        if stale is not None:
+            self.frames_dropped += 1
+            if (stale.width, stale.height) == (width, height):
+                damage = stale.damage + damage
+        damage = merge_damage(damage)
+        patches = [
+            (x, y, self.decoder.ppm(x, y, rect_width, rect_height))
+            for x, y, rect_width, rect_height in damage
+        ]
+        self.latest.put(FrameUpdate(width, height, damage, patches))
+
+    def attach(self, widget, interval_ms=16, interactive=True):
+        """
+        Purpose:
+            Starts drawing into a widget that can show an image, such as a Label,
+            instead of the widget it was attached to before.
+        Args:
+            widget (tk.Widget): The widget, refreshed from the Tk main loop.
+            interval_ms (int): Milliseconds between refreshes, 16 for 60 Hz.
+            interactive (bool): Follow the widget size, zoom with the wheel and
+                pan by dragging. Thumbnails leave the widget events alone.
+        """
+        self.detach()
+        self.widget = widget
+        self.interval_ms = interval_ms
+        if interactive:
+            # Configure only fires on a change, the widget may be shown already
+            if widget.winfo_width() > 1:
+                self.set_viewport(widget.winfo_width(), widget.winfo_height())
+            drag = {}
+
+            def on_drag(event):
+                self.pan(
+                    event.x - drag.get("x", event.x), event.y - drag.get("y", event.y)
+                )
+                drag.update(x=event.x, y=event.y)
+
+            self.bindings = [
+                (
+                    "<Configure>",
+                    lambda event: self.set_viewport(event.width, event.height),
+                ),
+                (
+                    "<MouseWheel>",
+                    lambda event: self.zoom_at(
+                        event.x, event.y, 1.25 if event.delta > 0 else 0.8
+                    ),
+                ),
+                # X11 reports the wheel as buttons 4 and 5
+                ("<Button-4>", lambda event: self.zoom_at(event.x, event.y, 1.25)),
+                ("<Button-5>", lambda event: self.zoom_at(event.x, event.y, 0.8)),
+                ("<ButtonPress-1>", lambda event: drag.update(x=event.x, y=event.y)),
+                ("<B1-Motion>", on_drag),
+            ]
+            for sequence, callback in self.bindings:
+                widget.bind(sequence, callback)
+        self.refresh()
+
+    def detach(self):
+        """
+        Purpose:
+            Stops drawing into the widget and releases its events and image.
+        """
+        if self.widget is None:
+            return
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+        for sequence, _ in self.bindings:
+            self.widget.unbind(sequence)
+        self.bindings = []
+        if self.photo is not None:
+            self.widget.configure(image="")
+            self.photo = None
+        self.widget = None
+
+    def refresh(self):
+        """
+        Purpose:
+            Draws the latest update on the Tk thread and schedules the next refresh.
+        """
+        update = self.latest.take()
+        if update is not None:
+            self.draw(update)
+        if not self.closing:
+            self.after_id = self.widget.after(self.interval_ms, self.refresh)
+
+    def draw(self, update):
+        """
+        Purpose:
+            Writes the patches of an update into the persistent photo image,
+            which is only recreated when the remote screen changes size.
+        Args:
+            update (FrameUpdate): The update to draw.
+        """
+        if self.photo is None or (self.photo.width(), self.photo.height()) != (
+            update.width,
+            update.height,
+        ):
+            self.photo = tk.PhotoImage(
+                master=self.widget, width=update.width, height=update.height
+            )
+            self.widget.configure(image=self.photo)
+        for x, y, ppm in update.patches:
+            self.photo.tk.call(
+                self.photo.name, "put", ppm, "-format", "ppm", "-to", x, y
+            )
+        self.frames_shown += 1
@@ -2,67 +2,168 @@
 Sender class that handles sending mouse and keyboard events to the server.
 """
 # isort: off
-import socket
+import threading
 import time
 import pyautogui
 from pynput import keyboard
 from pynput import mouse
-import options
+from connection_pool import ConnectionPool
+from encryption import create_client_context
+from event_bus import ui_events
+from health_monitor import HealthMonitor
+from input_profiler import PROFILER
+from keycodes import KEY_IDS, PRESS_PACKETS, RELEASE_PACKETS
+from screen_layout import OPPOSITE_EDGE, crossed_edge, warp_position
+from session import started_session
+from socket_options import DEFAULT_PROFILE, ChannelOptions
 
 
 KeyMap = {
     "alt_l": "altleft",
     "alt_r": "altright",
+    "alt_gr": "altright",
+    "caps_lock": "capslock",
+    "cmd": "win",
+    "cmd_l": "winleft",
+    "cmd_r": "winright",
     "ctrl_l": "ctrlleft",
     "ctrl_r": "ctrlright",
     "media_volume_up": "volumeup",
     "media_volume_down": "volumedown",
     "media_volume_mute": "volumemute",
+    "media_next": "nexttrack",
+    "media_previous": "prevtrack",
+    "menu": "apps",
+    "num_lock": "numlock",
+    "page_down": "pgdn",
     "page_up": "pgup",
     "media_play_pause": "playpause",
+    "print_screen": "printscreen",
+    "scroll_lock": "scrolllock",
+    "shift_l": "shiftleft",
+    "shift_r": "shiftright",
 }
 
 
-def create_client_connection(ip_address, port):
+def build_key_table():
     """
     Purpose:
-        Creates a TCP connection to the server.
+        Builds the translation table from pynput keys to the shared key IDs.
 
     Args:
-        ip_address (str): The IP address of the server.
-        port (int): The port number of the server.
-        sender_options (dict): The options that the sender has selected.
+        None
 
     Return:
-        client_socket (socket.socket): The socket object that was created.
+        key_table (dict): Maps pynput special keys and key characters to key IDs.
+    """
+    key_table = {}
+
+    # Special keys i.e. tab, alt, space, ctrl
+    for special_key in keyboard.Key:
+        key_name = KeyMap.get(special_key.name, special_key.name)
+        if key_name in KEY_IDS:
+            key_table[special_key] = KEY_IDS[key_name]
+
+    # Alphanumeric keys are looked up by their character
+    for key_name, key_id in KEY_IDS.items():
+        if len(key_name) == 1:
+            key_table[key_name] = key_id
+
+    # Windows reports ctrl + letter as a control character i.e. '\x03' for ctrl + c
+    for code in range(1, 27):
+        if chr(code) not in key_table:
+            key_table[chr(code)] = KEY_IDS[chr(code + 96)]
+
+    return key_table
+
+
+def scroll_packet(dx_coord, dy_coord):
     """
-    # Create a TCP socket object
-    client_address = (str(ip_address), int(port))
-    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    client_socket.settimeout(1)  # Set a timeout value of 5 seconds
+    Purpose:
+        Builds a scroll packet carrying the signed distances scrolled.
 
-    try:
-        # Connect to the server
-        client_socket.connect(client_address)
+    Args:
+        dx_coord (float): The horizontal distance, positive to the right.
+        dy_coord (float): The vertical distance, positive upwards.
 
-        # Convert the boolean to a string and encode as a byte string
-        # screen_share_packet = (
-        #     f"I{chr(3)}" + str(sender_options) + f"{chr(3)}" + "\r\n"
-        # )
+    Return:
+        bytes: The encoded packet.
+    """
+    # Key_Identifier ETX dx ETX dy ETX CRLF
+    return bytes(f"S{chr(3)}{dx_coord:g}{chr(3)}{dy_coord:g}{chr(3)}\r\n", "utf-8")
 
-        # # Send the message to the server
-        # client_socket.sendall(bytes(screen_share_packet, "utf-8"))
 
-        # Read the response from the server
+class ScrollAggregator:
+    """
+    Sums the scroll events of a short window into a single packet.
 
-    except (socket.error, ConnectionRefusedError, OSError) as temp_error:
-        print("Socket error:", temp_error)
-        options.ERROR = True
-        options.RUNNING = False
-        options.ERROR_MESSAGE = "Error connecting to the server: " + str(temp_error)
-        return None
+    A trackpad fling produces hundreds of small scroll events. They are added
+    up for one window from the first event of a burst, then sent together, so
+    the receiver injects one scroll per window instead of one per event.
+    """
+
+    def __init__(self, send, window=0.016):
+        """
+        Args:
+            send (callable): Sends an encoded packet.
+            window (float): Seconds over which scroll events are summed.
+        """
+        self.send = send
+        self.window = window
+        self.dx_coord = 0.0
+        self.dy_coord = 0.0
+        self.lock = threading.Lock()
+        self.pending = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def add(self, dx_coord, dy_coord):
+        """
+        Purpose:
+            Adds a scroll event to the current window.
+        Args:
+            dx_coord (float): The horizontal distance scrolled.
+            dy_coord (float): The vertical distance scrolled.
+        """
+        with self.lock:
+            self.dx_coord += dx_coord
+            self.dy_coord += dy_coord
+        self.pending.set()
 
-    return client_socket
+    def run(self):
+        """
+        Purpose:
+            Sends the sum of every window that received scroll events.
+        """
+        while not self.stop_event.is_set():
+            self.pending.wait()
+            # Stopping ends the window early, stop() sends what is left
+            if self.stop_event.is_set() or self.stop_event.wait(self.window):
+                return
+            self.flush()
+
+    def flush(self):
+        """
+        Purpose:
+            Sends the scroll distance summed so far, if any.
+        """
+        with self.lock:
+            dx_coord, dy_coord = self.dx_coord, self.dy_coord
+            self.dx_coord = self.dy_coord = 0.0
+            self.pending.clear()
+        if dx_coord or dy_coord:
+            self.send(scroll_packet(dx_coord, dy_coord))
+
+    def stop(self):
+        """
+        Purpose:
+            Sends what is left and stops the aggregator thread.
+        """
+        self.stop_event.set()
+        self.pending.set()
+        self.thread.join()
+        self.flush()
 
 
 class Sender:
@@ -70,31 +171,68 @@ class Sender:
     Sender class that handles sending mouse and keyboard events to the server.
     """
 
-    def __init__(self, ip_address, port):
-        self.track_mouse = True
-        self.track_keyboard = True
-        self.socket_fd = None
+    def __init__(
+        self,
+        targets,
+        screen_layout=None,
+        stall_deadline=2.0,
+        session=None,
+        options=None,
+    ):
+        """
+        Args:
+            targets (list): A list of (ip_address, port) tuples, one per receiver.
+            screen_layout (dict): Maps a screen edge to the index of the receiver
+            beyond it. Control starts on the local machine when a layout is given.
+            stall_deadline (float): Seconds without a heartbeat answer before a
+            receiver is reconnected.
+            session (SessionState): The session the sender runs in.
+            options (ChannelOptions): The socket profile of the input channel,
+            whether to compress the packets for receivers that accept it, and
+            the context from encryption.create_client_context() to encrypt them.
+        """
+        self.session = session or started_session()
+        # Timed under another name, so that the method itself is not hidden
+        self.send_packet = PROFILER.wrap("sender.send_to_client", self.send_to_client)
+        self.screen_layout = screen_layout or {}
+        self.track_mouse = not self.screen_layout
+        self.track_keyboard = not self.screen_layout
         pyautogui.FAILSAFE = False
-        self.currently_pressed_keys = []
+        self.currently_pressed_keys = set()
+        self.key_table = build_key_table()
         self.keyboard_thread = None
         self.mouse_thread = None
+        self.health_monitor = None
         self.current_mouse_position = pyautogui.position()
 
-        # Create a TCP socket object
-        self.socket_fd = create_client_connection(ip_address, port)
-
-        if not self.socket_fd or not isinstance(self.socket_fd, socket.socket):
-            options.ERROR = True
-            options.RUNNING = False
-            options.ERROR_MESSAGE = (
-                "Unable to connect to IP Address "
-                + str(ip_address)
-                + " and port "
-                + str(port)
+        # The screen size only changes between sessions, so the mouse packet
+        # prefix and the edge bounds are computed once
+        screen_width, screen_height = pyautogui.size()
+        self.mouse_packet_prefix = (
+            f"M{chr(3)}{screen_width}{chr(3)}{screen_height}{chr(3)}"
+        )
+        self.edge_bounds = None
+        if self.screen_layout:
+            self.edge_bounds = (0, 0, screen_width - 1, screen_height - 1)
+        self.remote_edge = None
+        self.scroll_aggregator = ScrollAggregator(self.send_packet)
+
+        # Open a persistent TCP connection to every receiver
+        self.pool = ConnectionPool(targets, self.pressed_key_packets, options)
+
+        if self.pool.connect_all() == 0:
+            self.session.fail(
+                "Unable to connect to "
+                + ", ".join(target.name for target in self.pool.targets)
             )
+            self.pool = None
             return
 
-        print("Connected to IP Address " + str(ip_address) + " and port " + str(port))
+        print("Connected to " + ", ".join(self.pool.health()))
+
+        # Measure the link to every receiver and catch half-open connections
+        self.health_monitor = HealthMonitor(self.pool, deadline=stall_deadline)
+        self.health_monitor.start()
 
         # Start key logging
         def on_press(event):
@@ -103,20 +241,31 @@ class Sender:
         def on_release(event):
             self.on_release(event)
 
+        # The callbacks are timed while profiling
         self.keyboard_thread = keyboard.Listener(
-            on_press=on_press, on_release=on_release
+            on_press=PROFILER.wrap("sender.on_press", on_press),
+            on_release=PROFILER.wrap("sender.on_release", on_release),
         )
         self.keyboard_thread.start()
 
         # Start mouse logging
         self.mouse_thread = mouse.Listener(
-            on_click=lambda x, y, button, pressed: self.on_click(
-                x_coord=x, y_coord=y, button=button, pressed=pressed
+            on_click=PROFILER.wrap(
+                "sender.on_click",
+                lambda x, y, button, pressed: self.on_click(
+                    x_coord=x, y_coord=y, button=button, pressed=pressed
+                ),
+            ),
+            on_scroll=PROFILER.wrap(
+                "sender.on_scroll",
+                lambda x, y, dx, dy: self.on_scroll(
+                    x_coord=x, y_coord=y, dx_coord=dx, dy_coord=dy
+                ),
             ),
-            on_scroll=lambda x, y, dx, dy: self.on_scroll(
-                x_coord=x, y_coord=y, dx_coord=dx, dy_coord=dy
+            on_move=PROFILER.wrap(
+                "sender.on_move",
+                lambda x, y: self.send_mouse_position(x_coord=x, y_coord=y),
             ),
-            on_move=lambda x, y: self.send_mouse_position(x_coord=x, y_coord=y),
         )
         self.mouse_thread.start()
 
@@ -126,31 +275,113 @@ class Sender:
     def send_to_client(self, message):
         """
         Purpose:
-            Sends a message to the remote server over the network.
+            Sends a message to the active receiver or the broadcast group.
         Args:
             message (bytes): The message to be sent.
         Returns:
             bool: True if the message was sent successfully, False otherwise.
         """
-        print("Sending message to client: " + message.decode())
-        if (not options.RUNNING) or (not isinstance(self.socket_fd, socket.socket)):
+        if (not self.session.running) or (self.pool is None):
             print("Not running")
             return False
-        try:
-            # Send the message to the server
-            self.socket_fd.sendall(message)
-        except ConnectionAbortedError:
-            options.ERROR = True
-            options.RUNNING = False
-            options.ERROR_MESSAGE = "Connection Clossed by Receiver"
+        if self.pool.send(message):
+            return True
+        if not self.pool.connected:
+            self.session.fail("Connection Clossed by Receiver")
+        return False
+
+    def pressed_key_packets(self):
+        """
+        Purpose:
+            Builds the packets that press the keys currently held, used to
+            resynchronize a receiver after a reconnect.
+        Args:
+            None
+        Returns:
+            list: The press packets of the held keys.
+        """
+        return [PRESS_PACKETS[key_id] for key_id in list(self.currently_pressed_keys)]
+
+    def release_pressed_keys(self):
+        """
+        Purpose:
+            Releases the keys held on the current receivers before switching away.
+        Args:
+            None
+        Returns:
+            None
+        """
+        for key_id in self.currently_pressed_keys:
+            self.send_packet(RELEASE_PACKETS[key_id])
+        self.currently_pressed_keys.clear()
+
+    def switch_target(self, index):
+        """
+        Purpose:
+            Routes the events to another receiver in the pool, KVM-style.
+        Args:
+            index (int): The index of the receiver in the pool.
+        Returns:
+            None
+        """
+        self.release_pressed_keys()
+        self.pool.select_target(index)
+        print("Switched to " + self.pool.active_target.name)
+
+    def toggle_broadcast(self):
+        """
+        Purpose:
+            Toggles between sending to the active receiver and broadcasting to all.
+        Args:
+            None
+        Returns:
+            None
+        """
+        self.release_pressed_keys()
+        if self.pool.broadcast_group is None:
+            self.pool.set_broadcast(range(len(self.pool.targets)))
+        else:
+            self.pool.set_broadcast(None)
+
+    # KEYBOARD HANDLERS
+    def translate_key(self, key):
+        """
+        Purpose:
+            Translates a pynput key into its shared key ID.
+        Args:
+            key (pynput.keyboard.Key | pynput.keyboard.KeyCode): The key from the listener.
+        Returns:
+            int: The key ID, or None if the key cannot be sent to the receiver.
+        """
+        if isinstance(key, keyboard.KeyCode):
+            return self.key_table.get(key.char)
+        return self.key_table.get(key)
+
+    def handle_hotkey(self, key):
+        """
+        Purpose:
+            Print screen toggles the control of the receiver, scroll lock
+            cycles through the receivers and pause toggles broadcasting.
+        Args:
+            key (pynput.keyboard.Key): The key that was pressed.
+        Returns:
+            bool: True if the key was a hotkey.
+        """
+        if key is keyboard.Key.print_screen:
+            print("Hit Hot Key")
+            if not self.track_keyboard:
+                ui_events.publish("fullscreen")
+            self.track_keyboard = not self.track_keyboard
+            self.track_mouse = not self.track_mouse
+            self.remote_edge = None
+        elif key is keyboard.Key.scroll_lock:
+            self.switch_target(self.pool.active_index + 1)
+        elif key is keyboard.Key.pause:
+            self.toggle_broadcast()
+        else:
             return False
         return True
 
-    # KEYBOARD HANDLERS
-    #               WINDOWS
-    # If key == '//x03' then ctrl + c     or
-    # LINUX
-    # if self.currently_pressed_keys.count(ctrl) and key == 'c' then ctrl + c
     def on_press(self, key):
         """
         Purpose:
@@ -161,69 +392,31 @@ class Sender:
             bool: True if the event was handled successfully, False otherwise.
         """
         # Check if the program is running and if a socket is available
-        if (not options.RUNNING) or (not isinstance(self.socket_fd, socket.socket)):
+        if (not self.session.running) or (self.pool is None):
             print("Not running")
             return False
 
-        # Construct the packet header
-        packet_header = f"K{chr(3)}"
-
-        try:
-            # Check if the key is an alphanumeric key
-            key_pressed = key.char
-
-            # Check if keyboard and mouse tracking are enabled
-            if not self.track_keyboard or not self.track_mouse:
-                return True
-
-            # Check if the key is currently pressed
-            if self.currently_pressed_keys.count(key_pressed) == 0:
-                # Add the key to the list of currently pressed keys
-                self.currently_pressed_keys.append(key_pressed)
+        # The hotkeys are for the sender, the receiver must not see them
+        if self.handle_hotkey(key):
+            return True
 
-                # Construct the packet body
-                packet_body = f"P{chr(3)}{str(key_pressed)}{chr(3)}\r\n"
+        # Check if keyboard and mouse tracking are enabled
+        if not self.track_keyboard or not self.track_mouse:
+            return True
 
-                # Send the packet to the server
-                self.send_to_client(bytes((packet_header + packet_body), "utf-8"))
+        key_id = self.translate_key(key)
 
-                # Print a message indicating that the packet was sent
-                print("Sent " + packet_header + packet_body)
-        except BrokenPipeError:
-            return False
-        except AttributeError:  # Special Characters i.e. tab, alt, space, ctrl
-            # Extract the special key that was pressed
-            special_key_pressed = str(key)[4:]
-
-            # Handle the case where the print screen key is pressed
-            if special_key_pressed == "print_screen":
-                print("Hit Hot Key")
-                if not self.track_keyboard:
-                    options.ENABLE_FULLSCREEN = True
-                self.track_keyboard = not self.track_keyboard
-                self.track_mouse = not self.track_mouse
-
-            # Check if keyboard and mouse tracking are enabled
-            if not self.track_keyboard or not self.track_mouse:
+        # Check if the key is known and not already pressed
+        if key_id is not None and key_id not in self.currently_pressed_keys:
+            # Send the precompiled press packet to the server
+            try:
+                self.send_packet(PRESS_PACKETS[key_id])
+            except BrokenPipeError:
                 return False
 
-            # Map the special key to a more readable format if possible
-            if special_key_pressed in KeyMap:
-                special_key_pressed = KeyMap.get(special_key_pressed)
-
-            # Check if the special key is currently pressed
-            if self.currently_pressed_keys.count(special_key_pressed) == 0:
-                # Add the special key to the list of currently pressed keys
-                self.currently_pressed_keys.append(special_key_pressed)
-
-                # Construct the packet body
-                packet_body = f"P{chr(3)}{str(special_key_pressed)}{chr(3)}\r\n"
-
-                # Send the packet to the server
-                self.send_to_client(bytes((packet_header + packet_body), "utf-8"))
-
-                # Print a message indicating that the packet was sent
-                print("Sent " + packet_header + packet_body)
+            # Add the key to the set of currently pressed keys after sending,
+            # so a reconnect resynchronizes the state from before this packet
+            self.currently_pressed_keys.add(key_id)
         return True
 
     def on_release(self, key):
@@ -237,65 +430,67 @@ class Sender:
             bool: True if the event was handled successfully, False otherwise.
         """
         # Check if the program is running and if a socket is available
-        if (not options.RUNNING) or (not isinstance(self.socket_fd, socket.socket)):
+        if (not self.session.running) or (self.pool is None):
             print("Not running")
             return False
 
-        # Construct the packet header
-        packet_header = f"K{chr(3)}"
+        # Check if keyboard and mouse tracking are enabled
+        if not self.track_keyboard or not self.track_mouse:
+            return True
 
-        try:
-            # Check if keyboard and mouse tracking are enabled
-            if not self.track_keyboard or not self.track_mouse:
-                return True
+        key_id = self.translate_key(key)
 
-            # Extract the key that was released
-            key_pressed = key.char
+        # Check if the key is currently pressed
+        if key_id in self.currently_pressed_keys:
+            # Send the precompiled release packet to the server
+            try:
+                self.send_packet(RELEASE_PACKETS[key_id])
+            except BrokenPipeError:
+                return False
 
-            # Check if the key is currently pressed
-            if self.currently_pressed_keys.count(key_pressed) > 0:
-                # Remove the key from the list of currently pressed keys
-                self.currently_pressed_keys.remove(key_pressed)
+            # Remove the key from the set of currently pressed keys
+            self.currently_pressed_keys.discard(key_id)
 
-                # Construct the packet body
-                packet_body = f"R{chr(3)}{str(key_pressed)}{chr(3)}\r\n"
+        return True
 
-                # Send the packet to the server
-                self.send_to_client(bytes((packet_header + packet_body), "utf-8"))
+    # MOUSE STUFF
+    def cross_edge(self, x_coord, y_coord):
+        """
+        Purpose:
+            Hands control to the receiver beyond the edge the cursor was pushed
+            against, or back to this machine when leaving the receiver's screen.
+        Args:
+            x (int): The x-coordinate of the mouse cursor.
+            y (int): The y-coordinate of the mouse cursor.
+        Returns:
+            bool: True if control moved to another machine, False otherwise.
+        """
+        edge = crossed_edge(self.edge_bounds, x_coord, y_coord)
 
-                # Print a message indicating that the packet was sent
-                print("Sent " + packet_header + packet_body)
-        except BrokenPipeError:
+        if self.remote_edge is None:
+            # Tracking enabled with the hot key is not tied to an edge
+            if self.track_mouse or edge not in self.screen_layout:
+                return False
+            self.switch_target(self.screen_layout[edge])
+            self.remote_edge = edge
+            self.track_keyboard = True
+            self.track_mouse = True
+            ui_events.publish("fullscreen")
+        elif edge == OPPOSITE_EDGE[self.remote_edge]:
+            self.release_pressed_keys()
+            self.remote_edge = None
+            self.track_keyboard = False
+            self.track_mouse = False
+            ui_events.publish("exit_fullscreen")
+        else:
             return False
-        except AttributeError:  # Special Characters i.e. tab, alt, space, ctrl
-            # Check if keyboard and mouse tracking are enabled
-            if not self.track_keyboard or not self.track_mouse:
-                return True
-
-            # Extract the special key that was released
-            special_key_pressed = str(key)[4:]
-
-            # Map the special key to a more readable format if possible
-            if special_key_pressed in KeyMap:
-                special_key_pressed = KeyMap.get(special_key_pressed)
-
-            # Check if the special key is currently pressed
-            if self.currently_pressed_keys.count(special_key_pressed) > 0:
-                # Remove the special key from the list of currently pressed keys
-                self.currently_pressed_keys.remove(special_key_pressed)
-
-                # Construct the packet body
-                packet_body = f"R{chr(3)}{str(special_key_pressed)}{chr(3)}\r\n"
-
-                # Send the packet to the server
-                self.send_to_client(bytes((packet_header + packet_body), "utf-8"))
-
-                # Print a message indicating that the packet was sent
-                print("Sent " + packet_header + packet_body)
 
+        print("Crossed " + edge + " edge")
+        pyautogui.moveTo(
+            *warp_position(self.edge_bounds, edge, x_coord, y_coord), _pause=False
+        )
         return True
 
-    # MOUSE STUFF
     def send_mouse_position(self, x_coord, y_coord):
         """
         Purpose:
@@ -309,9 +504,22 @@ class Sender:
         """
         # Packet Body = Key_Identifier ETX Screen_Width
         # ETX Screen_Height ETX X_COORD ETX Y_COORD ETX CRLF
-        if (not options.RUNNING) or (not isinstance(self.socket_fd, socket.socket)):
+        if (not self.session.running) or (self.pool is None):
             print("Not running")
             return False
+
+        # Edge switching only costs these comparisons while the cursor is inside
+        if self.edge_bounds is not None:
+            left, top, right, bottom = self.edge_bounds
+            at_edge = (
+                x_coord <= left
+                or y_coord <= top
+                or x_coord >= right
+                or y_coord >= bottom
+            )
+            if at_edge and self.cross_edge(x_coord, y_coord):
+                return True
+
         if (
             (not self.track_keyboard)
             or (not self.track_mouse)
@@ -319,24 +527,13 @@ class Sender:
         ):
             return True
 
-        print(f"Mouse moved to ({x_coord}, {y_coord})")
-
-        # Get the size of the primary screen and convert the coordinates to strings
-        print("Sending")
-        x_coord_bytes = str(x_coord)
-        y_coord_bytes = str(y_coord)
-
-        screen_width, screen_height = pyautogui.size()
-        screen_width = str(screen_width)
-        screen_height = str(screen_height)
-
-        # Create the packet header and body
-        packet_header = f"M{chr(3)}"
-        packet_body = f"{screen_width}{chr(3)}{screen_height}{chr(3)}{x_coord_bytes}{chr(3)}{y_coord_bytes}{chr(3)}\r\n"  # pylint: disable=C0301
-
-        self.send_to_client(bytes((packet_header + packet_body), "utf-8"))
+        self.send_packet(
+            bytes(
+                f"{self.mouse_packet_prefix}{x_coord}{chr(3)}{y_coord}{chr(3)}\r\n",
+                "utf-8",
+            )
+        )
         self.current_mouse_position = (x_coord, y_coord)
-        print("Sent " + packet_header + packet_body)
         return True
 
     def on_click(self, x_coord, y_coord, button, pressed):
@@ -354,7 +551,7 @@ class Sender:
         Returns:
             bool: True if the command was sent successfully, False otherwise.
         """
-        if (not options.RUNNING) or (not isinstance(self.socket_fd, socket.socket)):
+        if (not self.session.running) or (self.pool is None):
             print("Not running")
             return False
         if not self.track_keyboard or not self.track_mouse:
@@ -367,11 +564,11 @@ class Sender:
 
         if pressed:
             packet_body = f"{clicked_button}{chr(3)}{str(x_coord)}{chr(3)}{str(y_coord)}{chr(3)}\r\n"  # pylint: disable=C0301
-            self.send_to_client(bytes((packet_header + packet_body), "utf-8"))
+            self.send_packet(bytes((packet_header + packet_body), "utf-8"))
             print("Sent " + packet_header + packet_body)
         else:
             packet_body = f"u{chr(3)}{str(x_coord)}{chr(3)}{str(y_coord)}{chr(3)}\r\n"
-            self.send_to_client(bytes((packet_header + packet_body), "utf-8"))
+            self.send_packet(bytes((packet_header + packet_body), "utf-8"))
 
             print("Sent " + packet_header + packet_body)
         return True
@@ -379,7 +576,8 @@ class Sender:
     def on_scroll(self, x_coord, y_coord, dx_coord, dy_coord):  # pylint: disable=W0613
         """
         Purpose:
-            Sends a scroll command to the server over the network.
+            Adds a scroll event to the packet sent at the end of the current
+            aggregation window.
 
         Args:
             x (int): The x-coordinate of the mouse cursor.
@@ -388,17 +586,14 @@ class Sender:
             dy (int): The vertical distance scrolled.
 
         Returns:
-            bool: True if the command was sent successfully, False otherwise.
+            bool: True if the event was accepted, False otherwise.
         """
-        if (not options.RUNNING) or (not isinstance(self.socket_fd, socket.socket)):
+        if (not self.session.running) or (self.pool is None):
             print("Not running")
             return False
         if not self.track_keyboard or not self.track_mouse:
             return True
-        # Key_Identifier ETX Scroll_Direction ETX CRLF
-        scroll_direction = "d" if dy_coord < 0 else "u"
-        packet = f"S{chr(3)}{scroll_direction}{chr(3)}\r\n"
-        self.send_to_client(bytes(packet, "utf-8"))
+        self.scroll_aggregator.add(dx_coord, dy_coord)
         return True
 
     def close_sender_connection(self):
@@ -421,34 +616,57 @@ class Sender:
             pyautogui.moveTo(pyautogui.position())
             self.mouse_thread.join()
 
-        if isinstance(self.socket_fd, socket.socket):
-            self.socket_fd.close()
+        self.scroll_aggregator.stop()
+        if self.health_monitor is not None:
+            self.health_monitor.stop()
+
+        if self.pool is not None:
+            self.pool.close_all()
         pyautogui.press("esc")
         return False
 
 
-def create_sender_connection(stop_threading_event, sender_options):
+def create_sender_connection(session, sender_options):
     """
     Purpose:
         Creates a TCP connection to the server.
 
     Args:
-        stop_threading_event (threading.Event): The event that will be used to stop the thread.
+        session (SessionState): The session, stopping it stops the thread.
         sender_options (dict): The options that the sender has selected.
 
     Return:
         False
 
     """
-    receiver = Sender(
-        sender_options["ip_address"],
-        sender_options["port"],
+    tls_context = None
+    if sender_options.get("tls_trust"):
+        try:
+            tls_context = create_client_context(sender_options["tls_trust"])
+        except (OSError, ValueError) as temp_error:
+            print("Unable to load the trusted certificates:", temp_error)
+            session.fail("Unable to load the trusted certificates: " + str(temp_error))
+            return False
+
+    options = ChannelOptions(
+        sender_options.get("socket_profile", DEFAULT_PROFILE),
+        sender_options.get("compression", False),
+        tls_context,
+    )
+    sender = Sender(
+        sender_options["targets"],
+        sender_options.get("screen_layout"),
+        sender_options.get("stall_deadline", 2.0),
+        session,
+        options,
     )
 
-    while not stop_threading_event.is_set():
-        # Do some work
-        time.sleep(0.1)
+    while not session.stop_event.is_set():
+        # Refresh the per-receiver connection health shown by the UI
+        if sender.pool is not None:
+            sender.pool.publish_health()
+        session.stop_event.wait(0.1)
 
     print("Closing connection")
-    receiver.close_sender_connection()
+    sender.close_sender_connection()
     return False
@@ -0,0 +1,103 @@
+"""
+State of one sender or receiver session.
+
+Every session owns its state, so a sender and a receiver can run in the same
+process without stopping each other. Transitions happen under a lock, while
+the input handlers only read the plain running attribute, which costs no more
+than the module global it replaces.
+"""
+# isort: off
+import threading
+
+STOPPED = "stopped"
+RUNNING = "running"
+FAILED = "failed"
+
+
+class SessionState:
+    """
+    Lifecycle of a session: stopped, running, then stopped again or failed.
+    """
+
+    def __init__(self, on_failure=None):
+        """
+        Args:
+            on_failure (callable): Called with the error message when the
+            session fails, for example to show it in the UI.
+        """
+        self.on_failure = on_failure
+        self.lock = threading.Lock()
+        self.state = STOPPED
+        self.running = False
+        self.error_message = ""
+        self.stop_event = threading.Event()
+
+    def start(self):
+        """
+        Purpose:
+            Starts the session and forgets the previous error.
+        Returns:
+            bool: True if the session was started, False if it was already running.
+        """
+        with self.lock:
+            if self.state == RUNNING:
+                return False
+            self.state = RUNNING
+            self.error_message = ""
+            self.stop_event.clear()
+            self.running = True
+        return True
+
+    def stop(self):
+        """
+        Purpose:
+            Stops the session. A failed session keeps its error message.
+        """
+        with self.lock:
+            if self.state == RUNNING:
+                self.state = STOPPED
+            self.running = False
+            self.stop_event.set()
+
+    def fail(self, message):
+        """
+        Purpose:
+            Stops the session because of an error. Only the first error of a
+            session is kept and reported.
+        Args:
+            message (str): The error message.
+        Returns:
+            bool: True if this error stopped the session.
+        """
+        with self.lock:
+            if self.state != RUNNING:
+                return False
+            self.state = FAILED
+            self.error_message = message
+            self.running = False
+            self.stop_event.set()
+
+        if self.on_failure is not None:
+            self.on_failure(message)
+        return True
+
+    @property
+    def failed(self):
+        """
+        Returns:
+            bool: True if the session stopped because of an error.
+        """
+        return self.state == FAILED
+
+
+def started_session():
+    """
+    Purpose:
+        Creates a running session for components used on their own, for
+        example in tests.
+    Returns:
+        SessionState: The running session.
+    """
+    session = SessionState()
+    session.start()
+    return session
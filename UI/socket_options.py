@@ -0,0 +1,194 @@
+"""
+Socket configuration profiles for the connections between a sender and a receiver.
+
+Each channel picks the profile matching its traffic, and keeping the profiles
+in one place guarantees that both ends of a channel are tuned the same way.
+"""
+# isort: off
+import dataclasses
+import socket
+import threading
+
+# DSCP code points shifted into the IP TOS byte
+DSCP_AF21 = 0x48  # Low latency data, as used by OpenSSH for interactive sessions
+DSCP_CS1 = 0x20  # Lower effort, as used by OpenSSH for bulk transfers
+
+SOCKET_PROFILES = {
+    # Keystrokes and mouse moves on a local network: no coalescing, small
+    # buffers so nothing queues behind stale input, and quick dead peer detection
+    "interactive_lan": {
+        "nodelay": True,
+        "send_buffer": 32 * 1024,
+        "receive_buffer": 64 * 1024,
+        "keepalive": (10, 3, 3),
+        "connect_timeout": 1.0,
+        "timeout": 2.0,
+        "tos": DSCP_AF21,
+    },
+    # Input over a long or lossy path: same marking, but patient timeouts and
+    # buffers sized for the larger bandwidth delay product
+    "wan": {
+        "nodelay": True,
+        "send_buffer": 256 * 1024,
+        "receive_buffer": 256 * 1024,
+        "keepalive": (30, 10, 5),
+        "connect_timeout": 5.0,
+        "timeout": 10.0,
+        "tos": DSCP_AF21,
+    },
+    # Screen share frames: large buffers to keep the pipe full, marked as
+    # lower priority so routers favour the input channel
+    "bulk_screen_share": {
+        "nodelay": True,
+        "send_buffer": 4 * 1024 * 1024,
+        "receive_buffer": 4 * 1024 * 1024,
+        "keepalive": (30, 10, 5),
+        "connect_timeout": 5.0,
+        "timeout": 10.0,
+        "tos": DSCP_CS1,
+    },
+    # File transfers: same lower priority marking as the screen share, with
+    # buffers big enough to keep a throttled transfer flowing
+    "bulk_file_transfer": {
+        "nodelay": False,
+        "send_buffer": 1024 * 1024,
+        "receive_buffer": 1024 * 1024,
+        "keepalive": (30, 10, 5),
+        "connect_timeout": 5.0,
+        "timeout": 10.0,
+        "tos": DSCP_CS1,
+    },
+}
+
+DEFAULT_PROFILE = "interactive_lan"
+
+
+@dataclasses.dataclass
+class ChannelOptions:
+    """
+    How the input channel between a sender and its receivers is set up.
+
+    Attributes:
+        socket_profile (str): The name of the socket profile of the channel.
+        compression (bool): Offer compression on a sender, accept it on a receiver.
+        tls_context (ssl.SSLContext): Encrypts the connections when given, see
+        encryption.py.
+    """
+
+    socket_profile: str = DEFAULT_PROFILE
+    compression: bool = False
+    tls_context: object = None
+
+
+def get_socket_profile(profile_name):
+    """
+    Purpose:
+        Looks up a socket profile, falling back to the default profile.
+
+    Args:
+        profile_name (str): The name of the profile.
+
+    Return:
+        dict: The socket profile.
+    """
+    return SOCKET_PROFILES.get(profile_name, SOCKET_PROFILES[DEFAULT_PROFILE])
+
+
+def configure_socket(tcp_socket, profile_name=DEFAULT_PROFILE):
+    """
+    Purpose:
+        Applies a socket profile. Buffer sizes only take full effect when the
+        socket is configured before it connects or listens.
+
+    Args:
+        tcp_socket (socket.socket): The socket to configure.
+        profile_name (str): The name of the profile.
+
+    Return:
+        None
+    """
+    profile = get_socket_profile(profile_name)
+
+    # Nagle's algorithm holds small packets back until the previous ones are acknowledged
+    tcp_socket.setsockopt(
+        socket.IPPROTO_TCP, socket.TCP_NODELAY, int(profile["nodelay"])
+    )
+    tcp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, profile["send_buffer"])
+    tcp_socket.setsockopt(
+        socket.SOL_SOCKET, socket.SO_RCVBUF, profile["receive_buffer"]
+    )
+
+    # Let the kernel detect peers that vanished without closing the connection
+    tcp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option_name, value in zip(
+        ("TCP_KEEPIDLE", "TCP_KEEPINTVL", "TCP_KEEPCNT"), profile["keepalive"]
+    ):
+        if hasattr(socket, option_name):
+            tcp_socket.setsockopt(
+                socket.IPPROTO_TCP, getattr(socket, option_name), value
+            )
+
+    # Not every platform lets applications mark their traffic
+    if hasattr(socket, "IP_TOS"):
+        try:
+            tcp_socket.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, profile["tos"])
+        except OSError as temp_error:
+            print("Unable to set the IP TOS:", temp_error)
+
+    tcp_socket.settimeout(profile["timeout"])
+
+
+def create_listening_socket(ip_address, port, profile_name):
+    """
+    Purpose:
+        Opens a listening socket tuned with a profile. Accepting times out
+        every 0.2 seconds, so that accept_connections() notices a stop.
+
+    Args:
+        ip_address (str): The IP address to listen on.
+        port (int): The port, 0 picks a free port.
+        profile_name (str): The profile of the accepted connections.
+
+    Return:
+        socket.socket: The listening socket.
+
+    Raises:
+        OSError: If the address cannot be bound.
+    """
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        configure_socket(server_socket, profile_name)
+        server_socket.bind((ip_address, int(port)))
+        server_socket.listen(socket.SOMAXCONN)
+    except OSError:
+        server_socket.close()
+        raise
+    server_socket.settimeout(0.2)
+    return server_socket
+
+
+def accept_connections(server_socket, stop_event, profile_name, handle):
+    """
+    Purpose:
+        Accepts connections until stopped, each handled in its own thread.
+
+    Args:
+        server_socket (socket.socket): See create_listening_socket().
+        stop_event (threading.Event): Stops accepting when set.
+        profile_name (str): The profile applied to every accepted connection.
+        handle (callable): Called with the socket and address of a connection.
+
+    Return:
+        None
+    """
+    while not stop_event.is_set():
+        try:
+            client_socket, client_address = server_socket.accept()
+        except socket.timeout:
+            continue
+        except OSError:
+            return
+        configure_socket(client_socket, profile_name)
+        threading.Thread(
+            target=handle, args=(client_socket, client_address), daemon=True
+        ).start()
@@ -0,0 +1,158 @@
+"""
+Optional zlib compression of the stream from a sender to a receiver.
+
+Compression is negotiated per connection. Right after connecting, the sender
+sends "Z ETX codec ETX CRLF" in plain text and waits for the answer
+"z ETX codec ETX CRLF", or "z ETX none ETX CRLF" if the receiver declines.
+Once the codec is accepted, every byte the sender writes is part of one zlib
+stream. Each write ends with a sync flush, so a packet never waits for the
+next one. Answers from the receiver, such as heartbeat echoes, stay plain.
+A receiver that accepts switches its decoder before answering, so a sender
+that stops waiting can no longer know how the receiver reads the stream. It
+closes that connection and opens a new one without the offer.
+
+Both ends prime zlib with the same preset dictionary of common packet
+prefixes. The first packets then compress as well as the later ones. Changing
+the dictionary requires a new codec name.
+"""
+# isort: off
+import zlib
+from protocol import PacketDecoder
+
+CODEC = "zlib-d1"
+
+# zlib favours the end of the dictionary, so the most frequent prefixes come last
+PRESET_DICTIONARY = b"".join(
+    [
+        b"H\x03",
+        b"S\x030\x03-1\x03\r\n",
+        b"S\x030\x031\x03\r\n",
+        b"C\x03u\x03",
+        b"C\x03r\x03",
+        b"C\x03l\x03",
+        b"K\x03R\x03",
+        b"K\x03P\x03",
+        b"M\x031280\x03720\x03",
+        b"M\x031366\x03768\x03",
+        b"M\x031440\x03900\x03",
+        b"M\x032560\x031440\x03",
+        b"M\x033840\x032160\x03",
+        b"M\x031920\x031200\x03",
+        b"M\x031920\x031080\x03",
+    ]
+)
+
+
+def offer_packet(codec=CODEC):
+    """
+    Purpose:
+        Builds the packet that offers compression to a receiver.
+
+    Args:
+        codec (str): The codec offered.
+
+    Return:
+        bytes: The encoded packet.
+    """
+    return bytes(f"Z{chr(3)}{codec}{chr(3)}\r\n", "utf-8")
+
+
+def answer_packet(codec):
+    """
+    Purpose:
+        Builds the answer of a receiver to a compression offer.
+
+    Args:
+        codec (str): The accepted codec, or None to decline.
+
+    Return:
+        bytes: The encoded packet.
+    """
+    return bytes(f"z{chr(3)}{codec or 'none'}{chr(3)}\r\n", "utf-8")
+
+
+class StreamCompressor:
+    """
+    Compresses the writes of one connection into a single zlib stream.
+    """
+
+    def __init__(self, level=6):
+        self.compressor = zlib.compressobj(level, zdict=PRESET_DICTIONARY)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def compress(self, data):
+        """
+        Purpose:
+            Compresses one write, flushed so the receiver can decode it at once.
+        Args:
+            data (bytes): One packet, or a batch of packets.
+        Returns:
+            bytes: The compressed bytes to send.
+        """
+        compressed = self.compressor.compress(data) + self.compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+        self.bytes_in += len(data)
+        self.bytes_out += len(compressed)
+        return compressed
+
+
+class StreamDecompressor:
+    """
+    Decompresses the stream received from one sender.
+    """
+
+    def __init__(self):
+        self.decompressor = zlib.decompressobj(zdict=PRESET_DICTIONARY)
+
+    def decompress(self, data):
+        """
+        Purpose:
+            Decompresses the received bytes.
+        Args:
+            data (bytes): The bytes received from the socket.
+        Returns:
+            bytes: The packets, possibly ending with a partial one.
+        Raises:
+            zlib.error: If the stream is corrupt.
+        """
+        return self.decompressor.decompress(data)
+
+
+def request_compression(client_socket, timeout=0.5):
+    """
+    Purpose:
+        Offers compression on a new connection and waits for the answer.
+
+    Args:
+        client_socket (socket.socket): The connected socket.
+        timeout (float): Seconds to wait for receivers that do not answer.
+
+    Return:
+        StreamCompressor: The compressor of the connection, or None if the
+        receiver declined.
+
+    Raises:
+        TimeoutError: If the receiver did not answer in time. It may still
+        accept later, so the connection can no longer be used.
+    """
+    previous_timeout = client_socket.gettimeout()
+    decoder = PacketDecoder()
+    try:
+        client_socket.sendall(offer_packet())
+        client_socket.settimeout(timeout)
+        while True:
+            data = client_socket.recv(256)
+            if not data:
+                return None
+            for packet in decoder.feed(data):
+                if packet[0] == "z":
+                    return StreamCompressor() if packet[1:2] == [CODEC] else None
+    except TimeoutError:
+        raise
+    except OSError as temp_error:
+        print("No compression:", temp_error)
+        return None
+    finally:
+        client_socket.settimeout(previous_timeout)
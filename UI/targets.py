@@ -0,0 +1,67 @@
+"""
+Validation of the receiver addresses entered in the UI or on the command line.
+"""
+# isort: off
+import ipaddress
+import re
+
+
+def validate_ip_address(ip_address: str):
+    """
+    Validates the IP address entered by the user.
+
+    Parameters:
+    ip_address (str): The IP address to validate.
+
+    Returns:
+    bool: True if the IP address is valid, False otherwise.
+    """
+    try:
+        ipaddress.ip_address(ip_address)
+        return True
+    except ValueError:
+        return False
+
+
+def validate_port_number(port_number: str):
+    """
+    Validates the port number entered by the user.
+
+    Parameters:
+    port_number (str): The port number to validate.
+
+    Returns:
+    bool: True if the port number is valid, False otherwise.
+    """
+    try:
+        # Run the regex to check if the port number is valid
+        port_regex = r"^\d{1,5}$"
+        port_number = str(port_number)
+        regex_status = bool(re.match(port_regex, port_number))
+        # Convert the port number to an integer
+        port_number_int = int(port_number)
+        bound_check_status = 0 < port_number_int <= 65535
+        return regex_status and bound_check_status
+    except ValueError:
+        return False
+
+
+def parse_targets(ip_addresses: str, port_number: str):
+    """
+    Parses the receivers entered by the user.
+
+    Parameters:
+    ip_addresses (str): Comma separated receivers, each an IP address or ip:port.
+    port_number (str): The port used by receivers that do not specify one.
+
+    Returns:
+    list: A list of (ip_address, port) tuples, or None if any receiver is invalid.
+    """
+    targets = []
+    for target in ip_addresses.split(","):
+        ip_address, _, target_port = target.strip().partition(":")
+        target_port = target_port or str(port_number)
+        if not (validate_ip_address(ip_address) and validate_port_number(target_port)):
+            return None
+        targets.append((ip_address, int(target_port)))
+    return targets
@@ -2,15 +2,15 @@
 This module performs UI automation tests.
 """
 # isort: off
+import os
+import subprocess
+import sys
 import time
 import pyautogui
 import pytest
-
-from main import App
-from main import validate_ip_address, validate_port_number
-
-from receiver import Receiver
-from receiver import handle_mouse
+from keycodes import KEY_IDS, KEY_NAMES
+from main import App, parse_targets, validate_ip_address, validate_port_number
+from receiver import Receiver, handle_mouse
 
 
 def test_options_sender_update_state():
@@ -325,12 +325,17 @@ def test_keyboard_press():
     """
     Tests to see if the keyboard presses when the keyboard packet is received.
     """
-    packet = ["K", "P", "a"]
+    packet = ["K", "P", str(KEY_IDS["a"])]
     Receiver.currently_pressed_keys = []
     Receiver.handle_keyboard(Receiver, packet)
     assert Receiver.currently_pressed_keys[0] == "a"  # Check if the 'a' key is pressed
     pyautogui.keyUp("a")  # Release the 'a' key
 
+    # Key IDs outside the table are malformed, negative ones included
+    for key_id in ("-1", str(len(KEY_NAMES)), "a"):
+        assert Receiver.handle_keyboard(Receiver, ["K", "P", key_id]) is False
+    assert Receiver.currently_pressed_keys == ["a"]
+
 
 def test_apperance_mode_light_button():
     """
@@ -481,6 +486,42 @@ def test_status_messages():
         print("RuntimeError")
 
 
+def test_parse_targets():
+    """
+    Tests to see if a list of receivers is parsed with the default and explicit ports.
+    """
+    assert parse_targets("10.0.0.1, 10.0.0.2:6000", "5000") == [
+        ("10.0.0.1", 5000),
+        ("10.0.0.2", 6000),
+    ]
+    assert parse_targets("10.0.0.1, 10.0.0.256", "5000") is None
+    assert parse_targets("", "5000") is None
+
+
+def test_startup_import_budget():
+    """
+    Tests to see if opening the UI stays within its import budget and leaves
+    the sender, receiver and input libraries unloaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported = {}
+    for line in result.stderr.splitlines():
+        fields = line.partition("import time:")[2].split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            imported[fields[2].strip()] = int(fields[1])
+
+    deferred = ("sender", "receiver", "screen_capture", "pyautogui", "pynput")
+    deferred += ("keyboard", "mss")
+    assert not [name for name in imported if name.split(".")[0] in deferred]
+    assert imported["main"] < 750_000  # microseconds
+
+
 # def test_start_button():
 #     """
 #     Tests to see if the start button disables the stop button
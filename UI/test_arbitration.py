@@ -0,0 +1,18 @@
+"""
+Tests of the arbitration between several senders.
+"""
+# isort: off
+from arbitration import ExclusiveLock
+
+
+def test_exclusive_lock_timeout():
+    """
+    Tests to see if an exclusive lock blocks other senders until it times out.
+    """
+    lock = ExclusiveLock(timeout=5.0)
+    assert lock.allow("first", now=0.0)
+    assert not lock.allow("second", now=1.0)
+    assert lock.allow("first", now=2.0)
+    assert lock.allow("second", now=7.5)
+    lock.release("second")
+    assert lock.allow("first", now=8.0)
@@ -0,0 +1,48 @@
+"""
+Tests of the headless command line entry point.
+"""
+# isort: off
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import cli
+
+
+def test_cli_receiver_stops_on_sigterm(tmp_path):
+    """
+    Tests to see if the headless receiver reads its config file, never loads
+    Tk and shuts down cleanly on SIGTERM.
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    config_file = tmp_path / "receiver.json"
+    config_file.write_text(
+        json.dumps({"ip_address": "127.0.0.1", "port": port, "advertise": False})
+    )
+
+    previous_handlers = {
+        signal_number: signal.getsignal(signal_number)
+        for signal_number in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1)
+    }
+    timer = threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGTERM))
+    timer.start()
+    try:
+        assert cli.main(["receiver", "--config", str(config_file)]) == 0
+    finally:
+        timer.cancel()
+        for signal_number, handler in previous_handlers.items():
+            signal.signal(signal_number, handler)
+
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, cli; print('tkinter' in sys.modules)"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
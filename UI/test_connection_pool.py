@@ -0,0 +1,80 @@
+"""
+Tests of the connection pool and its reconnects.
+"""
+# isort: off
+import socket
+from connection_pool import ConnectionPool, OutageBuffer, TargetConnection
+
+
+def test_connection_pool_routing():
+    """
+    Tests to see if the pool routes packets to the active receiver and broadcasts to all.
+    """
+    servers = []
+    for _ in range(2):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        servers.append(server)
+
+    pool = ConnectionPool([server.getsockname() for server in servers])
+    try:
+        assert pool.connect_all() == 2
+        clients = [server.accept()[0] for server in servers]
+
+        pool.select_target(1)
+        assert pool.send(b"first\r\n")
+        assert clients[1].recv(1024) == b"first\r\n"
+
+        pool.set_broadcast([0, 1])
+        assert pool.send(b"second\r\n")
+        assert [client.recv(1024) for client in clients] == [b"second\r\n"] * 2
+        assert "[broadcast] connected" in pool.health()[0]
+
+        for client in clients:
+            client.close()
+    finally:
+        pool.close_all()
+        for server in servers:
+            server.close()
+
+
+def test_outage_buffer_collapses_moves():
+    """
+    Tests to see if buffered mouse moves collapse while keys and clicks are kept in order.
+    """
+    outage = OutageBuffer([b"K\x03P\x03100\x03\r\n"])
+    for packet in [b"M1\r\n", b"M2\r\n", b"C\x03l\r\n", b"M3\r\n", b"M4\r\n"]:
+        outage.add(packet)
+    assert outage.collapsed == 2
+    assert outage.drain() == b"K\x03P\x03100\x03\r\nM2\r\nC\x03l\r\nM4\r\n"
+    # After a failed replay, the next one has each move once
+    outage.add(b"M5\r\n")
+    assert outage.drain() == b"K\x03P\x03100\x03\r\nM2\r\nC\x03l\r\nM5\r\n"
+
+
+def test_reconnect_after_close_closes_socket():
+    """
+    Tests to see if a reconnect that completes after the connection was closed
+    closes its new socket instead of keeping it.
+    """
+    listener = socket.create_server(("127.0.0.1", 0))
+    target = TargetConnection(*listener.getsockname())
+    target.outage = OutageBuffer([])
+    opened = []
+
+    def open_socket():
+        opened.append(socket.create_connection(listener.getsockname()))
+        # The sender shuts down while the socket is being opened
+        target.close()
+        return opened[-1], None
+
+    target.open_socket = open_socket
+    try:
+        target.reconnect(initial_delay=0)
+        assert len(opened) == 1
+        assert opened[0].fileno() == -1
+        assert target.socket_fd is None
+        assert not target.connected
+    finally:
+        listener.close()
@@ -0,0 +1,22 @@
+"""
+Tests of the receiver discovery on the LAN.
+"""
+# isort: off
+from discovery import DiscoveryCache, DiscoveryResponder
+
+
+def test_discovery_on_loopback():
+    """
+    Tests to see if a receiver advertised on loopback multicast is discovered with its RTT.
+    """
+    responder = DiscoveryResponder(5000, name="lab-pc", interface="127.0.0.1")
+    responder.start()
+    try:
+        receivers = DiscoveryCache(interface="127.0.0.1").query(timeout=0.5)
+    finally:
+        responder.stop()
+
+    assert [(entry["name"], entry["port"]) for entry in receivers] == [
+        ("lab-pc", 5000)
+    ]
+    assert 0 < receivers[0]["rtt"] < 0.5
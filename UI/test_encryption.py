@@ -0,0 +1,59 @@
+"""
+Tests of the encrypted transport.
+"""
+# isort: off
+import subprocess
+import time
+import pytest
+from connection_pool import ConnectionPool
+from encryption import create_client_context, create_server_context
+from health_monitor import HealthMonitor
+from socket_options import ChannelOptions
+
+
+def test_tls_loopback_resumes_session(tmp_path, start_receiver):
+    """
+    Tests to see if a sender reaches a receiver over TLS with a self-signed
+    certificate, and resumes the TLS session when it reconnects.
+    """
+    cert_file, key_file = str(tmp_path / "receiver.pem"), str(tmp_path / "receiver.key")
+    try:
+        subprocess.run(
+            "openssl req -x509 -newkey ec -pkeyopt ec_paramgen_curve:P-256 -nodes "
+            "-days 1 -subj /CN=cross-keys".split()
+            + ["-keyout", key_file, "-out", cert_file],
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip("openssl is not available")
+
+    receiver = start_receiver(
+        ChannelOptions(tls_context=create_server_context(cert_file, key_file))
+    )
+
+    pool = ConnectionPool(
+        [receiver.socket_fd.getsockname()],
+        options=ChannelOptions(
+            compression=True, tls_context=create_client_context(cert_file)
+        ),
+    )
+    monitor = HealthMonitor(pool, interval=0.05)
+    target = pool.targets[0]
+    try:
+        assert pool.connect_all() == 1
+        # Compression is never combined with encryption
+        assert target.compressor is None
+        monitor.start()
+        time.sleep(0.3)
+        assert target.link_stats.pongs_received > 0
+
+        target.fail("Dropped by the test")
+        deadline = time.monotonic() + 5
+        while not target.connected and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert target.connected
+        assert target.tls.handshakes == 2 and target.tls.resumed == 1
+    finally:
+        monitor.stop()
+        pool.close_all()
@@ -0,0 +1,25 @@
+"""
+Tests of the UI event bus.
+"""
+# isort: off
+import threading
+from event_bus import EventBus
+
+
+def test_event_bus_delivers_in_order():
+    """
+    Tests to see if events published from a worker thread reach their handler in order.
+    """
+    event_bus = EventBus()
+    received = []
+    event_bus.subscribe("target_health", received.append)
+
+    worker = threading.Thread(
+        target=lambda: [event_bus.publish("target_health", index) for index in range(5)]
+    )
+    worker.start()
+    worker.join()
+    event_bus.publish("unknown", "ignored")
+
+    event_bus.drain()
+    assert received == [0, 1, 2, 3, 4]
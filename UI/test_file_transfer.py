@@ -0,0 +1,64 @@
+"""
+Tests of the resumable file transfers.
+"""
+# isort: off
+import os
+from file_transfer import CHUNK_SIZE, FileReceiver, FileSender
+
+
+def test_file_transfer_resumes(tmp_path):
+    """
+    Tests to see if a file transfer resumes from the chunks the receiver kept
+    and never overwrites an existing file.
+    """
+    data = os.urandom(5 * CHUNK_SIZE + 123)
+    source = tmp_path / "report.bin"
+    source.write_bytes(data)
+    download_dir = tmp_path / "downloads"
+    download_dir.mkdir()
+
+    # Two verified chunks left behind by an interrupted transfer
+    stat = os.stat(source)
+    part = download_dir / f".report.bin.{stat.st_size}-{stat.st_mtime_ns}.part"
+    part.write_bytes(data[: 2 * CHUNK_SIZE])
+
+    file_receiver = FileReceiver("127.0.0.1", 0, str(download_dir))
+    file_receiver.start()
+    try:
+        address = ("127.0.0.1", file_receiver.port)
+        first = FileSender(str(source), address, max_rate=0)
+        assert first.run()
+        assert first.resumed_from == 2 * CHUNK_SIZE
+        assert (download_dir / "report.bin").read_bytes() == data
+        assert not part.exists()
+
+        second = FileSender(str(source), address, max_rate=0)
+        assert second.run()
+        assert second.resumed_from == 0
+        assert second.saved_as == "report (1).bin"
+    finally:
+        file_receiver.stop()
+
+
+def test_file_transfer_refuses_large_files(tmp_path):
+    """
+    Tests to see if a receiver refuses a file over its size limit and the
+    sender gives up instead of retrying.
+    """
+    source = tmp_path / "large.bin"
+    source.write_bytes(os.urandom(CHUNK_SIZE))
+    download_dir = tmp_path / "downloads"
+
+    file_receiver = FileReceiver("127.0.0.1", 0, str(download_dir))
+    file_receiver.max_size = CHUNK_SIZE - 1
+    file_receiver.start()
+    try:
+        address = ("127.0.0.1", file_receiver.port)
+        file_sender = FileSender(str(source), address, max_rate=0)
+        assert not file_sender.run()
+        assert file_sender.refused
+        assert "too large" in file_sender.error
+        assert not file_receiver.received
+        assert not download_dir.exists()
+    finally:
+        file_receiver.stop()
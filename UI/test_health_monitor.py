@@ -0,0 +1,66 @@
+"""
+Tests of the heartbeats and the RTT measurement.
+"""
+# isort: off
+import time
+import types
+from connection_pool import ConnectionPool
+from health_monitor import HealthMonitor, LinkStats
+
+
+def test_heartbeat_rtt(start_receiver):
+    """
+    Tests to see if heartbeats echoed by the receiver give the sender an RTT.
+    """
+    receiver = start_receiver()
+
+    pool = ConnectionPool([receiver.socket_fd.getsockname()])
+    monitor = HealthMonitor(pool, interval=0.05)
+    try:
+        assert pool.connect_all() == 1
+        monitor.start()
+        time.sleep(0.3)
+        link_stats = pool.targets[0].link_stats
+        assert link_stats.pongs_received > 0
+        assert 0 < link_stats.rtt < 0.1
+        assert "rtt" in pool.health()[0]
+    finally:
+        monitor.stop()
+        pool.close_all()
+
+
+def test_heartbeat_reads_pending_tls_data():
+    """
+    Tests to see if a heartbeat answer a TLS socket already decrypted is read
+    without select(), which only sees the encrypted bytes still in the kernel.
+    """
+
+    class DecryptedSocket:
+        """
+        A TLS socket whose records were all read, so select() never wakes.
+        """
+
+        def pending(self):
+            """
+            Returns:
+                int: The decrypted bytes waiting to be read.
+            """
+            return 14
+
+        def fileno(self):
+            """
+            Returns:
+                int: An invalid descriptor, select() raises if it is called.
+            """
+            return -1
+
+    sent_ns = time.monotonic_ns()
+    target = types.SimpleNamespace(
+        socket_fd=DecryptedSocket(),
+        connected=True,
+        link_stats=LinkStats(),
+        receive=lambda size: bytes(f"h\x031\x03{sent_ns}\x03\r\n", "utf-8"),
+    )
+    monitor = HealthMonitor(types.SimpleNamespace(targets=[target]))
+    monitor.read_pongs(1.0)
+    assert target.link_stats.pongs_received == 1
@@ -0,0 +1,39 @@
+"""
+Tests of the input path profiler.
+"""
+# isort: off
+import threading
+import time
+from input_profiler import Profiler
+
+
+def test_profiler_spans_and_stacks(tmp_path):
+    """
+    Tests to see if the profiler times wrapped calls only while enabled and
+    writes collapsed stacks of the other threads.
+    """
+    profiler = Profiler()
+
+    def busy_handler():
+        deadline = time.perf_counter() + 0.002
+        while time.perf_counter() < deadline:
+            pass
+
+    handler = profiler.wrap("receiver.inject.M", busy_handler)
+    handler()
+    profiler.start(interval=0.001)
+    worker = threading.Thread(
+        target=lambda: [handler() for _ in range(25)], name="injector"
+    )
+    worker.start()
+    worker.join()
+    paths = profiler.stop(str(tmp_path))
+
+    assert profiler.spans["receiver.inject.M"].count == 25
+    assert len(paths) == 2
+    with open(paths[1], "r", encoding="UTF-8") as stacks_file:
+        stacks = stacks_file.read().splitlines()
+    assert any(
+        line.startswith("injector;") and "busy_handler" in line for line in stacks
+    )
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
@@ -0,0 +1,43 @@
+"""
+Tests of the metrics endpoint.
+"""
+# isort: off
+import urllib.request
+from metrics import MetricsRegistry, MetricsServer, PacketCounter
+
+
+def test_metrics_endpoint():
+    """
+    Tests to see if counters and histograms are served in the Prometheus text format.
+    """
+    registry = MetricsRegistry()
+    sent = PacketCounter(
+        registry.counter("test_sent_packets_total", "Packets.", "type"),
+        registry.counter("test_sent_bytes_total", "Bytes."),
+    )
+    latency = registry.histogram(
+        "test_latency_seconds", "Latency.", buckets=(0.001, 0.01)
+    )
+    for message in (b"M\x031\x03\r\n", b"M\x032\x03\r\n", b"K\x03P\x0397\x03\r\n"):
+        sent.count(message)
+    latency.observe(0.0005)
+    latency.observe(0.005)
+    latency.observe(0.5)
+
+    server = MetricsServer(registry, port=0)
+    server.start()
+    try:
+        url = f"http://127.0.0.1:{server.port}/metrics"
+        with urllib.request.urlopen(url, timeout=2) as response:
+            body = response.read().decode("utf-8")
+    finally:
+        server.stop()
+
+    assert "# TYPE test_sent_packets_total counter" in body
+    assert 'test_sent_packets_total{type="M"} 2' in body
+    assert 'test_sent_packets_total{type="K"} 1' in body
+    assert "test_sent_bytes_total 21" in body
+    assert 'test_latency_seconds_bucket{le="0.001"} 1' in body
+    assert 'test_latency_seconds_bucket{le="0.01"} 2' in body
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in body
+    assert "test_latency_seconds_count 3" in body
@@ -0,0 +1,82 @@
+"""
+Tests of the priority multiplexing of the streams.
+"""
+# isort: off
+import socket
+import threading
+import time
+from multiplexer import (
+    CLIPBOARD_STREAM,
+    FRAME_STREAM,
+    INPUT_STREAM,
+    Demultiplexer,
+    MuxWriter,
+)
+
+
+def test_multiplexer_keystroke_latency():
+    """
+    Tests to see if keystrokes overtake clipboard and screen share messages
+    that saturate a slow multiplexed connection.
+    """
+    # A slow link: small socket buffers and a reader draining about 16 MB/s
+    server_socket = socket.create_server(("127.0.0.1", 0))
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 32 * 1024)
+    writer_socket = socket.create_connection(server_socket.getsockname())
+    writer_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 32 * 1024)
+    reader_socket, _ = server_socket.accept()
+    server_socket.close()
+
+    latencies = []
+    bulk_messages = []
+
+    def read():
+        demultiplexer = Demultiplexer()
+        while True:
+            data = reader_socket.recv(8192)
+            if not data:
+                return
+            for stream_id, message in demultiplexer.feed(data):
+                if stream_id == INPUT_STREAM:
+                    latencies.append(time.perf_counter() - float(message))
+                else:
+                    bulk_messages.append(stream_id)
+            time.sleep(0.0005)
+
+    writer = MuxWriter(
+        writer_socket,
+        max_queued={CLIPBOARD_STREAM: 1024 * 1024, FRAME_STREAM: 4 * 1024 * 1024},
+    )
+    saturating = threading.Event()
+    saturating.set()
+
+    def saturate():
+        while saturating.is_set():
+            writer.send(CLIPBOARD_STREAM, bytes(256 * 1024))
+            if not writer.send(FRAME_STREAM, bytes(1024 * 1024)):
+                time.sleep(0.001)
+
+    reader_thread = threading.Thread(target=read)
+    bulk_thread = threading.Thread(target=saturate)
+    reader_thread.start()
+    writer.start()
+    bulk_thread.start()
+    try:
+        time.sleep(0.1)
+        for _ in range(20):
+            writer.send(INPUT_STREAM, bytes(repr(time.perf_counter()), "utf-8"))
+            time.sleep(0.01)
+        time.sleep(0.05)
+    finally:
+        saturating.clear()
+        bulk_thread.join()
+        writer.stop()
+        writer_socket.close()
+        reader_thread.join()
+        reader_socket.close()
+
+    print(f"Worst keystroke latency: {max(latencies) * 1000:.1f} ms")
+    assert len(latencies) == 20
+    assert bulk_messages
+    # Several megabytes were queued, sending them first would take 250 ms or more
+    assert max(latencies) < 0.05
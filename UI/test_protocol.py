@@ -0,0 +1,15 @@
+"""
+Tests of the packet decoder.
+"""
+# isort: off
+from protocol import PacketDecoder
+
+
+def test_packet_decoder_split_packets():
+    """
+    Tests to see if packets split across and packed into receives are decoded.
+    """
+    decoder = PacketDecoder()
+    assert decoder.feed(b"K\x03P\x0370\x03\r\nM\x0310") == [["K", "P", "70", ""]]
+    assert decoder.feed(b"\x0320\x03\r\n") == [["M", "10", "20", ""]]
+    assert decoder.buffer == b""
@@ -0,0 +1,73 @@
+"""
+Tests of the receiver: malformed input and scroll injection.
+"""
+# isort: off
+import ctypes
+import socket
+import sys
+import types
+import pyautogui
+from protocol import PacketDecoder
+from receiver import Receiver, ScrollInjector, SenderConnection
+from sender import scroll_packet
+
+
+def test_malformed_input_keeps_connection():
+    """
+    Tests to see if packets with bad fields are counted as malformed instead
+    of ending the receiver's loop.
+    """
+    receiver = Receiver("127.0.0.1", 0)
+    sender_socket, receiver_socket = socket.socketpair()
+    connection = SenderConnection(receiver_socket, ("127.0.0.1", 1))
+    try:
+        receiver.handle_packet(connection, ["M", "0", "0", "1", "1"])
+        receiver.handle_packet(connection, ["M", "x", "1080", "1", "1"])
+        assert connection.decoder.malformed_count == 2
+    finally:
+        sender_socket.close()
+        receiver_socket.close()
+
+
+def test_scroll_injection(monkeypatch):
+    """
+    Tests to see if an aggregated scroll packet is injected as one call per
+    axis, with fractions carried over.
+    """
+    injected = []
+    monkeypatch.setattr(
+        pyautogui, "scroll", lambda clicks, _pause: injected.append(("y", clicks))
+    )
+    monkeypatch.setattr(
+        pyautogui, "hscroll", lambda clicks, _pause: injected.append(("x", clicks))
+    )
+    inject_scroll = ScrollInjector()
+    assert inject_scroll(PacketDecoder().feed(scroll_packet(1, -50))[0])
+    assert injected == [("y", -50), ("x", 1)]
+
+    injected.clear()
+    for _ in range(3):
+        assert inject_scroll(["S", "0", "0.4"])
+    assert injected == [("y", 1)]
+    assert not inject_scroll(["S", "up"])
+
+    # Malformed distances are rejected and leave the carried fraction intact
+    injected.clear()
+    for value in ("inf", "-inf", "nan"):
+        assert not inject_scroll(["S", "0", value])
+    assert inject_scroll(["S", "0", "0.8"])
+    assert injected == [("y", 1)]
+    injected.clear()
+    assert inject_scroll(["S", "0", "1e300"])
+    assert injected == [("y", 1000)]
+
+    # pyautogui.hscroll() scrolls vertically on Windows, the wheel event is sent
+    wheel_events = []
+    user32 = types.SimpleNamespace(mouse_event=lambda *args: wheel_events.append(args))
+    monkeypatch.setattr(sys, "platform", "win32")
+    windll = types.SimpleNamespace(user32=user32)
+    monkeypatch.setattr(ctypes, "windll", windll, raising=False)
+    injected.clear()
+    assert inject_scroll(["S", "-2", "0"])
+    assert not injected
+    assert wheel_events == [(0x01000, 0, 0, -240, 0)]
@@ -0,0 +1,43 @@
+"""
+Tests of the tile diff encoding of screen share frames.
+"""
+# isort: off
+import os
+import pytest
+from screen_codec import Frame, TileDecoder, TileEncoder, bgra_to_rgb, downscale
+
+
+def test_downscale_ignores_the_fourth_byte():
+    """
+    Tests to see if downscaling with Pillow keeps the colors of a capture whose
+    fourth byte is 0, as GDI and X11 leave it.
+    """
+    pytest.importorskip("PIL")
+    pixels = bytes([10, 120, 250, 0]) * (40 * 30)
+    scaled = downscale(Frame(40, 30, pixels), 4)
+    assert (scaled.width, scaled.height) == (10, 8)
+    assert bgra_to_rgb(scaled.pixels) == bytes([250, 120, 10]) * (10 * 8)
+
+
+def test_screen_codec_sends_scrolls_as_copies():
+    """
+    Tests to see if scrolling up or sideways is sent as a copy rectangle and
+    the newly exposed strip, and decodes to the new frame.
+    """
+    rows = [os.urandom(300 * 4) for _ in range(400)]
+    frames = {
+        "still": Frame(200, 200, b"".join(row[:800] for row in rows[:200])),
+        "up": Frame(200, 200, b"".join(row[:800] for row in rows[40:240])),
+        "left": Frame(200, 200, b"".join(row[120:920] for row in rows[:200])),
+    }
+    for scrolled in ("up", "left"):
+        encoder = TileEncoder()
+        decoder = TileDecoder()
+        decoder.apply(encoder.encode(frames["still"]))
+        message = encoder.encode(frames[scrolled])
+        decoder.apply(message)
+        assert encoder.scrolls == 1
+        # The exposed strip is a quarter of the frame, or less than half of it
+        # once aligned on tiles, and random pixels do not compress
+        assert len(message) < 200 * 200 * 3 // 2
+        assert decoder.pixels == bgra_to_rgb(frames[scrolled].pixels)
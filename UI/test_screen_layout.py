@@ -0,0 +1,23 @@
+"""
+Tests of the screen layout used for edge switching.
+"""
+# isort: off
+from screen_layout import crossed_edge, load_screen_layout, warp_position
+
+
+def test_screen_layout_edges(tmp_path):
+    """
+    Tests to see if pushing the cursor off an edge finds the receiver beyond it
+    and re-enters the cursor from the opposite side.
+    """
+    layout_file = tmp_path / "layout.json"
+    layout_file.write_text('{"left": "10.0.0.2", "top": "10.0.0.3:6000"}')
+    targets = [("10.0.0.1", 5000), ("10.0.0.2", 5000), ("10.0.0.3", 6000)]
+    assert load_screen_layout(str(layout_file), targets) == {"left": 1, "top": 2}
+
+    edge_bounds = (0, 0, 1919, 1079)
+    assert crossed_edge(edge_bounds, 500, 500) is None
+    assert crossed_edge(edge_bounds, 0, 500) == "left"
+    assert crossed_edge(edge_bounds, 500, 1079) == "bottom"
+    assert warp_position(edge_bounds, "left", 0, 500) == (1918, 500)
+    assert warp_position(edge_bounds, "top", 700, 0) == (700, 1078)
@@ -0,0 +1,211 @@
+"""
+Tests of the screen share server and viewer over loopback.
+"""
+# isort: off
+import os
+import socket
+import time
+from capture_pacing import CapturePacer
+from multiplexer import FRAME_STREAM
+from screen_codec import Frame, bgra_to_rgb, downscale
+from screen_share import ScreenShareServer, ViewerConnection
+from screen_viewer import ScreenViewer
+
+
+class FakeCapture:
+    """
+    A screen of random pixels, grabbed like MssCapture.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(os.urandom(width * height * 4))
+
+    def size(self):
+        """
+        Returns:
+            tuple: (width, height) of the screen.
+        """
+        return (self.width, self.height)
+
+    def grab(self, region=None):
+        """
+        Args:
+            region (tuple): (x, y, width, height) to grab, the whole screen by default.
+        Returns:
+            Frame: The pixels, shared with the capture rather than copied.
+        """
+        frame = Frame(self.width, self.height, self.pixels)
+        return frame.crop(*region) if region else frame
+
+
+def wait_for(condition, timeout=5.0):
+    """
+    Purpose:
+        Waits until a condition holds.
+
+    Args:
+        condition (callable): Returns True once the condition holds.
+        timeout (float): The longest wait in seconds.
+
+    Return:
+        bool: Whether the condition held before the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_screen_share_sends_damaged_tiles():
+    """
+    Tests to see if the screen share only sends the tiles that changed and
+    the viewer keeps the damage of updates it never displayed.
+    """
+
+    capture = FakeCapture(200, 150)
+    server = ScreenShareServer(
+        "127.0.0.1", 0, capture=capture, pacer=CapturePacer(100)
+    )
+    server.start()
+    viewer = ScreenViewer(("127.0.0.1", server.port))
+    try:
+        assert viewer.start()
+        assert wait_for(lambda: viewer.frames_decoded >= 1)
+        first = viewer.latest.update
+        assert first.damage and sum(w * h for _, _, w, h in first.damage) == 200 * 150
+
+        # One changed pixel in the tile at (64, 64), never taken by Tk
+        capture.pixels[(100 * 200 + 100) * 4] ^= 0xFF
+        assert wait_for(lambda: viewer.frames_decoded >= 2)
+        update = viewer.latest.take()
+        assert viewer.frames_dropped == 1
+        assert (64, 64, 64, 64) in update.damage
+        assert len(update.damage) == len(first.damage) + 1
+        assert viewer.decoder.pixels == bgra_to_rgb(bytes(capture.pixels))
+    finally:
+        viewer.stop()
+        server.stop()
+
+
+def test_screen_share_follows_viewport():
+    """
+    Tests to see if the screen share downscales to the viewer's window and
+    only captures the region it zooms into.
+    """
+    capture = FakeCapture(400, 300)
+    server = ScreenShareServer(
+        "127.0.0.1", 0, capture=capture, pacer=CapturePacer(100)
+    )
+    server.start()
+    viewer = ScreenViewer(("127.0.0.1", server.port))
+    try:
+        viewer.set_viewport(100, 100)
+        assert viewer.start()
+        assert wait_for(lambda: viewer.decoder.width == 100)
+        assert viewer.decoder.height == 75
+        assert viewer.geometry == (400, 300, 0, 0, 400, 300, 4)
+
+        # Zooming in around the middle of the image, which is centered 12 pixels down
+        viewer.zoom_at(50, 50, 2)
+        assert viewer.region == (100, 76, 200, 150)
+        expected = bgra_to_rgb(downscale(capture.grab(viewer.region), 2).pixels)
+        assert wait_for(lambda: viewer.decoder.pixels == expected)
+        assert viewer.geometry == (400, 300, 100, 76, 200, 150, 2)
+    finally:
+        viewer.stop()
+        server.stop()
+
+
+def test_screen_capture_backs_off_until_woken():
+    """
+    Tests to see if an unchanged screen is captured less and less often, and
+    a wake up, as sent after injected input, captures the change at once.
+    """
+    capture = FakeCapture(64, 64)
+    server = ScreenShareServer(
+        "127.0.0.1", 0, capture=capture, pacer=CapturePacer(100)
+    )
+    server.damage_monitor = None  # the desktop of the test machine would wake it
+    server.start()
+    viewer = ScreenViewer(("127.0.0.1", server.port))
+    try:
+        assert viewer.start()
+        assert wait_for(lambda: viewer.frames_decoded == 1)
+        captures = server.captures
+        time.sleep(1.0)
+        # A fixed rate would capture 100 times, backing off from 10 ms to 500 ms
+        assert server.captures - captures < 15
+
+        capture.pixels[0] ^= 0xFF
+        started = time.monotonic()
+        server.wake()
+        assert wait_for(lambda: viewer.frames_decoded == 2)
+        assert time.monotonic() - started < 0.2
+    finally:
+        viewer.stop()
+        server.stop()
+
+
+def test_screen_share_thumbnail_upgrades_in_place():
+    """
+    Tests to see if a thumbnail viewer gets small, quantized frames a few times
+    per second, and leaving thumbnail mode sends full frames on the same connection.
+    """
+    capture = FakeCapture(640, 480)
+    server = ScreenShareServer(
+        "127.0.0.1", 0, capture=capture, pacer=CapturePacer(100)
+    )
+    server.damage_monitor = None
+    server.start()
+    viewer = ScreenViewer(("127.0.0.1", server.port), thumbnail=True)
+    try:
+        assert viewer.start()
+        assert wait_for(lambda: viewer.frames_decoded == 1)
+        assert (viewer.decoder.width, viewer.decoder.height) == (214, 160)
+        assert all(value & 0x07 == 0 for value in viewer.decoder.pixels)
+
+        # The screen changes on every capture, thumbnails follow at THUMBNAIL_FPS
+        started = time.monotonic()
+        while time.monotonic() - started < 1.0:
+            capture.pixels[:4096] = os.urandom(4096)
+            time.sleep(0.01)
+        assert 1 <= viewer.frames_decoded - 1 <= 3
+
+        connection = viewer.client_socket
+        viewer.set_thumbnail(False)
+        expected = bgra_to_rgb(capture.pixels)
+        assert wait_for(lambda: viewer.decoder.pixels == expected)
+        assert viewer.client_socket is connection and len(server.viewers) == 1
+    finally:
+        viewer.stop()
+        server.stop()
+
+
+def test_screen_share_thumbnail_throttle_reports_damage():
+    """
+    Tests to see if a thumbnail held back by the frame rate limit still counts
+    as changed, so the capture pacer keeps polling until it is sent.
+    """
+    # The writer sets TCP options, so a Unix socket pair will not do
+    listener = socket.create_server(("127.0.0.1", 0))
+    viewer_socket = socket.create_connection(listener.getsockname())
+    server_socket, address = listener.accept()
+    listener.close()
+    connection = ViewerConnection(server_socket, address)
+    connection.writer.start()
+    connection.thumbnail = True
+    capture = FakeCapture(64, 64)
+    geometry = (64, 64, 0, 0, 64, 64, 1)
+    try:
+        assert connection.send_frame(capture.grab(), geometry)
+        assert wait_for(lambda: not connection.writer.queued_bytes[FRAME_STREAM])
+        assert not connection.send_frame(capture.grab(), geometry)
+        capture.pixels[0] ^= 0xFF
+        assert connection.send_frame(capture.grab(), geometry)
+        assert connection.frames_sent == 1
+    finally:
+        connection.writer.stop()
+        viewer_socket.close()
+        server_socket.close()
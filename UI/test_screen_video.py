@@ -0,0 +1,62 @@
+"""
+Tests of the video mode of the screen share.
+"""
+# isort: off
+import os
+import pytest
+from screen_codec import Frame, TileDecoder, bgra_to_rgb
+import screen_video
+from screen_video import VIDEO_ENTER_FRAMES, VIDEO_EXIT_FRAMES, AdaptiveEncoder
+
+
+def test_screen_share_switches_to_video(monkeypatch):
+    """
+    Tests to see if full-motion content switches the screen share to video,
+    only for viewers that decode it, and static content back to tiles.
+    """
+
+    class FakeVideoEncoder:  # pylint: disable=R0903
+        """
+        Stands in for VideoEncoder, whose codecs need PyAV.
+        """
+
+        def __init__(self, width, height, codec_index, fps):  # pylint: disable=W0613
+            self.width, self.height, self.codec_index = width, height, codec_index
+
+        def encode(self, frame):  # pylint: disable=W0613
+            """
+            Returns:
+                bytes: A video frame message without a bitstream.
+            """
+            return b"V" + bytes(5)
+
+    monkeypatch.setattr(screen_video, "video_codec", lambda: 0)
+    monkeypatch.setattr(screen_video, "VideoEncoder", FakeVideoEncoder)
+
+    def moving_frame():
+        return Frame(128, 128, os.urandom(128 * 128 * 4))
+
+    tiles_only = AdaptiveEncoder()
+    for _ in range(2 * VIDEO_ENTER_FRAMES):
+        tiles_only.encode(moving_frame())
+    assert tiles_only.mode == "tiles"
+
+    encoder = AdaptiveEncoder()
+    encoder.video_allowed = True
+    for _ in range(VIDEO_ENTER_FRAMES):
+        encoder.encode(moving_frame())
+    assert encoder.mode == "video"
+    assert encoder.encode(moving_frame()).startswith(b"V")
+
+    # Unchanged frames send nothing until the encoder returns to complete tiles
+    still = moving_frame()
+    messages = [encoder.encode(still) for _ in range(VIDEO_EXIT_FRAMES + 1)]
+    assert messages[0].startswith(b"V")
+    assert messages[1:-1] == [None] * (VIDEO_EXIT_FRAMES - 1)
+    assert encoder.mode == "tiles"
+    decoder = TileDecoder()
+    assert decoder.apply(messages[-1])
+    assert decoder.pixels == bgra_to_rgb(still.pixels)
+    # Video frames are refused without a video decoder to pass them to
+    with pytest.raises(ValueError):
+        decoder.apply(messages[0])
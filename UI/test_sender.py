@@ -0,0 +1,71 @@
+"""
+Tests of the sender: key translation, hotkeys and scroll aggregation.
+"""
+# isort: off
+import threading
+import time
+from pynput import keyboard
+from connection_pool import ConnectionPool
+from keycodes import KEY_NAMES
+from sender import ScrollAggregator, Sender, build_key_table, scroll_packet
+from session import SessionState
+
+
+def test_key_table():
+    """
+    Tests to see if pynput keys translate to the key IDs understood by the receiver.
+    """
+    key_table = build_key_table()
+    assert KEY_NAMES[key_table["a"]] == "a"
+    assert KEY_NAMES[key_table[keyboard.Key.ctrl_l]] == "ctrlleft"
+    assert KEY_NAMES[key_table[keyboard.Key.page_down]] == "pgdn"
+    assert KEY_NAMES[key_table["\x03"]] == "c"  # ctrl + c on Windows
+
+
+def test_hotkeys_are_not_forwarded():
+    """
+    Tests to see if the print screen, scroll lock and pause hotkeys stay on
+    the sender instead of being sent to the receiver.
+    """
+    sent = []
+    sender = Sender.__new__(Sender)
+    sender.session = SessionState()
+    sender.session.start()
+    sender.pool = ConnectionPool([])
+    sender.send_packet = sent.append
+    sender.key_table = build_key_table()
+    sender.currently_pressed_keys = set()
+    sender.track_keyboard = sender.track_mouse = True
+    sender.remote_edge = None
+    for _ in range(2):
+        assert sender.on_press(keyboard.Key.print_screen)
+        assert sender.on_release(keyboard.Key.print_screen)
+    assert not sent and sender.track_keyboard
+    assert sender.on_press(keyboard.Key.shift)
+    assert len(sent) == 1
+
+
+def test_scroll_aggregation():
+    """
+    Tests to see if a burst of scroll events is sent as one packet, and if
+    stopping sends what is left at once.
+    """
+    sent = []
+    aggregator = ScrollAggregator(sent.append, window=0.05)
+    for _ in range(100):
+        aggregator.add(0, -0.5)
+    aggregator.add(1, 0)
+    time.sleep(0.15)
+    aggregator.stop()
+    assert sent == [scroll_packet(1, -50)]
+
+    # Stopping in the middle of a window sends the sum at once
+    stopped = []
+    aggregator = ScrollAggregator(stopped.append, window=5.0)
+    aggregator.add(0, 1)
+    time.sleep(0.05)
+    stopper = threading.Thread(target=aggregator.stop, daemon=True)
+    stopper.start()
+    stopper.join(timeout=1.0)
+    assert not stopper.is_alive()
+    assert stopped == [scroll_packet(0, 1)]
@@ -0,0 +1,27 @@
+"""
+Tests of the session state.
+"""
+# isort: off
+from session import SessionState
+
+
+def test_session_reports_first_failure():
+    """
+    Tests to see if a session only reports its first error and keeps it after stopping.
+    """
+    reported = []
+    sender_session = SessionState(on_failure=reported.append)
+    receiver_session = SessionState()
+    assert sender_session.start() and receiver_session.start()
+    assert not sender_session.start()
+
+    assert sender_session.fail("Connection Clossed by Receiver")
+    assert not sender_session.fail("Unable to connect")
+    sender_session.stop()
+    assert reported == ["Connection Clossed by Receiver"]
+    assert sender_session.failed and not sender_session.running
+    assert sender_session.stop_event.is_set()
+
+    # Sessions are independent of each other
+    assert receiver_session.running and not receiver_session.stop_event.is_set()
+    assert sender_session.start() and sender_session.error_message == ""
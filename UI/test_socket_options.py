@@ -0,0 +1,21 @@
+"""
+Tests of the socket profiles.
+"""
+# isort: off
+import socket
+from socket_options import configure_socket
+
+
+def test_socket_profiles():
+    """
+    Tests to see if the socket profiles disable Nagle's algorithm and set the timeouts.
+    """
+    for profile_name, timeout in (("interactive_lan", 2.0), ("wan", 10.0)):
+        tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            configure_socket(tcp_socket, profile_name)
+            assert tcp_socket.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+            assert tcp_socket.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+            assert tcp_socket.gettimeout() == timeout
+        finally:
+            tcp_socket.close()
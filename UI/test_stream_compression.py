@@ -0,0 +1,72 @@
+"""
+Tests of the negotiated stream compression.
+"""
+# isort: off
+import socket
+import time
+from connection_pool import ConnectionPool
+from health_monitor import HealthMonitor
+from socket_options import ChannelOptions
+from stream_compression import StreamCompressor, StreamDecompressor
+
+
+def test_compressed_stream(start_receiver):
+    """
+    Tests to see if a negotiated compressed stream carries heartbeats and
+    shrinks repetitive mouse packets.
+    """
+    compressor = StreamCompressor()
+    decompressor = StreamDecompressor()
+    packets = [f"M\x031920\x031080\x03{x}\x03{x // 2}\x03\r\n" for x in range(200)]
+    received = b"".join(
+        decompressor.decompress(compressor.compress(bytes(packet, "utf-8")))
+        for packet in packets
+    )
+    assert received == bytes("".join(packets), "utf-8")
+    # Every packet is flushed on its own, which costs a few bytes each
+    assert compressor.bytes_out < compressor.bytes_in * 0.75
+
+    receiver = start_receiver()
+
+    pool = ConnectionPool(
+        [receiver.socket_fd.getsockname()], options=ChannelOptions(compression=True)
+    )
+    monitor = HealthMonitor(pool, interval=0.05)
+    try:
+        assert pool.connect_all() == 1
+        assert pool.targets[0].compressor is not None
+        monitor.start()
+        time.sleep(0.3)
+        assert pool.targets[0].link_stats.pongs_received > 0
+        assert "compressed" in pool.health()[0]
+    finally:
+        monitor.stop()
+        pool.close_all()
+
+
+def test_compression_offer_timeout_reconnects_plain():
+    """
+    Tests to see if a sender that gets no answer to its compression offer
+    drops that connection and sends plain packets on a new one.
+    """
+    listener = socket.create_server(("127.0.0.1", 0))
+    pool = ConnectionPool(
+        [listener.getsockname()], options=ChannelOptions(compression=True)
+    )
+    try:
+        # Both connections wait in the backlog, the offer is never answered
+        assert pool.connect_all() == 1
+        assert pool.targets[0].compressor is None
+        offered, _ = listener.accept()
+        plain, _ = listener.accept()
+        try:
+            assert offered.recv(256).startswith(b"Z")
+            packet = b"K\x03P\x0342\x03\r\n"
+            assert pool.send(packet)
+            assert plain.recv(256) == packet
+        finally:
+            offered.close()
+            plain.close()
+    finally:
+        pool.close_all()
+        listener.close()
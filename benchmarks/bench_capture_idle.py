@@ -0,0 +1,118 @@
+"""
+Measures the CPU used by the screen share while the screen does not change.
+
+Runs a screen share server with a viewer connected over loopback, once
+capturing at a fixed frame rate and once paced by damage, and reports the
+CPU used and the captures per second of each. By default a synthetic
+capture copies a static frame of the given size, the cost of the grab
+itself; --mss grabs the real desktop instead, which should be left alone
+while the benchmark runs.
+
+Usage:
+    python benchmarks/bench_capture_idle.py --seconds 5
+    python benchmarks/bench_capture_idle.py --mss --fps 60
+"""
+# isort: off
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "UI"))
+
+from capture_pacing import (  # noqa: E402  pylint: disable=C0413
+    DAMAGE_MAX_INTERVAL,
+    POLL_MAX_INTERVAL,
+    CapturePacer,
+)
+from screen_codec import Frame  # noqa: E402  pylint: disable=C0413
+from screen_share import (  # noqa: E402  pylint: disable=C0413
+    MssCapture,
+    ScreenShareServer,
+)
+from screen_viewer import ScreenViewer  # noqa: E402  pylint: disable=C0413
+
+
+class StaticCapture:
+    """
+    A screen that never changes, copied on every grab like a real capture.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.pixels = os.urandom(width * height * 4)
+
+    def size(self):
+        """
+        Returns:
+            tuple: The (width, height) of the screen.
+        """
+        return (self.width, self.height)
+
+    def grab(self, region=None):
+        """
+        Returns:
+            Frame: A copy of the screen, or of a region of it.
+        """
+        frame = Frame(self.width, self.height, bytearray(self.pixels))
+        return frame.crop(*region) if region else frame
+
+
+def measure(capture, fps, seconds, pacing):
+    """
+    Purpose:
+        Shares an idle screen with one viewer.
+    Returns:
+        tuple: (CPU percent of one core, captures per second, damage monitor used)
+    """
+    pacer = CapturePacer(fps, POLL_MAX_INTERVAL if pacing else 0)
+    server = ScreenShareServer("127.0.0.1", 0, capture=capture, pacer=pacer)
+    server.start()
+    viewer = ScreenViewer(("127.0.0.1", server.port))
+    try:
+        if not viewer.start():
+            raise RuntimeError(viewer.error)
+        # Settle: the first complete frame, then the backoff
+        while viewer.frames_decoded == 0:
+            time.sleep(0.01)
+        time.sleep(1.0)
+
+        captures = server.captures
+        started_cpu = time.process_time()
+        started = time.monotonic()
+        time.sleep(seconds)
+        elapsed = time.monotonic() - started
+        cpu = (time.process_time() - started_cpu) / elapsed
+        rate = (server.captures - captures) / elapsed
+        damage = server.pacer.max_interval == DAMAGE_MAX_INTERVAL
+    finally:
+        viewer.stop()
+        server.stop()
+    return cpu * 100, rate, damage
+
+
+def main():
+    """
+    Measures both capture modes and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--mss", action="store_true", help="grab the real desktop")
+    arguments = parser.parse_args()
+
+    print(f"{'capture':<20}{'CPU %':>8}{'grabs/s':>10}  damage events")
+    for mode, pacing in ((f"fixed {arguments.fps} fps", False), ("paced", True)):
+        if arguments.mss:
+            capture = MssCapture()
+        else:
+            capture = StaticCapture(arguments.width, arguments.height)
+        cpu, rate, damage = measure(capture, arguments.fps, arguments.seconds, pacing)
+        print(f"{mode:<20}{cpu:>8.1f}{rate:>10.1f}  {'yes' if damage else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
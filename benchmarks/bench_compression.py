@@ -0,0 +1,126 @@
+"""
+Measures the compression ratio and CPU cost of the compressed input stream.
+
+Synthesizes a typing session and a mouse session, or replays a recording of
+raw packets, and compresses them the way a sender does: one sync flush per
+packet, or per batch of packets. The same sessions are also compressed
+without the preset dictionary for comparison.
+
+Usage:
+    python benchmarks/bench_compression.py --packets 20000 --batch 8
+    python benchmarks/bench_compression.py --recording session.bin
+"""
+# isort: off
+import argparse
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "UI"))
+
+from keycodes import KEY_IDS  # noqa: E402  pylint: disable=C0413
+from stream_compression import StreamCompressor  # noqa: E402  pylint: disable=C0413
+
+
+def typing_session(count, seed=1):
+    """
+    Returns:
+        list: Press and release packets of random letters and a few modifiers.
+    """
+    rng = random.Random(seed)
+    letters = [KEY_IDS[letter] for letter in "etaoinshrdlu "]
+    packets = []
+    while len(packets) < count:
+        key_id = rng.choice(letters)
+        if rng.random() < 0.05:
+            packets.append(f"K\x03P\x03{KEY_IDS['shift']}\x03\r\n")
+        packets.append(f"K\x03P\x03{key_id}\x03\r\n")
+        packets.append(f"K\x03R\x03{key_id}\x03\r\n")
+    return [bytes(packet, "utf-8") for packet in packets[:count]]
+
+
+def mouse_session(count, seed=1):
+    """
+    Returns:
+        list: Mouse moves along random strokes, with the odd click and scroll.
+    """
+    rng = random.Random(seed)
+    x, y = 960, 540
+    packets = []
+    while len(packets) < count:
+        step_x, step_y = rng.randint(-6, 6), rng.randint(-6, 6)
+        for _ in range(rng.randint(10, 60)):
+            x = min(max(x + step_x, 0), 1919)
+            y = min(max(y + step_y, 0), 1079)
+            packets.append(f"M\x031920\x031080\x03{x}\x03{y}\x03\r\n")
+        if rng.random() < 0.2:
+            packets.append("C\x03l\x03Button.left\x03\r\n")
+        if rng.random() < 0.2:
+            packets.append(f"S\x030\x03{rng.choice((-1, 1))}\x03\r\n")
+    return [bytes(packet, "utf-8") for packet in packets[:count]]
+
+
+def load_recording(file_name):
+    """
+    Returns:
+        list: The packets of a file of raw packets, as captured from a socket.
+    """
+    with open(file_name, "rb") as recording:
+        return [packet + b"\r\n" for packet in recording.read().split(b"\r\n") if packet]
+
+
+def measure(packets, batch, dictionary=True):
+    """
+    Purpose:
+        Compresses a session in writes of `batch` packets.
+    Args:
+        packets (list): The encoded packets.
+        batch (int): Packets per write, each write ends with a sync flush.
+        dictionary (bool): Prime zlib with the preset dictionary.
+    Returns:
+        tuple: (compressed size / original size, CPU nanoseconds per packet)
+    """
+    compressor = StreamCompressor()
+    if not dictionary:
+        compressor.compressor = zlib.compressobj(6)
+    writes = [b"".join(packets[i : i + batch]) for i in range(0, len(packets), batch)]
+    started = time.process_time_ns()
+    for write in writes:
+        compressor.compress(write)
+    elapsed = time.process_time_ns() - started
+    return compressor.bytes_out / compressor.bytes_in, elapsed / len(packets)
+
+
+def main():
+    """
+    Compresses every session and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--packets", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--recording", help="file of raw packets to replay")
+    arguments = parser.parse_args()
+
+    if arguments.recording:
+        sessions = {"recording": load_recording(arguments.recording)}
+    else:
+        sessions = {
+            "typing": typing_session(arguments.packets),
+            "mouse": mouse_session(arguments.packets),
+        }
+
+    print(f"{'session':<12}{'mode':<24}{'ratio':>8}{'ns/packet':>12}")
+    for name, packets in sessions.items():
+        for mode, batch, dictionary in (
+            ("per packet", 1, True),
+            ("per packet, no dict", 1, False),
+            (f"per {arguments.batch} packets", arguments.batch, True),
+        ):
+            ratio, ns_per_packet = measure(packets, batch, dictionary)
+            print(f"{name:<12}{mode:<24}{ratio:>8.1%}{ns_per_packet:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Measures the bandwidth saved by sending scrolls as copy rectangles.
+
+Synthesizes two scrolling text sessions: a document window between a static
+sidebar and header, scrolled three lines per frame, and a full screen
+terminal that scrolls one line per frame. Each session is encoded with and
+without scroll detection, decoded again to check the result, and the bytes
+sent and encode time per frame are compared.
+
+Usage:
+    python benchmarks/bench_scroll.py --frames 60
+    python benchmarks/bench_scroll.py --width 3840 --height 2160
+"""
+# isort: off
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "UI"))
+
+from screen_codec import (  # noqa: E402  pylint: disable=C0413
+    Frame,
+    TileDecoder,
+    TileEncoder,
+    bgra_to_rgb,
+)
+
+LINE_HEIGHT = 16
+# Random bytes below this become dark glyph pixels, the rest white paper
+INK = bytes(0x20 if value < 48 else 0xFF for value in range(256))
+
+
+def gray_to_bgra(gray):
+    """
+    Returns:
+        bytes: Opaque BGRA pixels of the gray levels.
+    """
+    pixels = bytearray(len(gray) * 4)
+    pixels[0::4] = gray
+    pixels[1::4] = gray
+    pixels[2::4] = gray
+    pixels[3::4] = b"\xff" * len(gray)
+    return bytes(pixels)
+
+
+def text_rows(width, lines, seed=1):
+    """
+    Returns:
+        list: BGRA rows of ragged lines of random glyphs, LINE_HEIGHT rows per line.
+    """
+    rng = random.Random(seed)
+    blank = gray_to_bgra(b"\xff" * width)
+    rows = []
+    for _ in range(lines):
+        length = rng.randint(width // 4, width - 16)
+        for row in range(LINE_HEIGHT):
+            if row < 3 or row >= LINE_HEIGHT - 3:
+                rows.append(blank)
+                continue
+            ink = rng.randbytes(length).translate(INK) + b"\xff" * (width - length)
+            rows.append(gray_to_bgra(ink))
+    return rows
+
+
+def scroll_session(width, height, frames, left, top, step_lines):
+    """
+    Purpose:
+        Scrolls a text window, with a static sidebar of `left` pixels and a
+        static header of `top` rows, by `step_lines` lines per frame.
+    Returns:
+        list: The BGRA frames.
+    """
+    view_rows = height - top
+    lines = view_rows // LINE_HEIGHT + frames * step_lines + 1
+    document = text_rows(width - left, lines)
+    sidebar = text_rows(left, height // LINE_HEIGHT + 1, seed=2) if left else []
+    header = text_rows(width, top // LINE_HEIGHT + 1, seed=3)[:top]
+
+    session = []
+    for index in range(frames):
+        offset = index * step_lines * LINE_HEIGHT
+        rows = list(header)
+        for row in range(view_rows):
+            side = sidebar[top + row] if left else b""
+            rows.append(side + document[offset + row])
+        session.append(Frame(width, height, b"".join(rows)))
+    return session
+
+
+def measure(session, scroll_detection):
+    """
+    Purpose:
+        Encodes and decodes a session.
+    Args:
+        session (list): The frames.
+        scroll_detection (bool): Send scrolls as copy rectangles.
+    Returns:
+        tuple: (bytes after the first frame, encode milliseconds per frame, scrolls)
+    """
+    encoder = TileEncoder(scroll_detection=scroll_detection)
+    decoder = TileDecoder()
+    decoder.apply(encoder.encode(session[0]))
+    sent = 0
+    elapsed = 0
+    for frame in session[1:]:
+        started = time.perf_counter_ns()
+        message = encoder.encode(frame)
+        elapsed += time.perf_counter_ns() - started
+        sent += len(message)
+        decoder.apply(message)
+    if decoder.pixels != bgra_to_rgb(session[-1].pixels):
+        raise AssertionError("The decoded screen differs from the last frame")
+    return sent, elapsed / 1e6 / (len(session) - 1), encoder.scrolls
+
+
+def main():
+    """
+    Encodes every session and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    arguments = parser.parse_args()
+
+    width, height = arguments.width, arguments.height
+    sessions = {
+        "document": scroll_session(width, height, arguments.frames, width // 8, 80, 3),
+        "terminal": scroll_session(width, height, arguments.frames, 0, 0, 1),
+    }
+
+    print(f"{'session':<12}{'mode':<16}{'KB/frame':>10}{'ms/frame':>10}{'scrolls':>9}")
+    for name, session in sessions.items():
+        results = {}
+        for mode, scroll_detection in (("tile diff", False), ("copy rects", True)):
+            sent, milliseconds, scrolls = measure(session, scroll_detection)
+            results[mode] = sent
+            kilobytes = sent / 1024 / (len(session) - 1)
+            print(
+                f"{name:<12}{mode:<16}{kilobytes:>10.1f}"
+                f"{milliseconds:>10.1f}{scrolls:>9}"
+            )
+        saved = 1 - results["copy rects"] / results["tile diff"]
+        print(f"{name:<12}{'saved':<16}{saved:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Compares the input latency of the socket profiles on loopback.
+
+A proxy between the sender and a sink adds a fixed one-way delay in both
+directions, like netem would, and the sink timestamps every packet on arrival.
+Packets follow a typing pattern: a key press and its release a millisecond
+later. As with the real receiver, the sink only answers heartbeats, so the
+kernel delays its ACKs and Nagle's algorithm holds the release back until the
+press is acknowledged.
+
+Usage:
+    python benchmarks/bench_socket_profiles.py --delay-ms 20 --keys 100
+"""
+# isort: off
+import argparse
+import os
+import queue
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "UI"))
+
+from protocol import PacketDecoder  # noqa: E402  pylint: disable=C0413
+from socket_options import SOCKET_PROFILES, configure_socket  # noqa: E402  pylint: disable=C0413
+
+
+class DelayProxy:
+    """
+    Forwards one TCP connection to an upstream address, delaying both directions.
+    """
+
+    def __init__(self, upstream_address, delay):
+        self.upstream_address = upstream_address
+        self.delay = delay
+        self.listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listen_socket.bind(("127.0.0.1", 0))
+        self.listen_socket.listen(1)
+        self.address = self.listen_socket.getsockname()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        """
+        Accepts the connection and forwards it with the delay applied.
+        """
+        client_socket, _ = self.listen_socket.accept()
+        upstream_socket = socket.create_connection(self.upstream_address)
+        for tcp_socket in (client_socket, upstream_socket):
+            tcp_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threading.Thread(
+            target=self.pipe, args=(upstream_socket, client_socket), daemon=True
+        ).start()
+        self.pipe(client_socket, upstream_socket)
+
+    def pipe(self, source, destination):
+        """
+        Copies one direction of the connection, releasing data after the delay.
+        """
+        pending = queue.Queue()
+
+        def forward():
+            while True:
+                due, data = pending.get()
+                time.sleep(max(0.0, due - time.monotonic()))
+                if not data:
+                    destination.shutdown(socket.SHUT_WR)
+                    return
+                destination.sendall(data)
+
+        threading.Thread(target=forward, daemon=True).start()
+        while True:
+            try:
+                data = source.recv(65536)
+            except OSError:
+                data = b""
+            pending.put((time.monotonic() + self.delay, data))
+            if not data:
+                return
+
+
+def run_sink(listen_socket, latencies):
+    """
+    Records the one-way latency of every key packet and answers heartbeats.
+    """
+    connection, _ = listen_socket.accept()
+    decoder = PacketDecoder()
+    while True:
+        data = connection.recv(65536)
+        if not data:
+            break
+        received_ns = time.monotonic_ns()
+        for packet in decoder.feed(data):
+            if packet[0] == "H":
+                connection.sendall(b"h\x03\r\n")
+            else:
+                latencies.append((received_ns - int(packet[1])) / 1_000_000)
+    connection.close()
+
+
+def measure(profile_name, delay, keys):
+    """
+    Sends the typing pattern through the delay proxy with a socket profile.
+
+    Returns:
+        list: The one-way latency of every packet in milliseconds.
+    """
+    sink_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sink_socket.bind(("127.0.0.1", 0))
+    sink_socket.listen(1)
+    latencies = []
+    sink_thread = threading.Thread(target=run_sink, args=(sink_socket, latencies))
+    sink_thread.start()
+    proxy = DelayProxy(sink_socket.getsockname(), delay)
+
+    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if profile_name != "default":
+        configure_socket(client_socket, profile_name)
+    client_socket.connect(proxy.address)
+
+    # Drain the heartbeat answers like the sender's health monitor does
+    def drain():
+        while client_socket.recv(4096):
+            pass
+
+    drain_thread = threading.Thread(target=drain)
+    drain_thread.start()
+
+    for key in range(keys):
+        if key % 5 == 0:
+            client_socket.sendall(b"H\x03\r\n")
+        for _ in ("press", "release"):
+            packet = f"K{chr(3)}{time.monotonic_ns()}{chr(3)}\r\n"
+            client_socket.sendall(bytes(packet, "utf-8"))
+            time.sleep(0.001)
+        time.sleep(0.02)
+
+    client_socket.shutdown(socket.SHUT_WR)
+    sink_thread.join()
+    drain_thread.join()
+    client_socket.close()
+    sink_socket.close()
+    return latencies
+
+
+def main():
+    """
+    Runs the benchmark for the default socket options and every profile.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--delay-ms", type=float, default=20.0)
+    parser.add_argument("--keys", type=int, default=100)
+    arguments = parser.parse_args()
+    delay = arguments.delay_ms / 1000
+
+    print(f"One-way delay {arguments.delay_ms} ms, {arguments.keys} key presses")
+    print(f"{'profile':<20}{'mean':>10}{'p50':>10}{'p99':>10}{'max':>10}  (ms above delay)")
+    for profile_name in ["default"] + list(SOCKET_PROFILES):
+        latencies = sorted(
+            latency - arguments.delay_ms
+            for latency in measure(profile_name, delay, arguments.keys)
+        )
+        print(
+            f"{profile_name:<20}{statistics.mean(latencies):>10.2f}"
+            f"{statistics.median(latencies):>10.2f}"
+            f"{latencies[int(len(latencies) * 0.99) - 1]:>10.2f}"
+            f"{latencies[-1]:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Profiles the imports done when the UI starts.
+
+Runs "python -X importtime -c 'import main'" in a fresh interpreter and
+reports the total import time of main, the slowest modules, and any module
+that should only be loaded once a sender or receiver starts.
+
+Usage:
+    python benchmarks/bench_startup.py --top 15 --runs 5
+"""
+# isort: off
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+UI_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "UI")
+
+# Loaded when a service starts, never when the window opens
+DEFERRED_MODULES = (
+    "sender",
+    "receiver",
+    "screen_capture",
+    "pyautogui",
+    "pynput",
+    "keyboard",
+    "mss",
+)
+
+
+def profile_imports(module_name="main"):
+    """
+    Purpose:
+        Imports a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module_name (str): The module to import from the UI directory.
+
+    Return:
+        dict: Maps every imported module to its (self, cumulative) time in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=UI_DIRECTORY,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        timings[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return timings
+
+
+def main():
+    """
+    Runs the import profile and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=5)
+    arguments = parser.parse_args()
+
+    runs = [profile_imports() for _ in range(arguments.runs)]
+    totals = [timings["main"][1] / 1000 for timings in runs]
+    print(
+        f"import main: median {statistics.median(totals):.1f} ms, "
+        f"min {min(totals):.1f} ms over {arguments.runs} runs"
+    )
+
+    timings = runs[-1]
+    print(f"\n{'module':<50}{'self':>10}{'cumulative':>12}  (ms)")
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)
+    for module_name, (self_us, cumulative_us) in slowest[: arguments.top]:
+        print(f"{module_name:<50}{self_us / 1000:>10.1f}{cumulative_us / 1000:>12.1f}")
+
+    loaded = [
+        module_name
+        for module_name in timings
+        if module_name.split(".")[0] in DEFERRED_MODULES
+    ]
+    print("\nDeferred modules loaded at startup:", ", ".join(loaded) or "none")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Measures the latency TLS adds to every input event, and the handshake time
+of a full and a resumed TLS session.
+
+A loopback echo server stands in for the receiver. Every event is one mouse
+packet written on its own, as the sender does, and timed until its echo
+comes back. Batches of packets are sealed in one TLS record. A self-signed
+certificate is generated with openssl unless --cert and --key are given.
+
+Usage:
+    python benchmarks/bench_tls.py --events 5000 --batch 8
+"""
+# isort: off
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "UI"))
+
+from encryption import (  # noqa: E402  pylint: disable=C0413
+    ClientSession,
+    create_client_context,
+    create_server_context,
+)
+
+PACKET = b"M\x031920\x031080\x03960\x03540\x03\r\n"
+
+
+def generate_certificate(directory):
+    """
+    Returns:
+        tuple: The paths of a new self-signed certificate and its key.
+    """
+    cert_file = os.path.join(directory, "bench.pem")
+    key_file = os.path.join(directory, "bench.key")
+    subprocess.run(
+        "openssl req -x509 -newkey ec -pkeyopt ec_paramgen_curve:P-256 -nodes "
+        "-days 1 -subj /CN=cross-keys".split()
+        + ["-keyout", key_file, "-out", cert_file],
+        capture_output=True,
+        check=True,
+    )
+    return cert_file, key_file
+
+
+def serve_echo(server_socket, server_context):
+    """
+    Purpose:
+        Echoes every connection until its peer closes it.
+    """
+    while True:
+        try:
+            client_socket, _ = server_socket.accept()
+        except OSError:
+            return
+        if server_context is not None:
+            try:
+                client_socket = server_context.wrap_socket(
+                    client_socket, server_side=True
+                )
+            except OSError:
+                client_socket.close()
+                continue
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with client_socket:
+            while True:
+                data = client_socket.recv(65536)
+                if not data:
+                    break
+                client_socket.sendall(data)
+
+
+def connect(address, tls):
+    """
+    Returns:
+        socket.socket: A connection to the echo server, encrypted if tls is given.
+    """
+    client_socket = socket.create_connection(address)
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    if tls is not None:
+        client_socket = tls.wrap(client_socket)
+    return client_socket
+
+
+def time_events(client_socket, events, batch):
+    """
+    Returns:
+        list: The round trip time of every write in microseconds.
+    """
+    message = PACKET * batch
+    times = []
+    for _ in range(events // batch):
+        started = time.perf_counter_ns()
+        client_socket.sendall(message)
+        received = 0
+        while received < len(message):
+            received += len(client_socket.recv(65536))
+        times.append((time.perf_counter_ns() - started) / 1000)
+    return times
+
+
+def time_handshakes(address, tls, count):
+    """
+    Returns:
+        tuple: The median full and resumed handshake times in milliseconds.
+    """
+    full, resumed = [], []
+    for _ in range(count):
+        tls.session = None
+        for samples in (full, resumed):
+            started = time.perf_counter_ns()
+            client_socket = connect(address, tls)
+            samples.append((time.perf_counter_ns() - started) / 1_000_000)
+            # The ticket arrives after the handshake, an echo makes sure it is read
+            time_events(client_socket, 1, 1)
+            tls.remember(client_socket)
+            client_socket.close()
+    return statistics.median(full), statistics.median(resumed)
+
+
+def main():
+    """
+    Runs the echo server and prints the latencies.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--handshakes", type=int, default=50)
+    parser.add_argument("--cert")
+    parser.add_argument("--key")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if arguments.cert:
+            cert_file, key_file = arguments.cert, arguments.key
+        else:
+            cert_file, key_file = generate_certificate(directory)
+
+        servers = {}
+        for name, context in (
+            ("plain", None),
+            ("tls", create_server_context(cert_file, key_file)),
+        ):
+            server_socket = socket.create_server(("127.0.0.1", 0))
+            threading.Thread(
+                target=serve_echo, args=(server_socket, context), daemon=True
+            ).start()
+            servers[name] = server_socket
+
+        client_context = create_client_context(cert_file)
+        print(f"{'channel':<10}{'write':<14}{'p50 us':>10}{'p99 us':>10}")
+        for name, server_socket in servers.items():
+            tls = ClientSession(client_context) if name == "tls" else None
+            for batch in (1, arguments.batch):
+                client_socket = connect(server_socket.getsockname(), tls)
+                times = sorted(time_events(client_socket, arguments.events, batch))
+                client_socket.close()
+                label = "1 packet" if batch == 1 else f"{batch} packets"
+                print(
+                    f"{name:<10}{label:<14}{statistics.median(times):>10.1f}"
+                    f"{times[int(len(times) * 0.99)]:>10.1f}"
+                )
+
+        full, resumed = time_handshakes(
+            servers["tls"].getsockname(),
+            ClientSession(client_context),
+            arguments.handshakes,
+        )
+        print(f"\nTLS handshake: full {full:.2f} ms, resumed {resumed:.2f} ms")
+        for server_socket in servers.values():
+            server_socket.close()
+
+
+if __name__ == "__main__":
+    main()
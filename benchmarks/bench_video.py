@@ -0,0 +1,132 @@
+"""
+Compares the tile codec with the adaptive video mode on full-motion content.
+
+Synthesizes a session of video playback, a textured picture panning
+diagonally under a static border, followed by a still screen. It is encoded
+once with tiles only and once with the adaptive encoder, which switches to
+video during the motion and back to tiles once the screen is still. The
+video mode needs PyAV, without it only the tile results are printed.
+
+Usage:
+    python benchmarks/bench_video.py --motion 90 --still 30
+    python benchmarks/bench_video.py --width 1280 --height 720
+"""
+# isort: off
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "UI"))
+
+from screen_codec import Frame  # noqa: E402  pylint: disable=C0413
+from screen_video import (  # noqa: E402  pylint: disable=C0413
+    VIDEO_CODECS,
+    AdaptiveEncoder,
+    video_codec,
+)
+
+BLOCK = 8
+
+
+def texture_rows(width, height, seed=1):
+    """
+    Returns:
+        list: BGRA rows of a picture of random colored blocks.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(-(-height // BLOCK)):
+        colors = [rng.randbytes(3) + b"\xff" for _ in range(-(-width // BLOCK))]
+        row = b"".join(color * BLOCK for color in colors)[: width * 4]
+        rows.extend([row] * BLOCK)
+    return rows[:height]
+
+
+def playback_session(width, height, motion, still, border=40):
+    """
+    Purpose:
+        Pans a picture two pixels right and one down per frame inside a
+        static border, then holds the last frame.
+    Returns:
+        list: The BGRA frames.
+    """
+    inner_width = width - 2 * border
+    texture = texture_rows(inner_width + 2 * motion, height + motion)
+    edge = bytes(border * 4)
+    blank = bytes(width * 4)
+
+    session = []
+    for index in range(motion):
+        rows = [blank] * border
+        for row in range(index, index + height - 2 * border):
+            start = 2 * index * 4
+            rows.append(edge + texture[row][start : start + inner_width * 4] + edge)
+        rows.extend([blank] * border)
+        session.append(Frame(width, height, b"".join(rows)))
+    session.extend([session[-1]] * still)
+    return session
+
+
+def measure(session, motion, video):
+    """
+    Purpose:
+        Encodes a session.
+    Args:
+        session (list): The frames.
+        motion (int): The number of frames in motion, the rest are still.
+        video (bool): Allow the video mode.
+    Returns:
+        tuple: (KB per motion frame, KB per still frame, ms per frame, switches)
+    """
+    encoder = AdaptiveEncoder()
+    encoder.video_allowed = video
+    sizes = []
+    started = time.perf_counter()
+    for frame in session:
+        message = encoder.encode(frame)
+        sizes.append(len(message) if message else 0)
+    milliseconds = (time.perf_counter() - started) * 1000 / len(session)
+    motion_kilobytes = sum(sizes[1:motion]) / 1024 / max(1, motion - 1)
+    still_kilobytes = sum(sizes[motion:]) / 1024 / max(1, len(session) - motion)
+    return motion_kilobytes, still_kilobytes, milliseconds, encoder.switches
+
+
+def main():
+    """
+    Encodes the session in both modes and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--motion", type=int, default=90)
+    parser.add_argument("--still", type=int, default=30)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    arguments = parser.parse_args()
+
+    session = playback_session(
+        arguments.width, arguments.height, arguments.motion, arguments.still
+    )
+    modes = [("tiles only", False)]
+    codec_index = video_codec()
+    if codec_index is None:
+        print("PyAV with libx264 or libvpx is not installed, video was not measured")
+    else:
+        modes.append((f"adaptive {VIDEO_CODECS[codec_index][0]}", True))
+
+    print(
+        f"{'mode':<20}{'KB/motion':>11}{'KB/still':>10}"
+        f"{'ms/frame':>10}{'switches':>10}"
+    )
+    for mode, video in modes:
+        motion_kilobytes, still_kilobytes, milliseconds, switches = measure(
+            session, arguments.motion, video
+        )
+        print(
+            f"{mode:<20}{motion_kilobytes:>11.1f}{still_kilobytes:>10.1f}"
+            f"{milliseconds:>10.1f}{switches:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()